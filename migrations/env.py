@@ -51,6 +51,21 @@ def get_metadata():
     return target_db.metadata
 
 
+def _virtual_tables():
+    # SQLite R*Tree (utils.geo_index) and FTS5 (utils.job_search) indexes: created by the
+    # app, not by migrations, and each backed by shadow tables named <table>_<suffix>
+    from shrambandhu.utils.geo_index import RTREE_TABLES
+    from shrambandhu.utils.job_search import FTS_TABLE
+    return tuple(RTREE_TABLES.values()) + (FTS_TABLE,)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the virtual index tables and their shadow tables."""
+    if type_ == 'table' and reflected and compare_to is None:
+        return not any(name == table or name.startswith(table + '_') for table in _virtual_tables())
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +80,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -97,6 +113,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
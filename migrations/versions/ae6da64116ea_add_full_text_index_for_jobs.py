@@ -0,0 +1,35 @@
+"""Add full-text index for jobs
+
+Revision ID: ae6da64116ea
+Revises: ddd6803afd03
+Create Date: 2026-10-16 15:20:37.914562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ae6da64116ea'
+down_revision = 'ddd6803afd03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return # Keyword search falls back to ILIKE on other engines
+    if not bind.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        return
+
+    # Must match shrambandhu.utils.job_search.create_fts_table
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts "
+               "USING fts5(title, description, address, tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    op.execute("INSERT INTO jobs_fts (rowid, title, description, address) "
+               "SELECT id, title, description, address FROM jobs WHERE status = 'active'")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS jobs_fts")
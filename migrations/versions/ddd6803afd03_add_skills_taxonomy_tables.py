@@ -0,0 +1,145 @@
+"""Add skills taxonomy tables
+
+Revision ID: ddd6803afd03
+Revises: 9916cd9ebfb2
+Create Date: 2026-10-16 13:47:05.208311
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ddd6803afd03'
+down_revision = '9916cd9ebfb2'
+branch_labels = None
+depends_on = None
+
+# Snapshot of shrambandhu.utils.skills.SEED_SKILLS at the time of this revision
+SEED_SKILLS = {
+    'plumbing': [('plumber', 'en'), ('pipe fitting', 'en'), ('प्लम्बर', 'hi'), ('प्लंबर', 'hi'), ('नलसाज़', 'hi'), ('nalsaz', 'hi-Latn')],
+    'masonry': [('mason', 'en'), ('bricklaying', 'en'), ('मिस्त्री', 'hi'), ('राजमिस्त्री', 'hi'), ('mistri', 'hi-Latn'), ('raj mistri', 'hi-Latn')],
+    'carpentry': [('carpenter', 'en'), ('woodwork', 'en'), ('बढ़ई', 'hi'), ('badhai', 'hi-Latn')],
+    'electrical': [('electrician', 'en'), ('wiring', 'en'), ('बिजली', 'hi'), ('इलेक्ट्रीशियन', 'hi'), ('bijli', 'hi-Latn'), ('bijli ka kaam', 'hi-Latn')],
+    'painting': [('painter', 'en'), ('पेंटर', 'hi'), ('रंगाई', 'hi'), ('putai', 'hi-Latn')],
+    'welding': [('welder', 'en'), ('वेल्डर', 'hi'), ('वेल्डिंग', 'hi')],
+    'tiling': [('tiler', 'en'), ('tile work', 'en'), ('टाइल', 'hi')],
+    'construction labour': [('labour', 'en'), ('labor', 'en'), ('helper', 'en'), ('मजदूर', 'hi'), ('मज़दूर', 'hi'), ('mazdoor', 'hi-Latn')],
+    'driving': [('driver', 'en'), ('ड्राइवर', 'hi'), ('चालक', 'hi')],
+    'cleaning': [('cleaner', 'en'), ('housekeeping', 'en'), ('सफाई', 'hi'), ('safai', 'hi-Latn')],
+    'cooking': [('cook', 'en'), ('रसोइया', 'hi'), ('खाना बनाना', 'hi'), ('rasoiya', 'hi-Latn')],
+    'tailoring': [('tailor', 'en'), ('दर्जी', 'hi'), ('सिलाई', 'hi'), ('darzi', 'hi-Latn')],
+    'textile': [('weaving', 'en'), ('weaver', 'en'), ('बुनकर', 'hi'), ('बुनाई', 'hi')],
+    'loading': [('loader', 'en'), ('porter', 'en'), ('हम्माल', 'hi'), ('palledar', 'hi-Latn')],
+    'gardening': [('gardener', 'en'), ('माली', 'hi'), ('mali', 'hi-Latn')],
+    'security guard': [('guard', 'en'), ('watchman', 'en'), ('चौकीदार', 'hi'), ('chowkidar', 'hi-Latn')],
+}
+
+_meta = sa.MetaData()
+skills_table = sa.Table('skills', _meta, sa.Column('id', sa.Integer, primary_key=True),
+                        sa.Column('name', sa.String), sa.Column('created_at', sa.DateTime))
+aliases_table = sa.Table('skill_aliases', _meta, sa.Column('id', sa.Integer, primary_key=True),
+                         sa.Column('skill_id', sa.Integer), sa.Column('alias', sa.String),
+                         sa.Column('language', sa.String))
+
+
+def _normalize(name):
+    return ' '.join(name.split()).lower()
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('skill_aliases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.Column('alias', sa.String(length=100), nullable=False),
+    sa.Column('language', sa.String(length=10), nullable=True),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('alias')
+    )
+    with op.batch_alter_table('skill_aliases', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_skill_aliases_skill_id'), ['skill_id'], unique=False)
+
+    op.create_table('job_skills',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'skill_id')
+    )
+    with op.batch_alter_table('job_skills', schema=None) as batch_op:
+        batch_op.create_index('ix_job_skills_skill_id', ['skill_id', 'job_id'], unique=False)
+
+    op.create_table('worker_skills',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'skill_id')
+    )
+    with op.batch_alter_table('worker_skills', schema=None) as batch_op:
+        batch_op.create_index('ix_worker_skills_skill_id', ['skill_id', 'user_id'], unique=False)
+
+    # ### end Alembic commands ###
+
+    # Seed the taxonomy, then link existing workers/jobs from their comma-separated text
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    alias_to_skill = {}
+
+    def add_skill(name, aliases):
+        skill_id = bind.execute(skills_table.insert().values(name=name, created_at=now)).inserted_primary_key[0]
+        for alias, language in [(name, 'en')] + aliases:
+            alias = _normalize(alias)
+            if alias not in alias_to_skill:
+                bind.execute(aliases_table.insert().values(skill_id=skill_id, alias=alias, language=language))
+                alias_to_skill[alias] = skill_id
+        return skill_id
+
+    for name, aliases in SEED_SKILLS.items():
+        add_skill(name, aliases)
+
+    for source, owner_col, link_table in (('users', 'skills', 'worker_skills'),
+                                          ('jobs', 'skills_required', 'job_skills')):
+        owner_key = 'user_id' if link_table == 'worker_skills' else 'job_id'
+        rows = bind.execute(sa.text(
+            f"SELECT id, {owner_col} FROM {source} WHERE {owner_col} IS NOT NULL AND {owner_col} != ''"
+        )).fetchall()
+        links = []
+        for owner_id, text_value in rows:
+            seen = set()
+            for term in (_normalize(t) for t in text_value.split(',') if t.strip()):
+                skill_id = alias_to_skill.get(term) or add_skill(term, [])
+                if skill_id not in seen:
+                    seen.add(skill_id)
+                    links.append({'owner': owner_id, 'skill': skill_id})
+        if links:
+            bind.execute(sa.text(f"INSERT INTO {link_table} ({owner_key}, skill_id) VALUES (:owner, :skill)"),
+                         links)
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('worker_skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_worker_skills_skill_id')
+
+    op.drop_table('worker_skills')
+    with op.batch_alter_table('job_skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_skills_skill_id')
+
+    op.drop_table('job_skills')
+    with op.batch_alter_table('skill_aliases', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_skill_aliases_skill_id'))
+
+    op.drop_table('skill_aliases')
+    op.drop_table('skills')
+    # ### end Alembic commands ###
@@ -33,6 +33,35 @@ def create_app(config_name=None):
     csrf.init_app(app) # Initialize CSRF protection
     mail.init_app(app) # Initialize Mail
 
+    # Mapper events that keep the spatial index in sync with Job/User locations
+    from .utils import geo_index # noqa: F401
+    # ... and the full-text index with Job title/description/address
+    from .utils import job_search # noqa: F401
+    # Per-process active job snapshot (bumps cache_versions on Job writes)
+    from .utils import job_snapshot
+    job_snapshot.init_app(app)
+    from .utils import facilities
+    facilities.init_app(app)
+    from .utils import sos
+    sos.init_app(app)
+    from .utils import notifications # noqa: F401 (unread counter session hooks)
+    from .utils import view_counter
+    view_counter.init_app(app)
+    from .utils import mail_dispatcher
+    mail_dispatcher.init_app(app)
+
+    # --- CLI Commands ---
+    from .commands import geo_cli, search_cli, facilities_cli, stats_cli, notifications_cli, tasks_cli, worker, messaging_cli, stt_cli
+    app.cli.add_command(geo_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(facilities_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(worker)
+    app.cli.add_command(messaging_cli)
+    app.cli.add_command(stt_cli)
+
     # --- Jinja Filters ---
     @app.template_filter('time_ago')
     def time_ago_filter(dt):
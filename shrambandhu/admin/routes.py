@@ -2,36 +2,43 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import current_user , login_required 
 from shrambandhu.extensions import db
 from shrambandhu.models import User, Job, Payment, EmergencyAlert, DocumentVerification, Certification, WorkerCertification, Application, Rating
+from shrambandhu.models import JOB_SUMMARY, USER_SUMMARY
 #from shrambandhu.utils.auth import login_required  # Your custom decorator
-from shrambandhu.utils.twilio_client import send_whatsapp_message
+from shrambandhu.utils.tasks import enqueue
+from shrambandhu.utils.reputation import completed_job_changed
+from shrambandhu.utils.rollups import metric_totals, metric_series, bucket_start
+from shrambandhu.utils.pagination import keyset_paginate, datetime_key
+from shrambandhu.utils.admin_lists import (list_filters, filter_args, date_range, prefix_range, user_search,
+                                           approximate_total, rollup_total, USER_ROLES, USER_STATUSES,
+                                           JOB_STATUSES, ALERT_STATUSES, CERT_STATUSES)
 from . import admin_bp
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
 
 @admin_bp.route('/')
 @login_required
 def dashboard():
-    # Platform Statistics
+    # Platform Statistics (from metric_rollups, see utils.rollups)
+    totals = metric_totals(['users_by_role', 'jobs_by_status', 'payments_by_status', 'payment_volume'])
+    users, jobs, payments = totals['users_by_role'], totals['jobs_by_status'], totals['payments_by_status']
+    new_signups = metric_totals(['signups'], granularity='hour', since=datetime.utcnow() - timedelta(days=1))['signups']
     stats = {
         'users': {
-            'total': User.query.count(),
-            'workers': User.query.filter_by(role='worker').count(),
-            'employers': User.query.filter_by(role='employer').count(),
-            'new_today': User.query.filter(
-                User.created_at >= datetime.utcnow() - timedelta(days=1)
-            ).count()
+            'total': int(sum(users.values())),
+            'workers': int(users.get('worker', 0)),
+            'employers': int(users.get('employer', 0)),
+            'new_today': int(sum(new_signups.values())) # Last 24 hourly buckets
         },
         'jobs': {
-            'total': Job.query.count(),
-            'active': Job.query.filter_by(status='active').count(),
-            'completed': Job.query.filter_by(status='completed').count()
+            'total': int(sum(jobs.values())),
+            'active': int(jobs.get('active', 0)),
+            'completed': int(jobs.get('completed', 0))
         },
         'payments': {
-            'total_amount': db.session.query(
-                func.sum(Payment.amount)
-            ).scalar() or 0,
-            'verified': Payment.query.filter_by(status='verified').count(),
-            'disputed': Payment.query.filter_by(status='disputed').count()
+            'total_amount': sum(totals['payment_volume'].values()),
+            'verified': int(payments.get('verified', 0)),
+            'disputed': int(payments.get('disputed', 0))
         }
     }
 
@@ -59,11 +66,38 @@ def dashboard():
                          pending_documents=pending_documents,
                          datetime=datetime) 
 
+def _admin_page(name, query, columns, count, descending=True, parse_key=datetime_key):
+    """Keyset page of the admin list `name` (newest first by default), from the request's cursor."""
+    # Cursors are tied to their list: one from /admin/jobs restarts /admin/users at page 1
+    return keyset_paginate(query, columns, request.args.get('cursor'), f'admin:{name}',
+                           current_app.config.get('ADMIN_LIST_PER_PAGE', 50), count,
+                           descending=descending, parse_key=parse_key)
+
+
+def _matching_user_ids(term):
+    return select(User.id).where(user_search(term))
+
+
 @admin_bp.route('/users')
 @login_required
 def manage_users():
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('admin/users.html', users=users)
+    filters = list_filters(request.args, roles=USER_ROLES, statuses=USER_STATUSES)
+    query = User.query.filter(*date_range(User.created_at, filters))
+    if filters.role:
+        query = query.filter(User.role == filters.role)
+    if filters.status:
+        query = query.filter(User.is_active.is_(filters.status == 'active'))
+    if filters.q:
+        query = query.filter(user_search(filters.q))
+
+    def count():
+        if not (filters.q or filters.status or filters.date_from or filters.date_to):
+            return rollup_total('users_by_role', filters.role)
+        return approximate_total('users', filters, query.order_by(None).count)
+
+    users_page = _admin_page('users', query.options(load_only(*USER_SUMMARY)), [User.created_at, User.id], count)
+    return render_template('admin/users.html', users_page=users_page, filters=filters,
+                           list_args=filter_args(filters), roles=USER_ROLES, statuses=USER_STATUSES)
 
 @admin_bp.route('/users/<int:user_id>/toggle', methods=['POST'])
 @login_required
@@ -72,23 +106,45 @@ def toggle_user(user_id):
     user.is_active = not user.is_active
     db.session.commit()
     flash(f'User {user.phone} has been {"activated" if user.is_active else "deactivated"}', 'success')
-    return redirect(url_for('admin.manage_users'))
+    return redirect(request.referrer or url_for('admin.manage_users')) # Back to the same page/filters
 
 
 @admin_bp.route('/jobs')
 @login_required
 def manage_jobs():
-    jobs = Job.query.order_by(Job.created_at.desc()).all()
-    return render_template('admin/jobs.html', jobs=jobs)
+    filters = list_filters(request.args, statuses=JOB_STATUSES)
+    query = Job.query.filter(*date_range(Job.created_at, filters))
+    if filters.status:
+        query = query.filter(Job.status == filters.status)
+    if filters.q: # Jobs by employer phone / email / name
+        query = query.filter(Job.employer_id.in_(_matching_user_ids(filters.q)))
+
+    def count():
+        if not (filters.q or filters.date_from or filters.date_to):
+            return rollup_total('jobs_by_status', filters.status)
+        return approximate_total('jobs', filters, query.order_by(None).count)
+
+    jobs_page = _admin_page('jobs', query.options(load_only(*JOB_SUMMARY), db.joinedload(Job.employer).load_only(*USER_SUMMARY)),
+                            [Job.created_at, Job.id], count)
+    return render_template('admin/jobs.html', jobs_page=jobs_page, filters=filters,
+                           list_args=filter_args(filters), statuses=JOB_STATUSES)
 
 
 @admin_bp.route('/emergency-alerts')
 @login_required
 def emergency_alerts():
-    alerts = EmergencyAlert.query.order_by(
-        EmergencyAlert.created_at.desc()
-    ).all()
-    return render_template('admin/emergency_alerts.html', alerts=alerts)
+    filters = list_filters(request.args, statuses=ALERT_STATUSES)
+    query = EmergencyAlert.query.filter(*date_range(EmergencyAlert.created_at, filters))
+    if filters.status:
+        query = query.filter(EmergencyAlert.status == filters.status)
+    if filters.q: # Alerts by worker phone / email / name
+        query = query.filter(EmergencyAlert.worker_id.in_(_matching_user_ids(filters.q)))
+
+    alerts_page = _admin_page('alerts', query.options(db.joinedload(EmergencyAlert.worker)),
+                              [EmergencyAlert.created_at, EmergencyAlert.id],
+                              lambda: approximate_total('alerts', filters, query.order_by(None).count))
+    return render_template('admin/emergency_alerts.html', alerts_page=alerts_page, filters=filters,
+                           list_args=filter_args(filters), statuses=ALERT_STATUSES)
 
 
 @admin_bp.route('/resolve-alert/<int:alert_id>', methods=['POST'])
@@ -99,7 +155,7 @@ def resolve_alert(alert_id):
     alert.resolved_at = datetime.utcnow()
     db.session.commit()
     flash('Emergency marked as resolved', 'success')
-    return redirect(url_for('admin.emergency_alerts'))
+    return redirect(request.referrer or url_for('admin.emergency_alerts'))
 
 @admin_bp.route('/verify-document/<int:doc_id>', methods=['GET', 'POST'])
 @login_required
@@ -130,9 +186,17 @@ def verify_documents():
 @admin_bp.route('/certifications')
 @login_required
 def manage_certifications():
-    certifications = Certification.query.all()
+    # Reference catalog without timestamps: pages follow the primary key, search uses the unique name index
+    filters = list_filters(request.args)
+    query = Certification.query
+    if filters.q:
+        query = query.filter(prefix_range(Certification.name, filters.q))
+    certifications_page = _admin_page('certifications', query, [Certification.id],
+                                      lambda: approximate_total('certifications', filters, query.order_by(None).count),
+                                      descending=False, parse_key=lambda key: [int(key[0])])
     return render_template('admin/certifications.html',
-                         certifications=certifications)
+                         certifications_page=certifications_page, filters=filters,
+                         list_args=filter_args(filters))
 
 @admin_bp.route('/certifications/new', methods=['GET', 'POST'])
 @login_required
@@ -158,10 +222,6 @@ def add_certification():
 @admin_bp.route('/certifications/verify', methods=['GET', 'POST'])
 @login_required
 def verify_certifications():
-    pending_certs = WorkerCertification.query.filter_by(
-        verification_status='pending'
-    ).all()
-    
     if request.method == 'POST':
         cert_id = request.form.get('cert_id')
         action = request.form.get('action')
@@ -177,10 +237,29 @@ def verify_certifications():
             
             db.session.commit()
         
-        return redirect(url_for('admin.verify_certifications'))
-    
+        return redirect(request.referrer or url_for('admin.verify_certifications'))
+
+    # Review queue: oldest submissions first, pending unless another status is picked
+    filters = list_filters(request.args, statuses=CERT_STATUSES)
+    cert_id = request.args.get('cert_id', type=int)
+    query = WorkerCertification.query.filter(
+        WorkerCertification.verification_status == (filters.status or 'pending'),
+        *date_range(WorkerCertification.certified_at, filters))
+    if cert_id:
+        query = query.filter(WorkerCertification.certification_id == cert_id)
+    if filters.q:
+        query = query.filter(WorkerCertification.worker_id.in_(_matching_user_ids(filters.q)))
+
+    extra_args = {'cert_id': cert_id} if cert_id else {}
+    certs_page = _admin_page(
+        'worker_certifications',
+        query.options(db.joinedload(WorkerCertification.worker), db.joinedload(WorkerCertification.certification)),
+        [WorkerCertification.certified_at, WorkerCertification.id],
+        lambda: approximate_total('worker_certifications', filters + (cert_id,), query.order_by(None).count),
+        descending=False)
     return render_template('admin/verify_certifications.html',
-                         pending_certs=pending_certs)
+                         certs_page=certs_page, filters=filters, statuses=CERT_STATUSES,
+                         extra_args=extra_args, list_args=dict(filter_args(filters), **extra_args))
 
 
 @admin_bp.route('/payment-disputes')
@@ -207,10 +286,11 @@ def resolve_dispute(payment_id):
         payment.status = 'verified'
         payment.verified_at = datetime.utcnow()
         
-        # Notify both parties
+        # Notify both parties (WhatsApp via the task queue, sent once the resolution commits)
         message = f"Admin has verified your payment of ₹{payment.amount} for {payment.job.title}"
-        send_whatsapp_message(payment.worker.phone, message)
-        send_whatsapp_message(payment.employer.phone, message)
+        for party, user in (('worker', payment.worker), ('employer', payment.employer)):
+            enqueue('send_whatsapp', {'to': user.phone, 'body': message},
+                    idempotency_key=f"payment-verified:{payment.id}:{party}")
         
         flash('Payment verified by admin', 'success')
     else:
@@ -221,6 +301,8 @@ def resolve_dispute(payment_id):
             worker_id=payment.worker_id
         ).first()
         if application:
+            if application.status == 'accepted' and payment.job.status == 'completed':
+                completed_job_changed(application.worker_id, -1)
             application.status = 'applied'
         
         flash('Payment rejected by admin', 'warning')
@@ -232,21 +314,34 @@ def resolve_dispute(payment_id):
 @admin_bp.route('/analytics')
 @login_required
 def analytics_dashboard():
-    # Key metrics
-    total_workers = User.query.filter_by(role='worker').count()
-    total_employers = User.query.filter_by(role='employer').count()
-    total_jobs = Job.query.count()
-    total_payments = db.session.query(func.sum(Payment.amount)).scalar() or 0
+    # Key metrics (from metric_rollups, see utils.rollups)
+    totals = metric_totals(['users_by_role', 'jobs_by_status', 'payment_volume', 'ratings'])
+    total_workers = int(totals['users_by_role'].get('worker', 0))
+    total_employers = int(totals['users_by_role'].get('employer', 0))
+    total_jobs = int(sum(totals['jobs_by_status'].values()))
+    total_payments = sum(totals['payment_volume'].values())
     
     # Recent activity
     recent_jobs = Job.query.order_by(Job.created_at.desc()).limit(5).all()
     recent_payments = Payment.query.order_by(Payment.created_at.desc()).limit(5).all()
     
-    # Worker ratings distribution
-    rating_distribution = db.session.query(
-        Rating.rating,
-        func.count(Rating.id)
-    ).group_by(Rating.rating).all()
+    # Worker ratings distribution: (stars, count) pairs
+    rating_distribution = [(int(stars), int(count)) for stars, count in totals['ratings'].items() if stars]
+
+    # Daily trends for the last 30 days
+    since = datetime.utcnow() - timedelta(days=29)
+    signups = dict(metric_series('signups', since=since))
+    jobs_posted = dict(metric_series('jobs_posted', since=since))
+    volume = dict(metric_series('payment_volume', since=since))
+    trend = []
+    for offset in range(30):
+        day = bucket_start(since, 'day') + timedelta(days=offset)
+        trend.append({
+            'day': day,
+            'signups': int(sum(signups.get(day, {}).values())),
+            'jobs_posted': int(sum(jobs_posted.get(day, {}).values())),
+            'payment_volume': sum(volume.get(day, {}).values())
+        })
     
     return render_template('admin/analytics.html',
                          total_workers=total_workers,
@@ -255,7 +350,8 @@ def analytics_dashboard():
                          total_payments=total_payments,
                          recent_jobs=recent_jobs,
                          recent_payments=recent_payments,
-                         rating_distribution=rating_distribution)    
+                         rating_distribution=rating_distribution,
+                         trend=trend)    
 
 
 
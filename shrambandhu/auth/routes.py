@@ -4,7 +4,7 @@ from flask import Blueprint, request, redirect, url_for, flash, session, render_
 from flask_login import login_user, logout_user, login_required, current_user
 from shrambandhu.extensions import db, bcrypt, mail # Import necessary extensions
 from shrambandhu.models import User 
-from shrambandhu.utils.twilio_client import send_sms # Keep for OTP
+from shrambandhu.utils.tasks import enqueue_otp # OTP SMS go through the task queue
 from shrambandhu.utils.email import send_verification_email, send_password_reset_email # Import email functions
 from .forms import RegistrationForm, LoginForm, OTPLoginForm, VerifyOTPForm, RequestPasswordResetForm, ResetPasswordForm , PhoneRegistrationForm # Import forms
 from datetime import datetime, timedelta
@@ -44,8 +44,8 @@ def register():
 
             # Send email verification link
             token = user.generate_token(purpose='email_verify')
-            db.session.commit() # Save user and token
-            send_verification_email(user, token) # Call the email sending function
+            send_verification_email(user, token) # Queued with the user (utils.tasks)
+            db.session.commit() # Save user, token and email task
 
             flash('Registration successful! Please check your email to verify your account.', 'success')
             # Redirect to login page after registration
@@ -205,8 +205,8 @@ def reset_request():
             try:
                 # Send password reset email
                 token = user.generate_token(purpose='password_reset', expires_in=1800) # 30 min expiry
-                db.session.commit()
                 send_password_reset_email(user, token)
+                db.session.commit() # Token and email task together
                 flash('A password reset link has been sent to your email.', 'info')
             except Exception as e:
                 db.session.rollback()
@@ -504,17 +504,13 @@ def register_phone():
             # If user exists but isn't phone verified, maybe resend OTP?
             if not existing_user.is_phone_verified:
                 try:
-                    otp = existing_user.generate_otp()
-                    db.session.commit()
-                    message = f"Your ShramBandhu verification OTP is: {otp}. Valid for 5 minutes."
-                    sms_sent = send_sms(phone, message)
-                    if sms_sent:
-                        flash('Phone number already exists but is unverified. A new OTP has been sent.', 'info')
-                        session['otp_login_phone'] = phone # Use same session key as login for verify step
-                        session['otp_verify_purpose'] = 'registration' # Optional: flag for verify step if needed
-                        return redirect(url_for('auth.verify_login_otp')) # Redirect to the OTP entry page
-                    else:
-                        flash('Phone number already exists but failed to resend OTP. Please try again.', 'danger')
+                    existing_user.generate_otp()
+                    enqueue_otp(existing_user, 'verification')
+                    db.session.commit() # OTP and its SMS task together
+                    flash('Phone number already exists but is unverified. A new OTP has been sent.', 'info')
+                    session['otp_login_phone'] = phone # Use same session key as login for verify step
+                    session['otp_verify_purpose'] = 'registration' # Optional: flag for verify step if needed
+                    return redirect(url_for('auth.verify_login_otp')) # Redirect to the OTP entry page
                 except Exception as e:
                      db.session.rollback()
                      current_app.logger.error(f"OTP Resend Error for {phone}: {e}")
@@ -534,22 +530,17 @@ def register_phone():
                     is_active=True # Activate immediately, verification gates usage
                 )
                 # No password needed for phone-only registration/login flow
-                otp = user.generate_otp() # Generate OTP for verification
+                user.generate_otp() # Generate OTP for verification
                 db.session.add(user)
-                db.session.commit()
+                db.session.flush() # User id for the idempotency key
 
-                # Send OTP
-                message = f"Your ShramBandhu registration OTP is: {otp}. Valid for 5 minutes."
-                sms_sent = send_sms(phone, message)
-                if sms_sent:
-                    flash('Registration initiated! Please enter the OTP sent to your phone.', 'success')
-                    session['otp_login_phone'] = phone # Store phone for verification step
-                    session['otp_verify_purpose'] = 'registration' # Optional flag
-                    return redirect(url_for('auth.verify_login_otp')) # Use the same OTP verification page
-                else:
-                    # User created but OTP failed - allow retry later?
-                    flash('Account created but failed to send OTP. Please try logging in via OTP later.', 'warning')
-                    return redirect(url_for('auth.login_otp'))
+                # Send OTP (queued; committed with the user)
+                enqueue_otp(user, 'registration')
+                db.session.commit()
+                flash('Registration initiated! Please enter the OTP sent to your phone.', 'success')
+                session['otp_login_phone'] = phone # Store phone for verification step
+                session['otp_verify_purpose'] = 'registration' # Optional flag
+                return redirect(url_for('auth.verify_login_otp')) # Use the same OTP verification page
 
             except Exception as e:
                 db.session.rollback()
@@ -0,0 +1,219 @@
+# shrambandhu/commands.py
+"""Flask CLI commands (run as `flask <group> <command>`)."""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from shrambandhu.extensions import db
+
+geo_cli = AppGroup('geo', help='Spatial index maintenance.')
+search_cli = AppGroup('search', help='Full-text job search index maintenance.')
+facilities_cli = AppGroup('facilities', help='Emergency facility registry.')
+stats_cli = AppGroup('stats', help='Denormalized counters and statistics.')
+notifications_cli = AppGroup('notifications', help='Notification inbox maintenance.')
+tasks_cli = AppGroup('tasks', help='Background task queue maintenance.')
+messaging_cli = AppGroup('messaging', help='Outbound SMS/WhatsApp gateway.')
+stt_cli = AppGroup('stt', help='Speech-to-text transcription cache.')
+
+
+@geo_cli.command('reindex')
+def geo_reindex():
+    """Create the SQLite R*Tree tables if missing and rebuild geo_cell + R*Tree for jobs and users."""
+    from shrambandhu.models import Job, User
+    from shrambandhu.utils.geo_index import create_rtree_tables, rebuild_index
+
+    connection = db.session.connection()
+    if create_rtree_tables(connection):
+        click.echo('R*Tree tables present.')
+    else:
+        click.echo(f'{connection.dialect.name}: no R*Tree support, indexing geo_cell only.')
+    for model in (Job, User):
+        count = rebuild_index(connection, model)
+        click.echo(f'Indexed {count} {model.__tablename__}.')
+    db.session.commit()
+
+
+@geo_cli.command('geocode-missing')
+@click.option('--limit', type=int, default=None, help='Maximum provider lookups this run (cache hits are free).')
+def geo_geocode_missing(limit):
+    """Fill in coordinates for jobs/users with an address but no location (run from cron)."""
+    from shrambandhu.models import Job, User
+    from shrambandhu.utils.geocoding import geocode_missing
+
+    results = geocode_missing(((Job, 'address'), (User, 'location_address')), limit=limit)
+    for table_name, (resolved, unresolved) in results.items():
+        click.echo(f'{table_name}: {resolved} geocoded, {unresolved} unresolved.')
+
+
+@geo_cli.command('build-job-index')
+def geo_build_job_index():
+    """Write the shared memory-mapped job index (JOB_INDEX_BACKEND=mmap), e.g. before workers start."""
+    from shrambandhu.utils.shared_job_index import SharedJobIndex
+
+    index = current_app.extensions.get('job_snapshot')
+    if not isinstance(index, SharedJobIndex):
+        click.echo('JOB_INDEX_BACKEND is not "mmap"; nothing to build.')
+        return
+    data = index.write()
+    click.echo(f'Wrote {len(data)} jobs at generation {data.generation} to {index.path}.')
+
+
+@search_cli.command('reindex')
+def search_reindex():
+    """Create the SQLite FTS5 table if missing and re-index all active jobs."""
+    from shrambandhu.utils.job_search import create_fts_table, rebuild_fts
+
+    connection = db.session.connection()
+    if not create_fts_table(connection):
+        click.echo(f'{connection.dialect.name}: no FTS5 support, keyword search uses ILIKE.')
+        return
+    count = rebuild_fts(connection)
+    db.session.commit()
+    click.echo(f'Indexed {count} active jobs.')
+
+
+@facilities_cli.command('load')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--source', default=None, help='Dataset name; its previous rows are replaced (default: file name).')
+@click.option('--type', 'default_type', default='hospital', show_default=True,
+              help='Facility type for records without one.')
+def facilities_load(path, source, default_type):
+    """Load a CSV or GeoJSON facility dataset. Running servers pick it up without a restart."""
+    from shrambandhu.utils.facilities import load_facilities
+
+    loaded, skipped = load_facilities(path, source=source, default_type=default_type)
+    click.echo(f'Loaded {loaded} facilities ({skipped} records skipped: missing name or coordinates).')
+
+
+@stats_cli.command('reconcile-reputation')
+def stats_reconcile_reputation():
+    """Rebuild users' rating and completed-job counters from ratings/applications."""
+    from shrambandhu.utils.reputation import reconcile_reputation
+
+    fixed = reconcile_reputation(db.session.connection())
+    db.session.commit()
+    click.echo(f'Reconciled reputation counters: {fixed} users corrected.')
+
+
+@stats_cli.command('rollup')
+@click.option('--days', type=int, default=2, show_default=True, help='Recompute flow buckets this far back.')
+@click.option('--full', is_flag=True, help='Recompute all history (e.g. after the first deploy).')
+def stats_rollup(days, full):
+    """Refresh metric_rollups from the raw tables (run from cron, e.g. hourly)."""
+    from shrambandhu.utils.rollups import run_rollup
+
+    result = run_rollup(db.session.connection(), days=days, full=full,
+                        hourly_retention_days=current_app.config.get('STATS_HOURLY_RETENTION_DAYS', 14))
+    db.session.commit()
+    click.echo(f"Rolled up {result['flow_buckets']} flow buckets, {result['level_corrections']} level corrections, "
+               f"pruned {result['pruned']} hourly rows.")
+
+
+@notifications_cli.command('archive')
+@click.option('--days', type=int, default=None, help='Archive notifications older than this (default: NOTIFICATION_RETENTION_DAYS).')
+@click.option('--batch-size', type=int, default=1000, show_default=True)
+def notifications_archive(days, batch_size):
+    """Move old notifications to notifications_archive (run from cron, e.g. daily)."""
+    from shrambandhu.utils.notifications import archive_notifications
+
+    days = days if days is not None else current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90)
+    moved = archive_notifications(days, batch_size=batch_size)
+    click.echo(f'Archived {moved} notifications older than {days} days.')
+
+
+@notifications_cli.command('reconcile')
+def notifications_reconcile():
+    """Rebuild users' unread notification counters from the notifications table."""
+    from shrambandhu.utils.notifications import reconcile_unread
+
+    fixed = reconcile_unread(db.session.connection())
+    db.session.commit()
+    click.echo(f'Reconciled unread counters: {fixed} users corrected.')
+
+
+@click.command('worker')
+@click.option('--concurrency', type=int, default=None, help='Tasks run at once (default: TASK_WORKER_CONCURRENCY).')
+@click.option('--drain', is_flag=True, help='Exit once no task is due instead of polling forever.')
+def worker(concurrency, drain):
+    """Run queued background tasks (SMS, WhatsApp, email, speech-to-text) until interrupted."""
+    import signal
+    from shrambandhu.utils.tasks import TaskWorker
+
+    app = current_app._get_current_object()
+    task_worker = TaskWorker(app, concurrency=concurrency or app.config.get('TASK_WORKER_CONCURRENCY', 4),
+                             poll_interval=app.config.get('TASK_POLL_SECONDS', 1.0),
+                             lease_seconds=app.config.get('TASK_LEASE_SECONDS', 300))
+    signal.signal(signal.SIGTERM, lambda *args: task_worker.stop())
+    click.echo(f'Task worker {task_worker.name} started.')
+    try:
+        started = task_worker.run(drain=drain)
+    except KeyboardInterrupt:
+        task_worker.stop()
+        started = None
+    click.echo(f'Task worker stopped{f" after {started} tasks" if started is not None else ""}.')
+
+
+@tasks_cli.command('stats')
+def tasks_stats():
+    """Show how many tasks are in each state."""
+    from shrambandhu.utils.tasks import task_counts
+
+    counts = task_counts()
+    for status in ('queued', 'running', 'done', 'failed'):
+        click.echo(f'{status}: {counts.get(status, 0)}')
+
+
+@tasks_cli.command('purge')
+@click.option('--days', type=int, default=None, help='Delete finished tasks older than this (default: TASK_RETENTION_DAYS).')
+def tasks_purge(days):
+    """Delete done/failed tasks past retention (run from cron, e.g. daily)."""
+    from shrambandhu.utils.tasks import purge_finished
+
+    days = days if days is not None else current_app.config.get('TASK_RETENTION_DAYS', 7)
+    click.echo(f'Purged {purge_finished(days)} finished tasks older than {days} days.')
+
+
+@messaging_cli.command('bench')
+@click.option('--count', type=int, default=500, help='Messages to send.')
+@click.option('--latency-ms', type=int, default=None, help='Fake provider latency (default: MESSAGING_FAKE_LATENCY_MS).')
+@click.option('--failure-rate', type=float, default=0.0, help='Fraction of sends the fake provider fails.')
+@click.option('--rate', type=float, default=None, help='Sends per second per sender, 0 for unlimited (default: MESSAGING_RATE_PER_SECOND).')
+def messaging_bench(count, latency_ms, failure_rate, rate):
+    """Measure send_batch() throughput against the local fake provider (nothing is sent)."""
+    import time
+    from shrambandhu.utils.messaging import FakeProvider, MessagingGateway
+
+    config = current_app.config
+    provider = FakeProvider(latency_ms if latency_ms is not None else config.get('MESSAGING_FAKE_LATENCY_MS', 50),
+                            failure_rate)
+    gateway = MessagingGateway(provider, '+15550000000',
+                               rate_per_second=rate if rate is not None else config.get('MESSAGING_RATE_PER_SECOND', 10),
+                               burst=config.get('MESSAGING_BURST', 20),
+                               rate_wait_seconds=config.get('MESSAGING_RATE_WAIT_SECONDS', 10),
+                               batch_workers=config.get('MESSAGING_BATCH_WORKERS', 8))
+    started = time.monotonic()
+    results = gateway.send_batch([(f'+9190000{n:05d}', 'Benchmark message') for n in range(count)])
+    elapsed = time.monotonic() - started
+    sent = sum(1 for r in results if r.sid)
+    click.echo(f'{sent}/{len(results)} sent in {elapsed:.2f}s ({len(results) / elapsed:.0f} msg/s), '
+               f'{sum(1 for r in results if r.sid is None and r.retryable)} retryable failures.')
+
+
+@stt_cli.command('cache-stats')
+@click.option('--days', type=int, default=None, help='Only count the last N days (default: all).')
+def stt_cache_stats(days):
+    """Show transcription cache hits and misses (provider calls saved / made)."""
+    from datetime import datetime, timedelta
+    from shrambandhu.utils.transcription_cache import cache_stats
+
+    stats = cache_stats(since=datetime.utcnow() - timedelta(days=days - 1) if days else None)
+    lookups = stats['hit'] + stats['miss']
+    hit_rate = f" ({stats['hit'] / lookups:.0%} hit rate)" if lookups else ''
+    click.echo(f"{stats['hit']} hits, {stats['miss']} misses{hit_rate}.")
+
+
+@stt_cli.command('purge-cache')
+def stt_purge_cache():
+    """Delete expired transcription cache entries (run from cron, e.g. daily)."""
+    from shrambandhu.utils.transcription_cache import purge_expired
+
+    click.echo(f'Purged {purge_expired()} expired transcriptions.')
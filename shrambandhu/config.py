@@ -1,5 +1,6 @@
 # shrambandhu/config.py (Revised to use os.getenv)
 import os
+import tempfile
 # from decouple import config # No longer using decouple
 
 # Helper function for casting boolean env vars
@@ -28,11 +29,32 @@ class Config:
     TWILIO_TWIML_APP_SID = os.getenv('TWILIO_TWIML_APP_SID', None)
     TWILIO_API_KEY = os.getenv('TWILIO_API_KEY', None)
     TWILIO_API_SECRET = os.getenv('TWILIO_API_SECRET', None)
+    TWILIO_TIMEOUT_SECONDS = float(os.getenv('TWILIO_TIMEOUT_SECONDS', '8')) # Per API request
+
+    # Outbound messaging gateway (utils.messaging)
+    MESSAGING_PROVIDER = os.getenv('MESSAGING_PROVIDER', 'twilio') # 'fake' answers locally, for offline load tests
+    MESSAGING_POOL_SIZE = _get_int_env('MESSAGING_POOL_SIZE', 16) # Keep-alive HTTPS connections to the provider
+    MESSAGING_RATE_PER_SECOND = float(os.getenv('MESSAGING_RATE_PER_SECOND', '10')) # Per sender number and host; 0 disables
+    # Token buckets shared by all processes on the host live here; '' gives each process its own (and its own full rate)
+    MESSAGING_RATE_STATE_DIR = os.getenv('MESSAGING_RATE_STATE_DIR', os.path.join(tempfile.gettempdir(), 'shrambandhu-messaging'))
+    MESSAGING_BURST = _get_int_env('MESSAGING_BURST', 20)
+    MESSAGING_RATE_WAIT_SECONDS = float(os.getenv('MESSAGING_RATE_WAIT_SECONDS', '10')) # Then RateLimited (retryable)
+    MESSAGING_BATCH_WORKERS = _get_int_env('MESSAGING_BATCH_WORKERS', 8) # Concurrent sends in send_batch()
+    MESSAGING_FAKE_LATENCY_MS = _get_int_env('MESSAGING_FAKE_LATENCY_MS', 50)
+    MESSAGING_FAKE_FAILURE_RATE = float(os.getenv('MESSAGING_FAKE_FAILURE_RATE', '0'))
 
     # Google Cloud Credentials
     # Default path relative to this config file's directory
     _default_google_creds = os.path.join(os.path.dirname(__file__), '..', 'google-creds.json')
     GOOGLE_APPLICATION_CREDENTIALS = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', _default_google_creds)
+    # Speech-to-text (voice.stt)
+    STT_BACKEND = os.getenv('STT_BACKEND', 'google') # 'stub' returns STT_STUB_TRANSCRIPT without calling Google
+    STT_STUB_TRANSCRIPT = os.getenv('STT_STUB_TRANSCRIPT', '')
+    STT_CLIENT_POOL_SIZE = _get_int_env('STT_CLIENT_POOL_SIZE', 4) # SpeechClients (gRPC channels) per process
+    STT_LONG_RUNNING_SECONDS = _get_int_env('STT_LONG_RUNNING_SECONDS', 240) # Longer recordings: long-running recognition
+    STT_OPERATION_TIMEOUT_SECONDS = _get_int_env('STT_OPERATION_TIMEOUT_SECONDS', 600)
+    STT_CACHE_ENABLED = _get_bool_env('STT_CACHE_ENABLED', True) # Transcripts by audio content (utils.transcription_cache)
+    STT_CACHE_TTL_DAYS = _get_int_env('STT_CACHE_TTL_DAYS', 30)
 
     # Razorpay Configuration
     RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID', None)
@@ -62,6 +84,69 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME', 'apikey') # Usually 'apikey' for SendGrid
     MAIL_PASSWORD = os.getenv('SENDGRID_API_KEY', None) # Read SendGrid key directly
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@shrambandhu.app')
+    # Pooled SMTP sender (utils.mail_dispatcher), used by the task worker
+    MAIL_POOL_SIZE = _get_int_env('MAIL_POOL_SIZE', 3) # Sender threads, one persistent SMTP connection each
+    MAIL_QUEUE_SIZE = _get_int_env('MAIL_QUEUE_SIZE', 1000) # Messages waiting for a sender; full queue blocks producers
+    # Messages a sender takes at once; each send_email task waits for its message, so at most
+    # --concurrency are ever queued per worker process and batches are no bigger than that
+    MAIL_BATCH_SIZE = _get_int_env('MAIL_BATCH_SIZE', 50)
+    MAIL_IDLE_SECONDS = float(os.getenv('MAIL_IDLE_SECONDS', '30')) # Close a connection unused this long
+    MAIL_SEND_TIMEOUT = float(os.getenv('MAIL_SEND_TIMEOUT', '60')) # Task waits this long for queue space / delivery
+
+    # In-process active job snapshot (utils.job_snapshot)
+    JOB_SNAPSHOT_ENABLED = _get_bool_env('JOB_SNAPSHOT_ENABLED', True)
+    JOB_SNAPSHOT_CHECK_SECONDS = float(os.getenv('JOB_SNAPSHOT_CHECK_SECONDS', '2'))
+    # 'memory' keeps a copy per process; 'mmap' shares one file between workers (utils.shared_job_index)
+    JOB_INDEX_BACKEND = os.getenv('JOB_INDEX_BACKEND', 'memory')
+    JOB_INDEX_PATH = os.getenv('JOB_INDEX_PATH') # Defaults to instance/job_index.bin
+
+    # Geocoding cache (utils.geocoding)
+    GEOCODE_CACHE_SIZE = _get_int_env('GEOCODE_CACHE_SIZE', 1024) # In-memory LRU entries per process
+    GEOCODE_TTL_DAYS = _get_int_env('GEOCODE_TTL_DAYS', 90)
+    GEOCODE_NEGATIVE_TTL_HOURS = _get_int_env('GEOCODE_NEGATIVE_TTL_HOURS', 24)
+    GEOCODE_MIN_INTERVAL_SECONDS = float(os.getenv('GEOCODE_MIN_INTERVAL_SECONDS', '1')) # Nominatim: max 1 req/s
+    GEOCODE_TIMEOUT_SECONDS = _get_int_env('GEOCODE_TIMEOUT_SECONDS', 10)
+
+    # Emergency facility registry (utils.facilities)
+    FACILITY_INDEX_CHECK_SECONDS = float(os.getenv('FACILITY_INDEX_CHECK_SECONDS', '30')) # Reload check interval
+
+    # Cached current_user identity (utils.identity); 0 reads it from the database on every request
+    IDENTITY_CACHE_SECONDS = float(os.getenv('IDENTITY_CACHE_SECONDS', '60'))
+    IDENTITY_VERSION_CHECK_SECONDS = float(os.getenv('IDENTITY_VERSION_CHECK_SECONDS', '2')) # Max staleness of admin changes elsewhere
+
+    # Buffered profile view counter (utils.view_counter)
+    PROFILE_VIEW_FLUSH_SECONDS = float(os.getenv('PROFILE_VIEW_FLUSH_SECONDS', '10')) # 0 writes each view immediately
+    PROFILE_VIEW_DEDUPE_SECONDS = _get_int_env('PROFILE_VIEW_DEDUPE_SECONDS', 1800) # One view per employer per window; 0 counts all
+
+    # Worker dashboard counts cache (utils.worker_stats); 0 disables
+    WORKER_STATS_CACHE_SECONDS = float(os.getenv('WORKER_STATS_CACHE_SECONDS', '30'))
+
+    # Platform stats rollups (utils.rollups)
+    STATS_HOURLY_RETENTION_DAYS = _get_int_env('STATS_HOURLY_RETENTION_DAYS', 14) # Older hourly buckets are pruned
+
+    # Notification inbox (utils.notifications)
+    NOTIFICATIONS_PER_PAGE = _get_int_env('NOTIFICATIONS_PER_PAGE', 20)
+    NOTIFICATION_RETENTION_DAYS = _get_int_env('NOTIFICATION_RETENTION_DAYS', 90) # Older rows move to notifications_archive
+
+    # Admin list pages (utils.admin_lists)
+    ADMIN_LIST_PER_PAGE = _get_int_env('ADMIN_LIST_PER_PAGE', 50)
+    ADMIN_LIST_COUNT_CACHE_SECONDS = float(os.getenv('ADMIN_LIST_COUNT_CACHE_SECONDS', '300')) # Filtered totals; 0 counts every time
+
+    # Background task queue (utils.tasks, run by `flask worker`)
+    TASK_WORKER_CONCURRENCY = _get_int_env('TASK_WORKER_CONCURRENCY', 4) # Tasks run at once per worker process
+    TASK_POLL_SECONDS = float(os.getenv('TASK_POLL_SECONDS', '1')) # Idle wait between checks for due tasks
+    TASK_MAX_ATTEMPTS = _get_int_env('TASK_MAX_ATTEMPTS', 5)
+    TASK_RETRY_BASE_SECONDS = float(os.getenv('TASK_RETRY_BASE_SECONDS', '10')) # Doubles per attempt...
+    TASK_RETRY_MAX_SECONDS = float(os.getenv('TASK_RETRY_MAX_SECONDS', '3600')) # ...up to this
+    TASK_LEASE_SECONDS = _get_int_env('TASK_LEASE_SECONDS', 300) # Renewed while a task runs; lapsed: worker presumed dead, task requeued
+    TASK_RETENTION_DAYS = _get_int_env('TASK_RETENTION_DAYS', 7) # Finished tasks kept for inspection
+
+    # SOS dispatch (utils.sos)
+    SOS_RADIUS_KM = float(os.getenv('SOS_RADIUS_KM', '10')) # Nearby responders are messaged first
+    SOS_DISPATCH_WORKERS = _get_int_env('SOS_DISPATCH_WORKERS', 8) # Concurrent sends per process (messaging gateway's SOS lane)
+    SOS_SEND_DEADLINE_SECONDS = float(os.getenv('SOS_SEND_DEADLINE_SECONDS', '15')) # Sends still running after this are recorded as timeouts
+    SOS_CONCURRENT_DISPATCHES = _get_int_env('SOS_CONCURRENT_DISPATCHES', 4) # Alerts dispatched at once per process, off the request
+    SOS_LATENCY_SLO_SECONDS = float(os.getenv('SOS_LATENCY_SLO_SECONDS', '30')) # Alert creation -> last send
 
     # Add Flask-WTF specific CSRF config if needed
     WTF_CSRF_ENABLED = _get_bool_env('WTF_CSRF_ENABLED', True)
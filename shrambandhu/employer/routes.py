@@ -1,14 +1,16 @@
 # shrambandhu/employer/routes.py
 from flask import render_template, request, redirect, url_for, flash, Blueprint, current_app, abort # Added abort
-from shrambandhu.models import db, Job, User, Application, Payment, Rating, Notification
+from shrambandhu.models import db, Job, User, Application, Payment, Rating, Notification, JOB_SUMMARY, USER_SUMMARY
 from flask_login import login_required, current_user
 from datetime import datetime
 from shrambandhu.utils.payment import create_payment_order, verify_payment , get_razorpay_client
+from shrambandhu.utils.reputation import rating_saved, completed_job_changed
+from shrambandhu.utils.notifications import open_inbox, mark_read, notify, notify_many
 # from shrambandhu.utils.location import get_coordinates # Commented out if not used
 from werkzeug.utils import secure_filename
 import os
 from sqlalchemy import or_, and_, func, case # Added and_, func, case
-from sqlalchemy.orm import joinedload, selectinload # For eager loading
+from sqlalchemy.orm import joinedload, selectinload, load_only, undefer # For eager loading
 # Assuming PaymentForm is still needed for initiate_payment route
 from .forms import PaymentForm, PostJobForm, EditJobForm # Import job forms if used
 from shrambandhu.extensions import csrf
@@ -26,7 +28,7 @@ def dashboard():
     # --- Fetch Data for Dashboard ---
 
     # Basic User Info
-    user = User.query.get(current_user.id) # Already loaded by login_manager
+    user = User.query.get(current_user.id) # Full row; current_user is a cached identity (utils.identity)
 
     # Get Employer's Jobs with Counts (Active/Pending Apps)
     jobs_query = db.session.query(
@@ -37,6 +39,7 @@ def dashboard():
         func.count(Application.id).label('total_apps_count')
     ).outerjoin(Application, Job.id == Application.job_id)\
      .filter(Job.employer_id == current_user.id)\
+     .options(load_only(*JOB_SUMMARY))\
      .group_by(Job.id)\
      .order_by(Job.created_at.desc())
 
@@ -133,12 +136,12 @@ def post_job():
                 location_lat=latitude,
                 location_lng=longitude,
                 address=address,
-                skills_required=form.skills.data, # Store comma-separated
                 employer_id=current_user.id,
                 job_type=form.job_type.data,
                 duration_days=form.duration_days.data if form.job_type.data == 'contract' else None,
                 status='active'
             )
+            job.set_skills_list((form.skills.data or '').split(',')) # Canonical skills + comma-separated copy
             db.session.add(job); db.session.commit()
             flash('Job posted successfully!', 'success')
             return redirect(url_for('employer.dashboard'))
@@ -159,7 +162,7 @@ def view_job(job_id):
     # *** TEMPORARY SIMPLIFIED QUERY - REMOVED ALL .options() ***
     job = Job.query.filter(
         Job.id == job_id, Job.employer_id == current_user.id
-    ).first_or_404()
+    ).options(undefer(Job.description)).first_or_404()
     # *** END SIMPLIFIED QUERY ***
 
     # The rest of the logic relies on lazy loading relationships
@@ -214,7 +217,7 @@ def view_job(job_id):
 def edit_job(job_id):
     # ...(Refined implementation using EditJobForm)...
     if current_user.role != 'employer': flash('Access denied.', 'danger'); return redirect(url_for('index'))
-    job = Job.query.filter_by(id=job_id, employer_id=current_user.id).first_or_404()
+    job = Job.query.filter_by(id=job_id, employer_id=current_user.id).options(undefer(Job.description)).first_or_404()
 
     if job.status != 'active': flash('Only active jobs can be edited.', 'warning'); return redirect(url_for('employer.view_job', job_id=job.id))
 
@@ -238,7 +241,7 @@ def edit_job(job_id):
             job.location_lat = latitude
             job.location_lng = longitude
             job.address = form.address.data
-            job.skills_required = form.skills.data
+            job.set_skills_list((form.skills.data or '').split(','))
             job.job_type = form.job_type.data
             job.duration_days = form.duration_days.data if form.job_type.data == 'contract' else None
             job.updated_at = datetime.utcnow()
@@ -263,10 +266,10 @@ def edit_job(job_id):
 def view_applications(job_id):
     # ...(Implementation from previous step)...
     if current_user.role != 'employer': flash('Access denied.', 'danger'); return redirect(url_for('index'))
-    job = Job.query.options(joinedload(Job.employer)).filter_by(id=job_id, employer_id=current_user.id).first_or_404()
-    # Eager load worker details with applications
+    job = Job.query.options(load_only(*JOB_SUMMARY)).filter_by(id=job_id, employer_id=current_user.id).first_or_404()
+    # Eager load the worker columns the list shows with applications
     applications = Application.query.filter_by(job_id=job_id)\
-                                .options(joinedload(Application.worker))\
+                                .options(joinedload(Application.worker).load_only(*USER_SUMMARY))\
                                 .order_by(Application.applied_at.desc()).all()
     return render_template('applications.html', job=job, applications=applications)
 
@@ -285,23 +288,26 @@ def application_action(application_id):
     try:
         if action == 'accept':
             if job.status != 'active': flash('Job is not active, cannot accept application.', 'warning'); return redirect(url_for('employer.view_applications', job_id=job.id))
-            # Reject others, accept this one, update job status
-            Application.query.filter(Application.job_id == job.id, Application.id != application_id).update({'status': 'rejected'})
+            # Reject the other open applications, accept this one, update job status
+            others = (Application.job_id == job.id, Application.id != application_id,
+                      Application.status.in_(('applied', 'shortlisted')))
+            rejected_worker_ids = db.session.scalars(db.select(Application.worker_id).where(*others)).all()
+            Application.query.filter(*others).update({'status': 'rejected'}, synchronize_session=False)
             application.status = 'accepted'; job.status = 'in-progress'
-            # Notify worker
-            notification = Notification(user_id=application.worker_id, title="Application Accepted", message=f"Your application for '{job.title}' was accepted!") # Add link_url if needed
-            db.session.add(notification); flash('Application accepted.', 'success')
+            # Notify the accepted worker now, the rest through the task queue (queued in this commit)
+            notify(application.worker_id, 'application_accepted', {'job_title': job.title})
+            notify_many(rejected_worker_ids, 'application_rejected', {'job_title': job.title}, defer=True)
+            flash('Application accepted.', 'success')
         elif action == 'reject':
             application.status = 'rejected'
-            # Notify worker
-            notification = Notification(user_id=application.worker_id, title="Application Update", message=f"Regarding your application for '{job.title}', the employer has chosen another candidate.")
-            db.session.add(notification); flash('Application rejected.', 'info')
+            notify(application.worker_id, 'application_rejected', {'job_title': job.title})
+            flash('Application rejected.', 'info')
         elif action == 'complete':
             if application.status != 'accepted' or job.status != 'in-progress': flash('Cannot mark job complete from this state.', 'warning'); return redirect(url_for('employer.view_job', job_id=job.id))
             job.status = 'completed'; job.updated_at = datetime.utcnow()
-             # Notify worker
-            notification = Notification(user_id=application.worker_id, title="Job Completed", message=f"Job '{job.title}' has been marked complete by the employer.")
-            db.session.add(notification); flash('Job marked as completed. Please initiate payment and rate the worker.', 'success')
+            completed_job_changed(application.worker_id, +1)
+            notify(application.worker_id, 'job_completed', {'job_title': job.title})
+            flash('Job marked as completed. Please initiate payment and rate the worker.', 'success')
         else: flash('Invalid action.', 'danger'); return redirect(url_for('employer.view_applications', job_id=job.id))
         db.session.commit()
     except Exception as e:
@@ -464,8 +470,8 @@ def record_payment(application_id):
             # application.status = 'paid' # Or maybe a new status like 'payment_pending_verification'
             db.session.commit()
             # Notify worker to verify
-            notification = Notification(user_id=worker.id, title="Payment Recorded", message=f"Employer recorded a {payment.method} payment of Rs.{payment.amount} for '{job.title}'. Please verify in Payment History.")
-            db.session.add(notification); db.session.commit()
+            notify(worker.id, 'payment_recorded', {'method': payment.method, 'amount': payment.amount, 'job_title': job.title})
+            db.session.commit()
             flash('Payment recorded. Worker needs to verify.', 'success')
             return redirect(url_for('employer.view_job', job_id=job.id))
         except Exception as e: db.session.rollback(); flash('Error recording payment.', 'danger')
@@ -527,10 +533,12 @@ def rate_worker(job_id):
                 raise ValueError('Rating must be between 1 and 5.')
 
             if existing_rating:
+                rating_saved(existing_rating.worker_id, rating_val, previous=existing_rating.rating)
                 existing_rating.rating = rating_val
                 existing_rating.feedback = feedback
                 flash('Rating updated successfully!', 'success')
             else:
+                rating_saved(worker.id, rating_val)
                 new_rating = Rating(
                     job_id=job.id,
                     worker_id=worker.id,
@@ -565,17 +573,13 @@ def rate_worker(job_id):
 @employer_bp.route('/notifications')
 @login_required
 def notifications():
-    # ...(Implementation from previous step)...
     if current_user.role != 'employer': flash('Access denied.', 'danger'); return redirect(url_for('index'))
-    notifications = Notification.query.filter_by(user_id=current_user.id).order_by(Notification.created_at.desc()).all()
-    # Mark displayed notifications as read (or do this via JS onClick later)
-    try:
-        unread_ids = [n.id for n in notifications if not n.is_read]
-        if unread_ids:
-            Notification.query.filter(Notification.id.in_(unread_ids)).update({'is_read': True, 'read_at': datetime.utcnow()}, synchronize_session=False)
-            db.session.commit()
-    except Exception as e: db.session.rollback(); current_app.logger.error(f"Error marking notifications read: {e}")
-    return render_template('notifications.html', notifications=notifications)
+    # One page of the inbox; the notifications shown are marked read in a single UPDATE
+    unread_only = request.args.get('unread') == '1'
+    notifications_page = open_inbox(current_user, request.args.get('cursor'),
+                                    current_app.config.get('NOTIFICATIONS_PER_PAGE', 20), unread_only)
+    return render_template('notifications.html', notifications_page=notifications_page, unread_only=unread_only,
+                           inbox_endpoint='employer.notifications', read_endpoint='employer.clear_notifications')
 
 
 @employer_bp.route('/clear-notifications', methods=['POST'])
@@ -584,7 +588,7 @@ def clear_notifications():
     # ...(Implementation from previous step)...
      if current_user.role != 'employer': flash('Access denied.', 'danger'); return redirect(url_for('index'))
      try:
-        Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True, 'read_at': datetime.utcnow()}, synchronize_session=False)
+        mark_read(current_user.id, up_to_id=request.form.get('up_to_id', type=int)) # Not ones that arrived after the page was shown
         db.session.commit(); flash('All notifications marked as read', 'success')
      except Exception as e: db.session.rollback(); flash('Error clearing notifications', 'danger')
      return redirect(url_for('employer.notifications'))
@@ -20,6 +20,6 @@ login_manager.login_message_category = 'info' # Flash message category
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Required user loader function for Flask-Login."""
-    from .models import User # Local import to avoid circular dependency
-    return User.query.get(int(user_id))
\ No newline at end of file
+    """Required user loader function for Flask-Login. Returns a cached identity; the full User row loads on demand."""
+    from .utils.identity import load_identity # Local import to avoid circular dependency
+    return load_identity(int(user_id))
\ No newline at end of file
@@ -4,10 +4,7 @@ from twilio.twiml.voice_response import VoiceResponse, Gather, Record, Say # For
 from shrambandhu.models import db, User
 from shrambandhu.utils.twilio_client import send_sms # Optional: for sending confirmation SMS
 from shrambandhu.voice.stt import transcribe_audio, extract_worker_details # Reuse transcription
-import os
-import tempfile
 import requests # To download recording from Twilio
-from datetime import datetime # Import datetime for timestamp usage
 
 from . import ivr_bp # Import the blueprint defined in __init__.py
 
@@ -178,25 +175,17 @@ def handle_name_recording():
         return Response(str(resp), mimetype='text/xml')
 
     # --- Process Recording ---
-    temp_filepath = None
     extracted_name = None
     try:
         # 1. Download the recording from Twilio URL
         audio_response = requests.get(recording_url, stream=True, timeout=15)
         audio_response.raise_for_status()
 
-        # 2. Save to a temporary file
-        temp_dir = tempfile.gettempdir()
-        # Use a common extension like .wav if unsure, STT might handle it
-        temp_filename = f"ivr_name_{phone.replace('+','')}_{int(datetime.utcnow().timestamp())}.wav"
-        temp_filepath = os.path.join(temp_dir, temp_filename)
-        with open(temp_filepath, 'wb') as f:
-            for chunk in audio_response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        current_app.logger.info(f"IVR Name Recording saved temporarily to: {temp_filepath}")
-
-        # 3. Transcribe (Use appropriate language code)
-        transcript = transcribe_audio(temp_filepath, language_code=language_code)
+        # 2. Stream it into the recognizer (Twilio recordings are WAV; rate comes from the header)
+        with audio_response:
+            transcript = transcribe_audio(audio_response.iter_content(chunk_size=8192), language_code=language_code,
+                                          encoding='LINEAR16', sample_rate_hertz=None,
+                                          duration_seconds=int(recording_duration))
         current_app.logger.info(f"IVR Name Transcription for {phone}: {transcript}")
 
         # 4. Extract Name (This is highly simplified)
@@ -213,16 +202,7 @@ def handle_name_recording():
         if say_language == 'en-IN': resp.say("Sorry, there was an error processing your name.", language=say_language)
         else: resp.say("Maaf kijiye, aapka naam process karne mein error hua.", language=say_language)
         resp.redirect(url_for('ivr.handle_action', lang=language_code, Digits='1')) # Go back
-        # Clean up temp file on error
-        if temp_filepath and os.path.exists(temp_filepath):
-             try: os.remove(temp_filepath)
-             except OSError: pass
         return Response(str(resp), mimetype='text/xml')
-    finally:
-        # Clean up temp file after processing
-        if temp_filepath and os.path.exists(temp_filepath):
-             try: os.remove(temp_filepath)
-             except OSError: pass
 
     # --- Proceed to ask for skills ---
     if say_language == 'en-IN':
@@ -266,19 +246,14 @@ def handle_skills_recording():
         return Response(str(resp), mimetype='text/xml')
 
     # --- Process Recording ---
-    temp_filepath = None
     extracted_skills_list = []
     try:
         audio_response = requests.get(recording_url, stream=True, timeout=15)
         audio_response.raise_for_status()
-        temp_dir = tempfile.gettempdir()
-        temp_filename = f"ivr_skills_{phone.replace('+','')}_{int(datetime.utcnow().timestamp())}.wav"
-        temp_filepath = os.path.join(temp_dir, temp_filename)
-        with open(temp_filepath, 'wb') as f:
-            for chunk in audio_response.iter_content(chunk_size=8192): f.write(chunk)
-        current_app.logger.info(f"IVR Skills Recording saved temporarily to: {temp_filepath}")
-
-        transcript = transcribe_audio(temp_filepath, language_code=language_code)
+        with audio_response:
+            transcript = transcribe_audio(audio_response.iter_content(chunk_size=8192), language_code=language_code,
+                                          encoding='LINEAR16', sample_rate_hertz=None,
+                                          duration_seconds=int(recording_duration))
         current_app.logger.info(f"IVR Skills Transcription for {phone}: {transcript}")
 
         details = extract_worker_details(transcript) # Reuse utility
@@ -294,16 +269,7 @@ def handle_skills_recording():
         if say_language == 'en-IN': resp.say("Sorry, there was an error processing your skills. Registration cannot be completed.", language=say_language)
         else: resp.say("Maaf kijiye, aapke skills process karne mein error hua. Registration poora nahi ho saka.", language=say_language)
         resp.hangup()
-        # Clean up temp file
-        if temp_filepath and os.path.exists(temp_filepath):
-             try: os.remove(temp_filepath)
-             except OSError: pass
         return Response(str(resp), mimetype='text/xml')
-    finally:
-        # Clean up temp file
-        if temp_filepath and os.path.exists(temp_filepath):
-             try: os.remove(temp_filepath)
-             except OSError: pass
 
     # --- Create User Record ---
     try:
@@ -6,6 +6,7 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 # from werkzeug.utils import secure_filename # Not typically needed in models.py
 from sqlalchemy import func , Integer
+from sqlalchemy.orm import deferred
 import os
 import random
 import string
@@ -13,6 +14,33 @@ import string
 # login_manager setup is now in extensions.py
 # @login_manager.user_loader decorator should also be in extensions.py
 
+# Deferred column groups (loaded together on first access, or up front with undefer_group()):
+#   users.credentials -- password hash, OTP and email/reset tokens; only the auth flows read them
+#   users.profile     -- free-text profile columns shown on profile pages only
+#   jobs.detail       -- the job description, rendered on the job page only
+# List pages load USER_SUMMARY / JOB_SUMMARY (below the models) with load_only().
+
+# Document types a user must have verified to count as fully verified, per role
+REQUIRED_DOCUMENT_TYPES = {
+    'worker': ['aadhaar', 'photo_id'], # Example
+    'employer': ['pan', 'org_proof'], # Example
+}
+
+# --- Skill association tables (canonical skills per worker / job) ---
+# Composite PKs index the owner side; the (skill_id, owner) indexes serve skill-first semi-joins
+worker_skills = db.Table(
+    'worker_skills',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_worker_skills_skill_id', 'skill_id', 'user_id'),
+)
+job_skills = db.Table(
+    'job_skills',
+    db.Column('job_id', db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_job_skills_skill_id', 'skill_id', 'job_id'),
+)
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -21,7 +49,7 @@ class User(UserMixin, db.Model):
     # Made phone nullable to allow email/google registration first
     phone = db.Column(db.String(15), unique=True, index=True, nullable=True)
     email = db.Column(db.String(120), unique=True, index=True, nullable=True)
-    password_hash = db.Column(db.String(128), nullable=True)
+    password_hash = deferred(db.Column(db.String(128), nullable=True), group='credentials')
     google_id = db.Column(db.String(100), unique=True, nullable=True, index=True)
 
     # --- Verification Status ---
@@ -33,7 +61,7 @@ class User(UserMixin, db.Model):
     name = db.Column(db.String(100), nullable=True) # Allow name to be null initially
     role = db.Column(db.String(20), nullable=False, index=True)  # worker/employer/admin
     language = db.Column(db.String(10), default='en')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     last_login_at = db.Column(db.DateTime, nullable=True)
 
     # --- Location ---
@@ -41,17 +69,23 @@ class User(UserMixin, db.Model):
     location_lng = db.Column(db.Float, nullable=True)
     location_address = db.Column(db.String(255), nullable=True)
     location_updated_at = db.Column(db.DateTime, nullable=True)
+    geo_cell = db.Column(db.Integer, nullable=True, index=True) # Spatial grid cell, maintained by utils.geo_index
 
     # --- Worker Specific ---
-    skills = db.Column(db.Text, nullable=True) # Storing as comma-separated string
+    skills = deferred(db.Column(db.Text, nullable=True), group='profile') # Comma-separated display copy of canonical_skills plus unmatched terms
     experience_years = db.Column(db.Integer, nullable=True)
     # 'rating' column removed, use Rating model and average_rating property
-    voice_sample_path = db.Column(db.String(255), nullable=True) # Relative path from UPLOAD_FOLDER/voice_samples
+    # Reputation counters, maintained at write time by utils.reputation
+    rating_sum = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    rating_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    completed_job_count = db.Column(db.Integer, default=0, nullable=False, server_default='0') # Accepted applications on completed jobs
+    voice_sample_path = deferred(db.Column(db.String(255), nullable=True), group='profile') # Relative path from UPLOAD_FOLDER/voice_samples
     # Optional fields (keep if planned feature)
-    public_fields = db.Column(db.Text, default='name,skills,rating') # Fields visible on public profile
+    public_fields = deferred(db.Column(db.Text, default='name,skills,rating'), group='profile') # Fields visible on public profile
     referral_code = db.Column(db.String(20), unique=True, nullable=True)
     referred_by = db.Column(db.String(20), nullable=True)
     profile_views = db.Column(db.Integer, default=0, nullable=False)
+    unread_notification_count = db.Column(db.Integer, default=0, nullable=False, server_default='0') # Maintained by utils.notifications
     # --- Employer Specific ---
     org_name = db.Column(db.String(100), nullable=True)
     org_type = db.Column(db.String(50), nullable=True)  # individual/company/ngo
@@ -61,13 +95,15 @@ class User(UserMixin, db.Model):
     overall_verification_status = db.Column(db.String(20), default='not_verified', index=True) # not_verified, pending, partial, verified
 
     # --- OTP / Tokens ---
-    otp = db.Column(db.String(6), nullable=True)
-    otp_expiry = db.Column(db.DateTime, nullable=True)
-    email_verification_token = db.Column(db.String(100), unique=True, nullable=True)
-    password_reset_token = db.Column(db.String(100), unique=True, nullable=True)
-    token_expiry = db.Column(db.DateTime, nullable=True) # Common expiry for email/password tokens
+    otp = deferred(db.Column(db.String(6), nullable=True), group='credentials')
+    otp_expiry = deferred(db.Column(db.DateTime, nullable=True), group='credentials')
+    email_verification_token = deferred(db.Column(db.String(100), unique=True, nullable=True), group='credentials')
+    password_reset_token = deferred(db.Column(db.String(100), unique=True, nullable=True), group='credentials')
+    token_expiry = deferred(db.Column(db.DateTime, nullable=True), group='credentials') # Common expiry for email/password tokens
 
     # --- Relationships (Corrected and Cleaned) ---
+    # Worker's canonical skills (matching uses these, see utils.skills)
+    canonical_skills = db.relationship('Skill', secondary=worker_skills, order_by='Skill.name')
     # Worker's Certifications
     worker_certifications = db.relationship('WorkerCertification', back_populates='worker', lazy='dynamic', cascade="all, delete-orphan")
     # Worker's Applications
@@ -158,20 +194,22 @@ class User(UserMixin, db.Model):
         return Falsee
 
     def get_skills_list(self):
-        # ... (Keep implementation from previous step) ...
-        if not self.skills: return []
+        # The text column also keeps terms the taxonomy doesn't know, so it's the one to show
+        if not self.skills: return [skill.name for skill in self.canonical_skills]
         return [skill.strip() for skill in self.skills.split(',') if skill.strip()]
 
     def set_skills_list(self, skills_list):
-        # ... (Keep implementation from previous step) ...
-        self.skills = ','.join([skill.strip() for skill in skills_list if skill.strip()])
+        # Resolve aliases ("mistri", "मिस्त्री") to canonical skills; the text column mirrors them
+        # Unknown terms are kept in the text column only; they never become skills
+        from .utils.skills import resolve_skills, skills_text
+        resolved = resolve_skills(skills_list)
+        self.canonical_skills = resolved.skills
+        self.skills = skills_text(resolved)
 
     @property
     def is_fully_verified(self):
         # ... (Keep implementation from previous step, checking DocumentVerification) ...
-        required_types = []
-        if self.role == 'worker': required_types = ['aadhaar', 'photo_id'] # Example
-        elif self.role == 'employer': required_types = ['pan', 'org_proof'] # Example
+        required_types = REQUIRED_DOCUMENT_TYPES.get(self.role, [])
         if not required_types: return True
         # Use the relationship directly
         verified_docs = {doc.document_type.lower() for doc in self.document_verifications if doc.status == 'verified'}
@@ -179,43 +217,26 @@ class User(UserMixin, db.Model):
 
     @property
     def average_rating(self):
-        # ... (Keep implementation from previous step, using ratings_received relationship) ...
-         if self.role != 'worker': return None
-         avg = db.session.query(func.avg(Rating.rating)).filter(Rating.worker_id == self.id).scalar()
-         return round(avg, 1) if avg is not None else None
+        # Read from the denormalized counters (utils.reputation), no query
+        if self.role != 'worker': return None
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else None
 
     @property
     def ratings_count(self):
-        # ... (Keep implementation from previous step, using ratings_received relationship) ...
-         if self.role != 'worker': return 0
-         # Ensure relationship is loaded or use count() directly on query if lazy='dynamic'
-         return Rating.query.filter_by(worker_id=self.id).count()
-         # Or if lazy != 'dynamic': return len(self.ratings_received)
+        if self.role != 'worker': return 0
+        return self.rating_count or 0
 
     @property
     def completed_jobs_count(self):
-        # ... (Keep implementation from previous step, using worker_applications relationship) ...
-         if self.role != 'worker': return 0
-         # Use count() on the query for efficiency
-         return Application.query.join(Job, Application.job_id == Job.id)\
-                          .filter(Application.worker_id == self.id,
-                                  Job.status == 'completed',
-                                  Application.status == 'accepted')\
-                          .count()
+        if self.role != 'worker': return 0
+        return self.completed_job_count or 0
 
     @property
     def profile_completion(self):
         # ... (Keep implementation from previous step, checking certifications relationship) ...
         completed = 0
         if self.role == 'worker':
-            required_fields = 5
-            if self.name: completed += 1
-            if self.skills: completed += 1
-            if self.experience_years is not None: completed += 1
-            # Check document verification status using the other property
-            if self.is_fully_verified: completed += 1 # Or check specific doc types
-            if self.worker_certifications.first(): completed += 1 # Checks if relationship is not empty
-            return int((completed / required_fields) * 100) if required_fields > 0 else 100
+            return self.worker_profile_completion(self.is_fully_verified, self.worker_certifications.first() is not None)
         elif self.role == 'employer':
              required_fields = 4
              if self.name: completed += 1
@@ -225,22 +246,36 @@ class User(UserMixin, db.Model):
              return int((completed / required_fields) * 100) if required_fields > 0 else 100
         else: return 100 # Admin profile always 100%
 
+    def worker_profile_completion(self, is_verified, has_certification):
+        """Worker completion % given the two facts that need queries (see utils.worker_stats)."""
+        required_fields = 5
+        completed = sum((bool(self.name), bool(self.skills), self.experience_years is not None,
+                         bool(is_verified), bool(has_certification)))
+        return int((completed / required_fields) * 100)
+
+
+# Admin users page (utils.admin_lists): case-insensitive name prefix search, newest first within a role
+db.Index('ix_users_name_lower', func.lower(User.name))
+db.Index('ix_users_role_created_at', User.role, User.created_at)
+
 
 # --- Job Model (Confirm lat/lng nullable=True is okay as per previous step) ---
 class Job(db.Model):
     __tablename__ = 'jobs'
+    __table_args__ = (db.Index('ix_jobs_status_created_at', 'status', 'created_at'),) # Admin jobs list by status
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    description = deferred(db.Column(db.Text, nullable=False), group='detail')
     employer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     location_lat = db.Column(db.Float, nullable=True) # Keep nullable as map might set it
     location_lng = db.Column(db.Float, nullable=True) # Keep nullable
+    geo_cell = db.Column(db.Integer, nullable=True, index=True) # Spatial grid cell, maintained by utils.geo_index
     address = db.Column(db.String(255), nullable=True)
     salary = db.Column(db.Float, nullable=False)
     salary_frequency = db.Column(db.String(20), default='daily')
     skills_required = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(20), default='active', index=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     job_type = db.Column(db.String(20), default='one-time')
     duration_days = db.Column(db.Integer, nullable=True)
@@ -251,6 +286,7 @@ class Job(db.Model):
     applications = db.relationship('Application', back_populates='job', lazy='dynamic', cascade="all, delete-orphan")
     payments = db.relationship('Payment', back_populates='job', lazy='dynamic')
     ratings = db.relationship('Rating', back_populates='job', lazy='dynamic')
+    canonical_skills = db.relationship('Skill', secondary=job_skills, order_by='Skill.name')
 
     # --- Methods ---
     # ... (Keep __repr__, accepted_worker, accepted_application, get_skills_list, get_formatted_skills) ...
@@ -258,9 +294,21 @@ class Job(db.Model):
     def accepted_worker(self): app = self.applications.filter_by(status='accepted').first(); return app.worker if app else None
     def accepted_application(self): return self.applications.filter_by(status='accepted').first()
     def get_skills_list(self): return [s.strip() for s in (self.skills_required or '').split(',') if s.strip()]
+    def set_skills_list(self, skills_list):
+        from .utils.skills import resolve_skills, skills_text
+        resolved = resolve_skills(skills_list)
+        self.canonical_skills = resolved.skills
+        self.skills_required = skills_text(resolved)
     def get_formatted_skills(self): return ', '.join(self.get_skills_list())
 
 
+# Columns list pages render (use with load_only); anything else loads lazily if a template touches it
+USER_SUMMARY = (User.id, User.role, User.name, User.phone, User.email, User.org_name, User.is_active, User.created_at,
+                User.rating_sum, User.rating_count)
+JOB_SUMMARY = (Job.id, Job.title, Job.employer_id, Job.status, Job.salary, Job.salary_frequency, Job.address,
+               Job.location_lat, Job.location_lng, Job.skills_required, Job.job_type, Job.is_urgent, Job.created_at)
+
+
 # --- Application Model (Keep As Is from previous correction) ---
 class Application(db.Model):
     __tablename__ = 'applications'
@@ -300,7 +348,30 @@ class Payment(db.Model):
 class EmergencyAlert(db.Model):
     # ... (Keep previous structure) ...
     __tablename__ = 'emergency_alerts'
-    id = db.Column(db.Integer, primary_key=True); worker_id = db.Column(db.Integer, db.ForeignKey('users.id')); location_lat = db.Column(db.Float); location_lng = db.Column(db.Float); status = db.Column(db.String(20), default='active'); created_at = db.Column(db.DateTime, default=datetime.utcnow); resolved_at = db.Column(db.DateTime); worker = db.relationship('User', foreign_keys=[worker_id])
+    __table_args__ = (db.Index('ix_emergency_alerts_status_created_at', 'status', 'created_at'),)
+    id = db.Column(db.Integer, primary_key=True); worker_id = db.Column(db.Integer, db.ForeignKey('users.id')); location_lat = db.Column(db.Float); location_lng = db.Column(db.Float); status = db.Column(db.String(20), default='active'); created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True); resolved_at = db.Column(db.DateTime); worker = db.relationship('User', foreign_keys=[worker_id])
+    # Dispatch outcome (utils.sos): time of the last successful send and its latency from created_at
+    recipients_notified = db.Column(db.Integer, default=0); dispatched_at = db.Column(db.DateTime, nullable=True); dispatch_latency_ms = db.Column(db.Integer, nullable=True)
+    delivery_attempts = db.relationship('SosDeliveryAttempt', back_populates='alert', lazy='dynamic', cascade='all, delete-orphan')
+
+
+# --- SosDeliveryAttempt Model (one row per SOS recipient) ---
+class SosDeliveryAttempt(db.Model):
+    __tablename__ = 'sos_delivery_attempts'
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('emergency_alerts.id', ondelete='CASCADE'), nullable=False, index=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    phone = db.Column(db.String(20), nullable=False)
+    channel = db.Column(db.String(20), default='sms')
+    status = db.Column(db.String(20), nullable=False) # 'sent', 'failed', 'timeout'
+    provider_sid = db.Column(db.String(64), nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    distance_km = db.Column(db.Float, nullable=True) # None for admins outside the responder radius
+    queued_at = db.Column(db.DateTime, nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True) # Provider call time
+    alert = db.relationship('EmergencyAlert', back_populates='delivery_attempts')
+    def __repr__(self): return f"<SosDeliveryAttempt alert={self.alert_id} to={self.phone} {self.status}>"
 
 
 # --- Certification Model (Keep as is) ---
@@ -313,10 +384,11 @@ class Certification(db.Model):
 # --- WorkerCertification Model (Corrected back_populates) ---
 class WorkerCertification(db.Model):
     __tablename__ = 'worker_certifications'
+    __table_args__ = (db.Index('ix_worker_certifications_status_certified_at', 'verification_status', 'certified_at'),) # Review queue
     id = db.Column(db.Integer, primary_key=True)
-    worker_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    worker_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     certification_id = db.Column(db.Integer, db.ForeignKey('certifications.id'), nullable=False)
-    certified_at = db.Column(db.DateTime, default=datetime.utcnow) # Should maybe be nullable and set by user?
+    certified_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False) # Admin list sort key
     expires_at = db.Column(db.DateTime, nullable=True)
     verification_status = db.Column(db.String(20), default='pending', index=True) # pending/verified/rejected
     document_path = db.Column(db.String(255), nullable=False) # Relative path
@@ -382,6 +454,9 @@ class DocumentVerification(db.Model):
 # --- Notification Model (Keep as is) ---
 class Notification(db.Model):
     # ... (Keep previous structure, corrected back_populates) ...
+    # Inbox pages and bulk mark-read walk a user's rows by id (utils.notifications)
+    __table_args__ = (db.Index('ix_notifications_user_id_id', 'user_id', 'id'),
+                      db.Index('ix_notifications_user_id_is_read_id', 'user_id', 'is_read', 'id'))
     __tablename__ = 'notifications'; id = db.Column(db.Integer, primary_key=True); user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True); title = db.Column(db.String(100), nullable=False); message = db.Column(db.Text, nullable=False); link_url = db.Column(db.String(255), nullable=True); is_read = db.Column(db.Boolean, default=False, nullable=False, index=True); created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True); read_at = db.Column(db.DateTime)
     user = db.relationship('User', back_populates='notifications') # Corrected populates
     def __repr__(self): return f"<Notification {self.id} for User {self.user_id}>"
@@ -390,3 +465,118 @@ class Notification(db.Model):
     def mark_as_read(self): self.is_read = True; self.read_at = datetime.utcnow()
 
 
+# --- NotificationArchive Model (notifications past retention, moved by utils.notifications) ---
+class NotificationArchive(db.Model):
+    __tablename__ = 'notifications_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # Same id as in notifications
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    title = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    link_url = db.Column(db.String(255), nullable=True)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    read_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+# --- Skill taxonomy ---
+class Skill(db.Model):
+    __tablename__ = 'skills'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False) # Canonical, normalized (e.g. 'plumbing')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    aliases = db.relationship('SkillAlias', back_populates='skill', cascade="all, delete-orphan")
+    def __repr__(self): return f"<Skill {self.id}: {self.name}>"
+
+
+class SkillAlias(db.Model):
+    __tablename__ = 'skill_aliases'
+    id = db.Column(db.Integer, primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.id', ondelete='CASCADE'), nullable=False, index=True)
+    alias = db.Column(db.String(100), unique=True, nullable=False) # Normalized synonym; every skill has its own name too
+    language = db.Column(db.String(10), default='en') # en / hi / hi-Latn (romanized Hindi)
+    skill = db.relationship('Skill', back_populates='aliases')
+    def __repr__(self): return f"<SkillAlias {self.alias} -> {self.skill_id}>"
+
+
+# --- GeocodeCache Model (persistent level of utils.geocoding) ---
+class GeocodeCache(db.Model):
+    __tablename__ = 'geocode_cache'
+    address_hash = db.Column(db.String(40), primary_key=True) # sha1 of the normalized address
+    address = db.Column(db.Text, nullable=False) # Normalized address
+    lat = db.Column(db.Float, nullable=True) # lat/lng NULL: provider had no match (negative entry)
+    lng = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    def __repr__(self): return f"<GeocodeCache {self.address!r} -> {self.lat},{self.lng}>"
+
+
+# --- EmergencyFacility Model (hospital/police/fire registry, utils.facilities) ---
+class EmergencyFacility(db.Model):
+    __tablename__ = 'emergency_facilities'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    facility_type = db.Column(db.String(30), nullable=False, default='hospital', index=True) # 'hospital', 'police', 'fire', ...
+    lat = db.Column(db.Float, nullable=False)
+    lng = db.Column(db.Float, nullable=False)
+    address = db.Column(db.String(255), nullable=True)
+    phone = db.Column(db.String(30), nullable=True)
+    source = db.Column(db.String(50), nullable=False, index=True) # Dataset the row was loaded from
+    external_id = db.Column(db.String(100), nullable=True) # ID within that dataset
+    is_active = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    def __repr__(self): return f"<EmergencyFacility {self.id} {self.facility_type}: {self.name}>"
+
+
+# --- MetricRollup Model (hourly/daily platform stats, utils.rollups) ---
+class MetricRollup(db.Model):
+    __tablename__ = 'metric_rollups'
+    metric = db.Column(db.String(50), primary_key=True) # e.g. 'signups', 'jobs_by_status'
+    dimension = db.Column(db.String(30), primary_key=True, default='') # e.g. role / status / rating value, '' if none
+    granularity = db.Column(db.String(10), primary_key=True) # 'hour' / 'day'
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    value = db.Column(db.Float, default=0, nullable=False)
+    def __repr__(self): return f"<MetricRollup {self.metric}[{self.dimension}] {self.granularity} {self.bucket_start}={self.value}>"
+
+
+# --- CacheVersion Model (version counters for in-process caches) ---
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+    name = db.Column(db.String(50), primary_key=True) # e.g. 'active_jobs'
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    def __repr__(self): return f"<CacheVersion {self.name}={self.version}>"
+
+
+# --- Task Model (durable background work queue, utils.tasks / `flask worker`) ---
+class Task(db.Model):
+    __tablename__ = 'tasks'
+    # Workers claim the most urgent due task: status, then priority, then run_at
+    __table_args__ = (db.Index('ix_tasks_status_priority_run_at', 'status', 'priority', 'run_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False) # Registered handler, e.g. 'send_sms'
+    payload = db.Column(db.Text, nullable=False, default='{}') # JSON keyword arguments for the handler
+    priority = db.Column(db.Integer, nullable=False, default=50) # Lower runs first (utils.tasks.PRIORITY_*)
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) # Not before (retry backoff)
+    idempotency_key = db.Column(db.String(120), unique=True, nullable=True) # Same key -> queued once
+    locked_by = db.Column(db.String(100), nullable=True) # Worker running it
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True, index=True)
+    def __repr__(self): return f"<Task {self.id} {self.name} {self.status}>"
+
+
+# --- TranscriptionCache Model (speech-to-text results by audio content, utils.transcription_cache) ---
+class TranscriptionCache(db.Model):
+    __tablename__ = 'transcription_cache'
+    content_hash = db.Column(db.String(64), primary_key=True) # sha256 of the audio bytes
+    language_code = db.Column(db.String(10), primary_key=True)
+    config = db.Column(db.String(100), primary_key=True) # Recognizer and audio settings, e.g. 'google:OGG_OPUS:16000'
+    transcript = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    def __repr__(self): return f"<TranscriptionCache {self.content_hash[:12]} {self.language_code} {self.config}>"
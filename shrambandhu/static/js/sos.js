@@ -61,7 +61,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
                 if (response.ok && result.success) {
                     console.log("SOS Success Response:", result);
-                    showAlert(`SOS sent successfully! Alert ID: ${result.alert_id}. ${result.responders_contacted || 0} responders notified.`, 'success', 10000);
+                    showAlert(`SOS sent successfully! Alert ID: ${result.alert_id}. Notifying nearby responders now.`, 'success', 10000);
                 } else {
                     console.error("SOS Failed Response:", result);
                     throw new Error(result.error || `Failed to send SOS (Status: ${response.status})`);
@@ -0,0 +1,123 @@
+# shrambandhu/utils/admin_lists.py
+"""
+Filtering, search and totals for the admin list pages.
+
+Pages are read with keyset pagination (utils.pagination.keyset_paginate) on
+(created_at, id), so their cost does not grow with the table. Search is a
+prefix match written as a `col >= 'x' AND col < 'x\\uffff'` range, which any
+engine can answer from the column's B-tree index (users.phone, users.email and
+the lower(name) expression index). Totals are approximate: user and job counts
+come from the metric rollups (utils.rollups) where the filters allow it, other
+counts are cached per filter set for ADMIN_LIST_COUNT_CACHE_SECONDS.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, func
+from shrambandhu.models import User
+from shrambandhu.utils.rollups import metric_totals
+
+ListFilters = namedtuple('ListFilters', 'q role status date_from date_to')
+
+USER_ROLES = ('worker', 'employer', 'admin')
+USER_STATUSES = ('active', 'inactive')
+JOB_STATUSES = ('active', 'in-progress', 'completed', 'cancelled')
+ALERT_STATUSES = ('active', 'resolved')
+CERT_STATUSES = ('pending', 'verified', 'rejected')
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def list_filters(args, roles=(), statuses=()):
+    """ListFilters from request args (q, role, status, from, to); unknown values are dropped."""
+    role, status = args.get('role'), args.get('status')
+    return ListFilters(
+        q=(args.get('q') or '').strip()[:100] or None,
+        role=role if role in roles else None,
+        status=status if status in statuses else None,
+        date_from=_parse_date(args.get('from')),
+        date_to=_parse_date(args.get('to')),
+    )
+
+
+def filter_args(filters):
+    """The non-empty filters as query-string args, for pager and form links."""
+    args = {'q': filters.q, 'role': filters.role, 'status': filters.status,
+            'from': filters.date_from and filters.date_from.strftime('%Y-%m-%d'),
+            'to': filters.date_to and filters.date_to.strftime('%Y-%m-%d')}
+    return {name: value for name, value in args.items() if value}
+
+
+def date_range(column, filters):
+    """Criteria for `column` within [date_from, date_to] (whole days, inclusive)."""
+    criteria = []
+    if filters.date_from:
+        criteria.append(column >= filters.date_from)
+    if filters.date_to:
+        criteria.append(column < filters.date_to + timedelta(days=1))
+    return criteria
+
+
+def prefix_range(column, prefix):
+    """`column LIKE 'prefix%'` as an index range scan (LIKE only uses an index under some collations)."""
+    return and_(column >= prefix, column < prefix + '\uffff')
+
+
+def user_search(term):
+    """Users whose phone, email or name starts with `term`."""
+    term = term.strip()
+    phones = {term}
+    if term.isdigit(): # Stored as +91XXXXXXXXXX
+        phones.update(('+' + term, '+91' + term))
+    criteria = [prefix_range(User.phone, phone) for phone in sorted(phones)]
+    criteria.append(prefix_range(User.email, term.lower())) # Emails are stored lowercased
+    criteria.append(prefix_range(func.lower(User.name), term.lower()))
+    return or_(*criteria)
+
+
+class _TotalsCache:
+    """Per-process (list name, filters) -> (expires_at, total)."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        return item[1]
+
+    def put(self, key, total, ttl):
+        with self._lock:
+            if len(self._items) > 1000: # Many distinct searches: start over rather than grow
+                self._items.clear()
+            self._items[key] = (time.monotonic() + ttl, total)
+
+
+_totals = _TotalsCache()
+
+
+def approximate_total(name, filters, count):
+    """Total for a filtered list: cached result of `count()` (an exact COUNT), refreshed after the TTL."""
+    ttl = current_app.config.get('ADMIN_LIST_COUNT_CACHE_SECONDS', 0)
+    key = (name,) + tuple(filters)
+    total = _totals.get(key) if ttl > 0 else None
+    if total is None:
+        total = count()
+        if ttl > 0:
+            _totals.put(key, total, ttl)
+    return total
+
+
+def rollup_total(metric, dimension=None):
+    """Current level of a rollup metric (all dimensions, or one), without touching the source table."""
+    values = metric_totals([metric])[metric]
+    return int(values.get(dimension, 0) if dimension is not None else sum(values.values()))
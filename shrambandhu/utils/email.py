@@ -1,32 +1,44 @@
 from flask import current_app, url_for, render_template
-from flask_mail import Message
-from shrambandhu.extensions import mail
-import threading # For sending email asynchronously
-
-def send_async_email(app, msg):
-    """Helper function to send email in a background thread."""
-    with app.app_context():
-        try:
-            mail.send(msg)
-        except Exception as e:
-            app.logger.error(f"Failed to send email to {msg.recipients}: {e}")
-
-def send_email(subject, recipients, text_body, html_body=None):
-    """General function to send email asynchronously."""
-    app = current_app._get_current_object() # Get the actual app instance
-    msg = Message(
-        subject,
-        sender=app.config['MAIL_DEFAULT_SENDER'],
-        recipients=recipients # Should be a list
-    )
-    msg.body = text_body
-    if html_body:
-        msg.html = html_body
-
-    # Send email in a separate thread so it doesn't block the request
-    thr = threading.Thread(target=send_async_email, args=[app, msg])
-    thr.start()
-    return thr # You could potentially join this thread later if needed
+from markupsafe import escape
+from shrambandhu.utils.tasks import enqueue, PRIORITY_HIGH, PRIORITY_DEFAULT
+
+# Variants of email/account_action.html. Each is rendered once per process with placeholders
+# for the per-user values, which are then substituted (escaped) into the cached HTML.
+ACCOUNT_ACTIONS = {
+    'verify_email': dict(
+        title="Verify Your Email",
+        action_text="Click the button below to verify your email address:",
+        button_text="Verify Email",
+        info_text="If you did not create an account, please ignore this email. This link expires in 1 hour.",
+    ),
+    'reset_password': dict(
+        title="Reset Your Password",
+        action_text="Click the button below to reset your password:",
+        button_text="Reset Password",
+        info_text="If you did not request a password reset, please ignore this email. This link expires in 30 minutes.",
+    ),
+}
+_USER_NAME, _ACTION_URL = '@@user_name@@', '@@action_url@@' # Survive autoescaping unchanged
+_rendered_actions = {}
+
+def render_account_action(variant, user_name, action_url):
+    """HTML body of the ACCOUNT_ACTIONS `variant` email for one user."""
+    html = _rendered_actions.get(variant)
+    if html is None:
+        html = render_template('email/account_action.html', user_name=_USER_NAME, action_url=_ACTION_URL,
+                               **ACCOUNT_ACTIONS[variant])
+        if not current_app.debug: # Keep picking up template edits while developing
+            _rendered_actions[variant] = html
+    return html.replace(_USER_NAME, str(escape(user_name))).replace(_ACTION_URL, str(escape(action_url)))
+
+def send_email(subject, recipients, text_body, html_body=None, priority=PRIORITY_DEFAULT, idempotency_key=None):
+    """
+    Queue an email for the task worker (utils.tasks), in the current transaction: the caller commits.
+    Returns the Task.
+    """
+    return enqueue('send_email', dict(subject=subject, recipients=list(recipients), text_body=text_body,
+                                      html_body=html_body),
+                   priority=priority, idempotency_key=idempotency_key)
 
 def send_verification_email(user, token):
     """Sends the email verification email."""
@@ -57,19 +69,11 @@ def send_verification_email(user, token):
         The ShramBandhu Team
         """
 
-        # Example using render_template (create the template file)
-        html_body = render_template(
-            'email/account_action.html', # Create a generic action email template
-            title="Verify Your Email",
-            user_name=user.name or 'User',
-            action_text="Click the button below to verify your email address:",
-            action_url=verification_url,
-            button_text="Verify Email",
-            info_text="If you did not create an account, please ignore this email. This link expires in 1 hour."
-         )
+        html_body = render_account_action('verify_email', user.name or 'User', verification_url)
 
-        send_email(subject, recipients, text_body, html_body)
-        current_app.logger.info(f"Verification email sent to {user.email}")
+        send_email(subject, recipients, text_body, html_body, priority=PRIORITY_HIGH,
+                   idempotency_key=f"verify-email:{user.id}:{token}")
+        current_app.logger.info(f"Verification email queued for {user.email}")
 
     except Exception as e:
         current_app.logger.error(f"Error sending verification email to {getattr(user, 'email', 'N/A')}: {e}")
@@ -101,18 +105,11 @@ def send_password_reset_email(user, token):
         The ShramBandhu Team
         """
 
-        html_body = render_template(
-             'email/account_action.html', # Reuse the generic template
-             title="Reset Your Password",
-             user_name=user.name or 'User',
-             action_text="Click the button below to reset your password:",
-             action_url=reset_url,
-             button_text="Reset Password",
-             info_text="If you did not request a password reset, please ignore this email. This link expires in 30 minutes."
-         )
-
-        send_email(subject, recipients, text_body, html_body)
-        current_app.logger.info(f"Password reset email sent to {user.email}")
+        html_body = render_account_action('reset_password', user.name or 'User', reset_url)
+
+        send_email(subject, recipients, text_body, html_body, priority=PRIORITY_HIGH,
+                   idempotency_key=f"reset-password:{user.id}:{token}")
+        current_app.logger.info(f"Password reset email queued for {user.email}")
 
     except Exception as e:
         current_app.logger.error(f"Error sending password reset email to {getattr(user, 'email', 'N/A')}: {e}")
\ No newline at end of file
@@ -0,0 +1,283 @@
+# shrambandhu/utils/facilities.py
+"""
+Emergency facility registry (hospitals, police, fire stations...).
+
+Facilities are loaded from CSV/GeoJSON datasets into `emergency_facilities`
+(`flask facilities load`). Each process keeps a KD-tree per facility type over
+the facilities' positions as 3-d unit vectors, so nearest-k queries are exact
+great-circle searches without any trigonometry per visited node. Loading a
+dataset bumps the 'facilities' cache_versions counter; processes notice it on
+their next check and rebuild, no restart needed.
+"""
+import csv
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete, insert
+from shrambandhu.extensions import db
+from shrambandhu.models import EmergencyFacility, CacheVersion
+from shrambandhu.utils.location import EARTH_RADIUS_KM
+
+VERSION_KEY = 'facilities'
+ALL_TYPES = None # Key of the tree over every facility
+
+# Accepted column / property names per field in CSV and GeoJSON inputs
+FIELD_ALIASES = {
+    'name': ('name', 'facility_name', 'hospital_name'),
+    'lat': ('lat', 'latitude'),
+    'lng': ('lng', 'lon', 'long', 'longitude'),
+    'facility_type': ('facility_type', 'type', 'category', 'amenity'),
+    'address': ('address', 'addr', 'location'),
+    'phone': ('phone', 'telephone', 'contact', 'mobile'),
+    'external_id': ('external_id', 'id', 'facility_id', 'osm_id'),
+}
+
+
+def unit_vector(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lng), cos_lat * math.sin(lng), math.sin(lat))
+
+
+def chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(chord / 2.0, 1.0))
+
+
+def km_to_chord(km):
+    return 2.0 * math.sin(min(km / (2.0 * EARTH_RADIUS_KM), math.pi / 2))
+
+
+class KDTree:
+    """
+    Static 3-d tree over unit vectors. The tree is implicit: points are stored
+    in build order, the node for range [lo, hi) is at its midpoint and splits on
+    axis depth % 3, so there are no node objects to allocate or chase.
+    """
+
+    def __init__(self, vectors, ids):
+        order = list(range(len(vectors)))
+        self._build(vectors, order, 0, len(order), 0)
+        self.coords = ([vectors[i][0] for i in order], [vectors[i][1] for i in order],
+                       [vectors[i][2] for i in order])
+        self.ids = [ids[i] for i in order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _build(vectors, order, lo, hi, depth):
+        axes = [[v[axis] for v in vectors].__getitem__ for axis in range(3)] # Sort keys without a lambda call per item
+        # Iterative to keep Python's recursion limit out of large builds
+        stack = [(lo, hi, depth)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            order[lo:hi] = sorted(order[lo:hi], key=axes[depth % 3])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def nearest(self, point, k, max_chord=float('inf')):
+        """Up to k (chord, id) pairs nearest to the unit vector `point`, nearest first."""
+        xs, ys, zs = self.coords
+        px, py, pz = point
+        heap = [] # (-squared chord, id): max-heap of the best k so far
+        limit = max_chord * max_chord
+        stack = [(0, len(self.ids), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            dx, dy, dz = xs[mid] - px, ys[mid] - py, zs[mid] - pz
+            d2 = dx * dx + dy * dy + dz * dz
+            bound = limit if len(heap) < k else min(limit, -heap[0][0])
+            if d2 <= bound:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, self.ids[mid]))
+                else:
+                    heapq.heapreplace(heap, (-d2, self.ids[mid]))
+                bound = limit if len(heap) < k else min(limit, -heap[0][0])
+            axis = depth % 3
+            diff = point[axis] - self.coords[axis][mid]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Far side first on the stack so the near side is explored (and tightens the bound) first
+            if diff * diff <= bound:
+                stack.append((far[0], far[1], depth + 1))
+            stack.append((near[0], near[1], depth + 1))
+        return sorted((math.sqrt(-neg_d2), facility_id) for neg_d2, facility_id in heap)
+
+
+class FacilityIndex:
+    """Per-process nearest-facility index, rebuilt when the 'facilities' version changes."""
+
+    def __init__(self, check_interval=30.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._trees = None
+        self._rows = {} # id -> facility dict
+        self._version = None
+        self._checked_at = 0.0
+
+    def _db_version(self):
+        return db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == VERSION_KEY)
+        ).scalar() or 0
+
+    def rebuild(self):
+        version = self._db_version()
+        facilities = db.session.execute(
+            select(EmergencyFacility.id, EmergencyFacility.name, EmergencyFacility.facility_type,
+                   EmergencyFacility.lat, EmergencyFacility.lng, EmergencyFacility.address,
+                   EmergencyFacility.phone)
+            .where(EmergencyFacility.is_active.is_(True))
+        ).all()
+        rows = {f.id: dict(f._mapping) for f in facilities}
+        by_type = {ALL_TYPES: []}
+        for f in facilities:
+            entry = (unit_vector(f.lat, f.lng), f.id)
+            by_type[ALL_TYPES].append(entry)
+            by_type.setdefault(f.facility_type, []).append(entry)
+        trees = {key: KDTree([v for v, _ in entries], [i for _, i in entries]) for key, entries in by_type.items()}
+        with self._lock:
+            self._trees, self._rows, self._version = trees, rows, version
+            self._checked_at = time.monotonic()
+        current_app.logger.info(f"Facility index rebuilt: {len(rows)} facilities at version {version}")
+
+    def ensure_fresh(self):
+        if self._trees is None:
+            return self.rebuild()
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._db_version() != self._version:
+                self.rebuild()
+
+    def has_facilities(self):
+        self.ensure_fresh()
+        return bool(self._rows)
+
+    def nearest(self, location, k=5, radius_km=None, facility_type=None):
+        """
+        The k facilities nearest to location, optionally of one type and within radius_km.
+
+        Returns:
+            list: facility dicts (id, name, facility_type, lat, lng, address, phone)
+                with an added 'distance' in km, nearest first.
+        """
+        if not location or None in location:
+            return []
+        self.ensure_fresh()
+        tree = self._trees.get(facility_type)
+        if tree is None:
+            return []
+        max_chord = km_to_chord(radius_km) if radius_km is not None else float('inf')
+        results = []
+        for chord, facility_id in tree.nearest(unit_vector(*location), k, max_chord):
+            facility = dict(self._rows[facility_id])
+            facility['distance'] = chord_to_km(chord)
+            results.append(facility)
+        return results
+
+
+def init_app(app):
+    app.extensions['facility_index'] = FacilityIndex(
+        check_interval=app.config.get('FACILITY_INDEX_CHECK_SECONDS', 30.0)
+    )
+
+
+def get_facility_index():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('facility_index')
+
+
+# --- Dataset loading ---
+
+def _pick(record, field):
+    for key in FIELD_ALIASES[field]:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _facility_row(record, source, default_type):
+    """Normalized insert values for one input record, or None if it has no usable position/name."""
+    try:
+        lat, lng = float(_pick(record, 'lat')), float(_pick(record, 'lng'))
+    except (TypeError, ValueError):
+        return None
+    name = _pick(record, 'name')
+    if not name or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    external_id = _pick(record, 'external_id')
+    return {
+        'name': str(name)[:200],
+        'facility_type': str(_pick(record, 'facility_type') or default_type).strip().lower()[:30],
+        'lat': lat, 'lng': lng,
+        'address': (str(_pick(record, 'address'))[:255] if _pick(record, 'address') else None),
+        'phone': (str(_pick(record, 'phone'))[:30] if _pick(record, 'phone') else None),
+        'source': source,
+        'external_id': str(external_id)[:100] if external_id is not None else None,
+        'is_active': True,
+    }
+
+
+def read_dataset(path):
+    """Yield flat records from a CSV file or a GeoJSON FeatureCollection of Points."""
+    if path.lower().endswith(('.geojson', '.json')):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for feature in data.get('features', []):
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') != 'Point':
+                continue
+            record = dict(feature.get('properties') or {})
+            record['lng'], record['lat'] = geometry['coordinates'][:2]
+            if feature.get('id') is not None:
+                record.setdefault('id', feature['id'])
+            yield record
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for record in csv.DictReader(f):
+                yield {(k or '').strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in record.items()}
+
+
+def load_facilities(path, source=None, default_type='hospital', batch_size=1000):
+    """
+    Replace the facilities of one source with the contents of a dataset file.
+
+    Returns:
+        tuple: (loaded, skipped) record counts.
+    """
+    from shrambandhu.utils.job_snapshot import bump_version
+    source = source or os.path.splitext(os.path.basename(path))[0]
+    table = EmergencyFacility.__table__
+    connection = db.session.connection()
+    connection.execute(delete(table).where(table.c.source == source))
+
+    now = datetime.utcnow()
+    loaded = skipped = 0
+    batch = []
+    for record in read_dataset(path):
+        row = _facility_row(record, source, default_type)
+        if row is None:
+            skipped += 1
+            continue
+        row['updated_at'] = now
+        batch.append(row)
+        if len(batch) >= batch_size:
+            connection.execute(insert(table), batch)
+            loaded += len(batch); batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        loaded += len(batch)
+    bump_version(connection, VERSION_KEY)
+    db.session.commit()
+    return loaded, skipped
@@ -0,0 +1,240 @@
+# shrambandhu/utils/geo_index.py
+"""
+Spatial index for Job and User locations.
+
+On SQLite we keep an R*Tree virtual table per model (jobs_rtree / users_rtree)
+and answer bounding-box lookups from it. Every engine also gets an indexed
+`geo_cell` column (a fixed lat/lng grid cell id), so Postgres/MySQL deployments
+can prefilter with plain b-tree range scans. Either way only the rows inside
+the bounding box leave the database; exact distances are computed afterwards.
+"""
+import math
+from sqlalchemy import event, inspect, text, table, column, select, bindparam, or_, and_, case
+from shrambandhu.extensions import db
+from shrambandhu.models import Job, User
+
+GEO_CELL_DEG = 0.1 # Grid cell size in degrees (~11 km of latitude)
+_CELL_COLS = int(round(360 / GEO_CELL_DEG)) # Cells per latitude row
+# Shortest degree of latitude (WGS84, at the equator): sizing boxes with it means
+# they always contain the full haversine/geodesic circle
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG = 6371.0088 * math.pi / 180 # Degree on the mean-radius sphere used by the haversine kernel
+
+# R*Tree virtual tables (SQLite only), keyed by the indexed model's table name
+RTREE_TABLES = {
+    Job.__tablename__: 'jobs_rtree',
+    User.__tablename__: 'users_rtree',
+}
+
+_rtree_status = {} # (engine url, rtree table) -> bool, checked once per process
+
+
+def geo_cell(lat, lng):
+    """Return the grid cell id for a coordinate, or None if it's incomplete."""
+    if lat is None or lng is None:
+        return None
+    row = int(math.floor((min(max(lat, -90.0), 90.0) + 90.0) / GEO_CELL_DEG))
+    col = int(math.floor((min(max(lng, -180.0), 180.0) + 180.0) / GEO_CELL_DEG)) % _CELL_COLS
+    return row * _CELL_COLS + col
+
+
+def bounding_box(location, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) enclosing a circle around location.
+
+    A box that crosses the antimeridian comes back wrapped, with min_lng > max_lng
+    (e.g. 179.5 .. -179.5).
+    """
+    lat, lng = float(location[0]), float(location[1])
+    dlat = radius_km / KM_PER_DEG_LAT
+    cos_lat = math.cos(math.radians(lat))
+    # Near the poles the circle covers every longitude
+    dlng = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEG_LAT * cos_lat), 180.0)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if dlng >= 180.0:
+        return (min_lat, max_lat, -180.0, 180.0)
+    min_lng, max_lng = lng - dlng, lng + dlng
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return (min_lat, max_lat, min_lng, max_lng)
+
+
+def approx_distance_sq(model, location):
+    """
+    SQL expression for the squared equirectangular distance (km²) from location.
+
+    Longitude is scaled by the cosine of the mean latitude, expanded around the
+    origin so the SQL is plain arithmetic (no sqrt/trig, works on every engine).
+    Within ~100 km it agrees with the haversine kernel to about 1e-5.
+    """
+    lat, lng = float(location[0]), float(location[1])
+    cos0, sin0 = math.cos(math.radians(lat)), math.sin(math.radians(lat))
+    dlat = model.location_lat - lat
+    raw_dlng = model.location_lng - lng
+    # The short way round across the antimeridian
+    dlng = case((raw_dlng > 180.0, raw_dlng - 360.0), (raw_dlng < -180.0, raw_dlng + 360.0), else_=raw_dlng)
+    half_dlat_rad = dlat * (math.pi / 360)
+    cos_mean = cos0 - sin0 * half_dlat_rad - (cos0 / 2) * half_dlat_rad * half_dlat_rad
+    return (dlat * dlat + dlng * dlng * cos_mean * cos_mean) * (KM_PER_DEG ** 2)
+
+
+def _cell_col(lng):
+    """Grid column of a longitude, without geo_cell's wrap of +180 to column 0."""
+    return min(int(math.floor((min(max(lng, -180.0), 180.0) + 180.0) / GEO_CELL_DEG)), _CELL_COLS - 1)
+
+
+def cell_ranges(bbox):
+    """
+    Contiguous (first, last) geo_cell ranges covering a bounding box, in row order.
+
+    One range per grid row, or two when the box wraps the antimeridian (min_lng > max_lng)
+    or reaches lng 180 (geo_cell stores points on the antimeridian in column 0).
+    """
+    min_lat, max_lat, min_lng, max_lng = bbox
+    first_col, last_col = _cell_col(min_lng), _cell_col(max_lng)
+    if min_lng > max_lng:
+        # Ends sharing a column would overlap (and yield rows twice): take the whole row
+        spans = [(0, last_col), (first_col, _CELL_COLS - 1)] if last_col < first_col else [(0, _CELL_COLS - 1)]
+    elif max_lng >= 180.0 and first_col > 0:
+        spans = [(0, 0), (first_col, last_col)]
+    else:
+        spans = [(first_col, last_col)]
+    first_row = geo_cell(min_lat, -180.0) // _CELL_COLS
+    last_row = geo_cell(max_lat, -180.0) // _CELL_COLS
+    return [(row * _CELL_COLS + first, row * _CELL_COLS + last)
+            for row in range(first_row, last_row + 1) for first, last in spans]
+
+
+def _rtree(name):
+    return table(name, column('id'), column('min_lat'), column('max_lat'),
+                 column('min_lng'), column('max_lng'))
+
+
+def rtree_available(bind, model):
+    """True if the R*Tree table for `model` exists on this (SQLite) connection."""
+    if bind.dialect.name != 'sqlite':
+        return False
+    name = RTREE_TABLES[model.__tablename__]
+    key = (str(bind.engine.url), name)
+    if key not in _rtree_status:
+        found = bind.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': name}
+        ).first()
+        _rtree_status[key] = found is not None
+    return _rtree_status[key]
+
+
+def bbox_filter(model, location, radius_km):
+    """
+    SQLAlchemy criterion restricting `model` rows to a bounding box around location.
+
+    Uses the R*Tree on SQLite when it exists, otherwise the indexed geo_cell column.
+    The lat/lng comparisons trim the cell ranges down to the exact box.
+    """
+    bbox = bounding_box(location, radius_km)
+    min_lat, max_lat, min_lng, max_lng = bbox
+    wrapped = min_lng > max_lng # Crosses the antimeridian: east of min_lng or west of max_lng
+    in_lng = (or_(model.location_lng >= min_lng, model.location_lng <= max_lng) if wrapped
+              else model.location_lng.between(min_lng, max_lng))
+    in_box = and_(model.location_lat.between(min_lat, max_lat), in_lng)
+
+    if rtree_available(db.session.connection(), model):
+        rt = _rtree(RTREE_TABLES[model.__tablename__])
+        rt_lng = (or_(rt.c.max_lng >= min_lng, rt.c.min_lng <= max_lng) if wrapped
+                  else and_(rt.c.min_lng <= max_lng, rt.c.max_lng >= min_lng))
+        candidate_ids = select(rt.c.id).where(rt.c.min_lat <= max_lat, rt.c.max_lat >= min_lat, rt_lng)
+        return and_(model.id.in_(candidate_ids), in_box)
+
+    cells = or_(*[model.geo_cell.between(first, last) for first, last in cell_ranges(bbox)])
+    return and_(cells, in_box)
+
+
+# --- Index maintenance ---
+
+def create_rtree_tables(connection):
+    """Create the R*Tree tables if missing (no-op on non-SQLite engines)."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    for name in RTREE_TABLES.values():
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} "
+            "USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+        ))
+    _rtree_status.clear()
+    return True
+
+
+def _sync_rtree(connection, target):
+    model = type(target)
+    if not rtree_available(connection, model):
+        return
+    name = RTREE_TABLES[model.__tablename__]
+    if target.location_lat is None or target.location_lng is None:
+        connection.execute(text(f"DELETE FROM {name} WHERE id = :id"), {'id': target.id})
+    else:
+        connection.execute(
+            text(f"INSERT OR REPLACE INTO {name} (id, min_lat, max_lat, min_lng, max_lng) "
+                 "VALUES (:id, :lat, :lat, :lng, :lng)"),
+            {'id': target.id, 'lat': target.location_lat, 'lng': target.location_lng}
+        )
+
+
+def rebuild_index(connection, model):
+    """Recompute geo_cell for every row of `model` and repopulate its R*Tree. Returns row count."""
+    tbl = model.__table__
+    rows = connection.execute(select(tbl.c.id, tbl.c.location_lat, tbl.c.location_lng)).all()
+    updates = [{'row_id': r.id, 'cell': geo_cell(r.location_lat, r.location_lng)} for r in rows]
+    if updates:
+        connection.execute(
+            tbl.update().where(tbl.c.id == bindparam('row_id')).values(geo_cell=bindparam('cell')),
+            updates
+        )
+    if rtree_available(connection, model):
+        name = RTREE_TABLES[model.__tablename__]
+        connection.execute(text(f"DELETE FROM {name}"))
+        points = [{'id': r.id, 'lat': r.location_lat, 'lng': r.location_lng}
+                  for r in rows if r.location_lat is not None and r.location_lng is not None]
+        if points:
+            connection.execute(
+                text(f"INSERT INTO {name} (id, min_lat, max_lat, min_lng, max_lng) "
+                     "VALUES (:id, :lat, :lat, :lng, :lng)"),
+                points
+            )
+    return len(rows)
+
+
+# --- Mapper events: keep geo_cell and the R*Tree in sync with location_lat/lng ---
+
+def _location_changed(target):
+    state = inspect(target)
+    return (state.attrs.location_lat.history.has_changes()
+            or state.attrs.location_lng.history.has_changes())
+
+def _set_geo_cell(mapper, connection, target):
+    target.geo_cell = geo_cell(target.location_lat, target.location_lng)
+
+def _before_update(mapper, connection, target):
+    if _location_changed(target):
+        _set_geo_cell(mapper, connection, target)
+
+def _after_insert(mapper, connection, target):
+    _sync_rtree(connection, target)
+
+def _after_update(mapper, connection, target):
+    if _location_changed(target):
+        _sync_rtree(connection, target)
+
+def _after_delete(mapper, connection, target):
+    if rtree_available(connection, type(target)):
+        name = RTREE_TABLES[type(target).__tablename__]
+        connection.execute(text(f"DELETE FROM {name} WHERE id = :id"), {'id': target.id})
+
+for _model in (Job, User):
+    event.listen(_model, 'before_insert', _set_geo_cell)
+    event.listen(_model, 'before_update', _before_update)
+    event.listen(_model, 'after_insert', _after_insert)
+    event.listen(_model, 'after_update', _after_update)
+    event.listen(_model, 'after_delete', _after_delete)
@@ -0,0 +1,212 @@
+# shrambandhu/utils/geocoding.py
+"""
+Cached geocoding.
+
+Lookups go through two levels before the provider is called: a per-process
+LRU and the persistent `geocode_cache` table, both keyed by the normalized
+address. Hits expire after GEOCODE_TTL_DAYS; "no result" answers are cached
+too (for GEOCODE_NEGATIVE_TTL_HOURS) so a bad address isn't retried on every
+request. Provider errors/timeouts are not cached.
+
+Provider calls are throttled process-wide to GEOCODE_MIN_INTERVAL_SECONDS
+(Nominatim's usage policy allows one request per second). Web requests should
+use `geocode(address, remote=False)` and leave misses to
+`flask geo geocode-missing`, which fills in Job/User coordinates in the
+background.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from shrambandhu.extensions import db
+from shrambandhu.models import GeocodeCache
+
+_MISS = object() # Cached "provider found nothing" marker in the LRU
+
+
+def normalize_address(address):
+    """Case/whitespace-insensitive cache key text ('Azadpur Mandi,  Delhi ' -> 'azadpur mandi, delhi')."""
+    return ' '.join((address or '').replace(',', ', ').split()).lower().strip(' ,.')
+
+
+def _address_hash(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class _LRU:
+    """Small thread-safe LRU of normalized address -> (value, expires_at)."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, expires_at):
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_lru = None
+_throttle_lock = threading.Lock()
+_last_call = 0.0
+
+
+def _memory_cache():
+    global _lru
+    if _lru is None:
+        _lru = _LRU(current_app.config.get('GEOCODE_CACHE_SIZE', 1024))
+    return _lru
+
+
+def _throttle():
+    """Block until the provider's minimum interval since the previous call has passed."""
+    global _last_call
+    interval = current_app.config.get('GEOCODE_MIN_INTERVAL_SECONDS', 1.0)
+    with _throttle_lock:
+        wait = _last_call + interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_call = time.monotonic()
+
+
+def _provider_lookup(address):
+    """(lat, lng), None when the provider has no match; raises on provider errors."""
+    from shrambandhu.utils.location import geolocator # Local import, location imports this module
+    _throttle()
+    location = geolocator.geocode(address, timeout=current_app.config.get('GEOCODE_TIMEOUT_SECONDS', 10))
+    return (location.latitude, location.longitude) if location else None
+
+
+def _store(key, normalized, coords):
+    """Persist a result in geocode_cache on its own connection, outside the caller's transaction."""
+    now = datetime.utcnow()
+    if coords is None:
+        expires_at = now + timedelta(hours=current_app.config.get('GEOCODE_NEGATIVE_TTL_HOURS', 24))
+    else:
+        expires_at = now + timedelta(days=current_app.config.get('GEOCODE_TTL_DAYS', 90))
+    table = GeocodeCache.__table__
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.address_hash == key))
+            connection.execute(insert(table).values(
+                address_hash=key, address=normalized,
+                lat=coords[0] if coords else None, lng=coords[1] if coords else None,
+                created_at=now, expires_at=expires_at
+            ))
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Could not persist geocode result for '{normalized}': {e}")
+    return expires_at
+
+
+def geocode(address, remote=True):
+    """
+    Geocode an address to (lat, lng) through the caches.
+
+    Args:
+        remote (bool): Call the provider on a cache miss. With False a miss just
+            returns None (the batch job will resolve it later).
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None
+    lru = _memory_cache()
+    cached = lru.get(normalized)
+    if cached is not None:
+        return None if cached is _MISS else cached
+
+    key = _address_hash(normalized)
+    row = db.session.execute(
+        select(GeocodeCache.lat, GeocodeCache.lng, GeocodeCache.expires_at)
+        .where(GeocodeCache.address_hash == key, GeocodeCache.expires_at > datetime.utcnow())
+    ).first()
+    if row is not None:
+        coords = (row.lat, row.lng) if row.lat is not None and row.lng is not None else None
+        lru.put(normalized, coords or _MISS, time.time() + (row.expires_at - datetime.utcnow()).total_seconds())
+        return coords
+
+    if not remote:
+        return None
+    try:
+        coords = _provider_lookup(address)
+    except Exception as e: # Timeouts/unavailability: don't cache, try again next time
+        current_app.logger.error(f"Geocoding error for address '{address}': {e}")
+        return None
+    expires_at = _store(key, normalized, coords)
+    lru.put(normalized, coords or _MISS, time.time() + (expires_at - datetime.utcnow()).total_seconds())
+    return coords
+
+
+def geocode_missing(models, limit=None):
+    """
+    Fill in coordinates for rows that have an address but no location.
+
+    Args:
+        models: (model, address attribute) pairs, e.g. ((Job, 'address'), (User, 'location_address')).
+        limit (int): Stop after this many provider lookups (cache hits don't count); later models are skipped.
+
+    Returns:
+        dict: table name -> (resolved, unresolved) counts.
+    """
+    results = {}
+    lookups = 0
+    for model, address_attr in models:
+        if limit is not None and lookups >= limit:
+            break
+        address_col = getattr(model, address_attr)
+        rows = model.query.filter(
+            address_col.isnot(None), address_col != '',
+            model.location_lat.is_(None)
+        ).order_by(model.id).all()
+        resolved = unresolved = 0
+        for obj in rows:
+            address = getattr(obj, address_attr)
+            coords = geocode(address, remote=False) # Cache first, no throttling needed
+            if coords is None and not _cached_negative(address):
+                if limit is not None and lookups >= limit:
+                    break
+                lookups += 1
+                coords = geocode(address)
+            if coords is None:
+                unresolved += 1
+                continue
+            obj.location_lat, obj.location_lng = coords
+            if hasattr(obj, 'location_updated_at'):
+                obj.location_updated_at = datetime.utcnow()
+            resolved += 1
+            db.session.commit() # Per row: a long run doesn't hold a write lock
+        results[model.__tablename__] = (resolved, unresolved)
+    return results
+
+
+def _cached_negative(address):
+    """True if the caches hold an unexpired 'no result' answer for address."""
+    normalized = normalize_address(address)
+    if _memory_cache().get(normalized) is _MISS:
+        return True
+    return db.session.execute(
+        select(GeocodeCache.address_hash).where(
+            GeocodeCache.address_hash == _address_hash(normalized),
+            GeocodeCache.lat.is_(None), GeocodeCache.expires_at > datetime.utcnow())
+    ).first() is not None
@@ -0,0 +1,237 @@
+# shrambandhu/utils/identity.py
+"""
+Cached identity for login_manager.user_loader.
+
+load_user used to fetch the whole users row (OTP/token columns included) on
+every authenticated request. Now it returns a CurrentUser built from a small
+IdentitySnapshot (the columns nav, role checks and the worker pages read),
+held in a per-process TTL cache keyed by user id and a stamp kept in the
+login session. Any other attribute -- relationships, profile fields,
+methods -- loads the full User row on first use, so routes keep treating
+current_user as a User.
+
+ORM writes to snapshot columns (profile edits, admin activate/deactivate,
+role changes) drop the cached entry on commit and bump the 'identities'
+cache_versions counter in the same transaction. Every process reads that
+counter at most every IDENTITY_VERSION_CHECK_SECONDS and empties its cache
+when it moved, so a deactivated user is locked out everywhere within that
+interval. When the user edited themselves their session stamp is bumped as
+well, so their own next request reloads them in any process.
+"""
+import threading
+import time
+from typing import NamedTuple, Optional
+from flask import current_app, has_request_context, session as login_session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, undefer_group
+from shrambandhu.extensions import db
+from shrambandhu.models import User, CacheVersion
+
+STAMP_KEY = '_identity_stamp'
+VERSION_KEY = 'identities'
+MAX_CACHED = 10000
+
+
+class IdentitySnapshot(NamedTuple):
+    id: int
+    role: str
+    name: Optional[str]
+    phone: Optional[str]
+    is_active: bool
+    location_lat: Optional[float]
+    location_lng: Optional[float]
+    location_address: Optional[str]
+    skills: Optional[str]
+
+
+SNAPSHOT_FIELDS = IdentitySnapshot._fields
+
+
+def _snapshot_property(name):
+    # Reads the loaded row once there is one (it may have been changed in this request)
+    def get(self):
+        user = self._user
+        return getattr(user, name) if user is not None else getattr(self._snapshot, name)
+    return property(get)
+
+
+class CurrentUser:
+    """current_user for a request: snapshot fields without a query, everything else via the lazily loaded User row."""
+
+    __slots__ = ('_snapshot', '_user', '_unread')
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', None)
+        object.__setattr__(self, '_unread', None)
+
+    id = _snapshot_property('id')
+    role = _snapshot_property('role')
+    name = _snapshot_property('name')
+    phone = _snapshot_property('phone')
+    is_active = _snapshot_property('is_active')
+    location_lat = _snapshot_property('location_lat')
+    location_lng = _snapshot_property('location_lng')
+    location_address = _snapshot_property('location_address')
+    skills = _snapshot_property('skills')
+
+    # Flask-Login interface
+    is_authenticated = True
+    is_anonymous = False
+
+    def get_id(self):
+        return str(self._snapshot.id)
+
+    @property
+    def user(self):
+        """The full User row (one primary-key query on first use)."""
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self._snapshot.id, options=[undefer_group('profile')]))
+        return self._user
+
+    @property
+    def unread_notification_count(self):
+        # Rendered in the nav on every page: read the single column rather than the row
+        if self._user is not None:
+            return self._user.unread_notification_count
+        if self._unread is None:
+            object.__setattr__(self, '_unread', db.session.execute(
+                select(User.unread_notification_count).where(User.id == self._snapshot.id)).scalar() or 0)
+        return self._unread
+
+    def get_skills_list(self):
+        if self._user is not None:
+            return self._user.get_skills_list()
+        skills = self._snapshot.skills # Comma-separated mirror of canonical_skills
+        return [skill.strip() for skill in skills.split(',') if skill.strip()] if skills else []
+
+    def __getattr__(self, name):
+        if name == '_sa_instance_state': # Mapper lookups (`x in session`) shouldn't pull in the row
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.user, name, value)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self._snapshot.id and isinstance(other, (CurrentUser, User))
+
+    def __hash__(self):
+        return hash(self._snapshot.id)
+
+    def __repr__(self):
+        return f"<CurrentUser {self._snapshot.id} - {self._snapshot.role}>"
+
+
+class _IdentityCache:
+    """Per-process user_id -> (expires_at, stamp, IdentitySnapshot), emptied when the 'identities' version moves."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+
+    def check_version(self, interval, read_version):
+        """Empty the cache if read_version() changed; reads it at most every `interval` seconds."""
+        now = time.monotonic()
+        if now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        version = read_version()
+        with self._lock:
+            if version != self._version:
+                self._items.clear()
+                self._version = version
+
+    def get(self, user_id, stamp):
+        item = self._items.get(user_id)
+        if item is None or item[0] <= time.monotonic() or item[1] != stamp:
+            return None
+        return item[2]
+
+    def put(self, user_id, stamp, snapshot, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._items) >= MAX_CACHED:
+                self._items = {key: item for key, item in self._items.items() if item[0] > now}
+                if len(self._items) >= MAX_CACHED:
+                    self._items.clear()
+            self._items[user_id] = (now + ttl, stamp, snapshot)
+
+    def invalidate(self, user_ids=None):
+        with self._lock:
+            if user_ids is None:
+                self._items.clear()
+            else:
+                for user_id in user_ids:
+                    self._items.pop(user_id, None)
+
+
+_cache = _IdentityCache()
+
+
+def load_snapshot(user_id):
+    """IdentitySnapshot for user_id straight from the database, or None."""
+    row = db.session.execute(
+        select(*[getattr(User, name) for name in SNAPSHOT_FIELDS]).where(User.id == user_id)
+    ).one_or_none()
+    return IdentitySnapshot(*row) if row is not None else None
+
+
+def _db_version():
+    return db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == VERSION_KEY)
+    ).scalar() or 0
+
+
+def load_identity(user_id):
+    """CurrentUser for the login session's user id (None if the user no longer exists)."""
+    ttl = current_app.config.get('IDENTITY_CACHE_SECONDS', 0)
+    stamp = login_session.get(STAMP_KEY, 0)
+    if ttl > 0:
+        _cache.check_version(current_app.config.get('IDENTITY_VERSION_CHECK_SECONDS', 2), _db_version)
+    snapshot = _cache.get(user_id, stamp) if ttl > 0 else None
+    if snapshot is None:
+        snapshot = load_snapshot(user_id)
+        if snapshot is None:
+            return None
+        if ttl > 0:
+            _cache.put(user_id, stamp, snapshot, ttl)
+    return CurrentUser(snapshot)
+
+
+# --- Session events: forget identities whose snapshot columns were written through the ORM ---
+
+def _after_flush(session, flush_context):
+    changed = set()
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in SNAPSHOT_FIELDS):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    if changed:
+        from shrambandhu.utils.job_snapshot import bump_version
+        bump_version(session.connection(), VERSION_KEY) # Other processes drop their cached identities
+        session.info.setdefault('identity_changes', set()).update(changed)
+
+
+def _after_commit(session):
+    changed = session.info.pop('identity_changes', None)
+    if not changed:
+        return
+    _cache.invalidate(changed)
+    if has_request_context() and login_session.get('_user_id') in {str(user_id) for user_id in changed}:
+        login_session[STAMP_KEY] = login_session.get(STAMP_KEY, 0) + 1 # Other processes reload this user too
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('identity_changes', None)
+
+
+event.listen(Session, 'after_flush', _after_flush)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
@@ -0,0 +1,65 @@
+# shrambandhu/utils/job_cards.py
+"""
+Job cards for the worker's job listings (find_jobs, dashboard feed).
+
+Listing pages used to render live Job objects with an ad-hoc `distance`
+attribute, lazily loading each card's employer and querying the worker's
+application per card. A JobCard is an immutable tuple holding just what a
+card shows, built for a whole page by one SELECT (jobs joined to their
+employer, plus the worker's application status as a correlated subquery),
+so a page costs a fixed number of queries and creates no ORM objects.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import select, func, null
+from shrambandhu.extensions import db
+from shrambandhu.models import Job, User, Application
+
+
+class JobCard(NamedTuple):
+    id: int
+    title: str
+    salary: float
+    salary_frequency: Optional[str]
+    address: Optional[str]
+    created_at: datetime
+    skills: tuple # Display names (Job.skills_required)
+    employer_name: str
+    application_status: Optional[str] # The viewing worker's application, None if they haven't applied
+    distance: Optional[float] = None # km from the worker
+
+
+def load_job_cards(job_ids, worker_id=None, distances=None):
+    """
+    JobCards for `job_ids`, in that order, from one query. Jobs deleted meanwhile are skipped.
+
+    `distances` maps job id -> km; `worker_id` fills in application_status.
+    """
+    if not job_ids:
+        return []
+    distances = distances or {}
+    application_status = null()
+    if worker_id is not None:
+        application_status = (
+            select(Application.status)
+            .where(Application.job_id == Job.id, Application.worker_id == worker_id)
+            .order_by(Application.applied_at.desc()).limit(1)
+            .scalar_subquery()
+        )
+    rows = db.session.execute(
+        select(Job.id, Job.title, Job.salary, Job.salary_frequency, Job.address, Job.created_at, Job.skills_required,
+               func.coalesce(User.org_name, User.name), application_status)
+        .join(User, User.id == Job.employer_id)
+        .where(Job.id.in_(job_ids))
+    ).all()
+    cards = {}
+    for job_id, title, salary, frequency, address, created_at, skills, employer_name, status in rows:
+        cards[job_id] = JobCard(job_id, title, salary, frequency, address, created_at,
+                                tuple(s.strip() for s in (skills or '').split(',') if s.strip()),
+                                employer_name or 'Private Employer', status, distances.get(job_id))
+    return [cards[job_id] for job_id in job_ids if job_id in cards]
+
+
+def job_cards_for_hits(hits, worker_id=None):
+    """JobCards for job snapshot hits, keeping hit order and distances."""
+    return load_job_cards([h.job_id for h in hits], worker_id, {h.job_id: h.distance for h in hits})
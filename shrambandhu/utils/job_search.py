@@ -0,0 +1,136 @@
+# shrambandhu/utils/job_search.py
+"""
+Full-text keyword search over jobs.
+
+On SQLite an FTS5 table (`jobs_fts`, rowid = job id) indexes the title,
+description and address of active jobs; searches are prefix matches on every
+keyword, ranked with BM25. The table is kept in sync by the Job mapper events
+below: rows are added on insert, refreshed when the text changes and dropped
+once a job stops being active. Other engines (or a SQLite build without
+FTS5) fall back to ILIKE matching without ranking.
+"""
+import re
+from sqlalchemy import event, inspect, text, select, literal_column, or_, and_
+from shrambandhu.extensions import db
+from shrambandhu.models import Job
+
+FTS_TABLE = 'jobs_fts'
+INDEXED_FIELDS = ('title', 'description', 'address')
+# bm25() column weights, same order as INDEXED_FIELDS: a title hit counts most
+BM25_WEIGHTS = (10.0, 1.0, 2.0)
+
+_fts_status = {} # engine url -> bool, checked once per process
+
+
+def fts_available(bind):
+    """True if the jobs_fts table exists on this (SQLite) connection."""
+    if bind.dialect.name != 'sqlite':
+        return False
+    key = str(bind.engine.url)
+    if key not in _fts_status:
+        found = bind.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first()
+        _fts_status[key] = found is not None
+    return _fts_status[key]
+
+
+def match_expression(keywords):
+    """
+    FTS5 MATCH string for user input: every term must match, as a prefix
+    ("plumb" finds "plumber"). Quoting each term keeps FTS syntax characters inert.
+    """
+    terms = re.sub(r'["*^():{}+\-]', ' ', keywords or '').split()
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def apply_keyword_search(query, keywords):
+    """
+    Restrict a Job query to jobs matching `keywords`.
+
+    Returns (query, rank): rank is a column expression to order by (lower is more
+    relevant) when the FTS index is used, or None on the ILIKE fallback.
+    """
+    if fts_available(db.session.connection()):
+        expression = match_expression(keywords)
+        if not expression:
+            return query, None
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        matches = (
+            select(literal_column('rowid').label('job_id'),
+                   literal_column(f'bm25({FTS_TABLE}, {weights})').label('rank'))
+            .select_from(text(FTS_TABLE))
+            .where(text(f'{FTS_TABLE} MATCH :fts_query').bindparams(fts_query=expression))
+            .subquery()
+        )
+        return query.join(matches, matches.c.job_id == Job.id), matches.c.rank
+
+    terms = keywords.split()
+    return query.filter(and_(*[
+        or_(Job.title.ilike(f'%{term}%'), Job.description.ilike(f'%{term}%'), Job.address.ilike(f'%{term}%'))
+        for term in terms
+    ])), None
+
+
+# --- Index maintenance ---
+
+def create_fts_table(connection):
+    """Create jobs_fts if missing (no-op on non-SQLite engines)."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5({', '.join(INDEXED_FIELDS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    _fts_status.clear()
+    return True
+
+
+def rebuild_fts(connection):
+    """Repopulate jobs_fts from active jobs. Returns the number indexed."""
+    if not fts_available(connection):
+        return 0
+    tbl = Job.__table__
+    rows = connection.execute(
+        select(tbl.c.id, *[tbl.c[field] for field in INDEXED_FIELDS]).where(tbl.c.status == 'active')
+    ).all()
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    if rows:
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                 f"VALUES (:id, {', '.join(':' + field for field in INDEXED_FIELDS)})"),
+            [dict(row._mapping) for row in rows]
+        )
+    return len(rows)
+
+
+def _sync_fts(connection, target):
+    if not fts_available(connection):
+        return
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
+    if target.status == 'active':
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                 f"VALUES (:id, {', '.join(':' + field for field in INDEXED_FIELDS)})"),
+            {'id': target.id, **{field: getattr(target, field) for field in INDEXED_FIELDS}}
+        )
+
+
+# --- Mapper events: keep jobs_fts in sync with Job text and status ---
+
+def _after_insert(mapper, connection, target):
+    _sync_fts(connection, target)
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS + ('status',)):
+        _sync_fts(connection, target)
+
+def _after_delete(mapper, connection, target):
+    if fts_available(connection):
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
+
+event.listen(Job, 'after_insert', _after_insert)
+event.listen(Job, 'after_update', _after_update)
+event.listen(Job, 'after_delete', _after_delete)
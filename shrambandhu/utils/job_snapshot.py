@@ -0,0 +1,314 @@
+# shrambandhu/utils/job_snapshot.py
+"""
+Per-process, read-mostly snapshot of active geotagged jobs.
+
+The snapshot keeps compact column arrays (id, lat, lng, salary, created_at,
+job_type, canonical skill ids) sorted by geo_cell, so a nearby-jobs lookup is a handful
+of binary searches plus one vectorized distance pass, with no DB round trip.
+
+Freshness is tracked through the `cache_versions` row named 'active_jobs':
+every flush that touches a Job bumps it (see the session events at the bottom).
+The process that made the change patches its own snapshot after commit; other
+processes notice the new version on their next check and rebuild. One request
+thread rebuilds at a time; the others keep answering from the previous arrays
+until the new ones are swapped in.
+"""
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple, defaultdict
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.orm import Session
+from shrambandhu.extensions import db
+from shrambandhu.models import Job, CacheVersion, job_skills
+from shrambandhu.utils.geo_index import geo_cell, bounding_box, cell_ranges
+from shrambandhu.utils.location import nearest_within
+
+VERSION_KEY = 'active_jobs'
+
+# Job columns mirrored in the snapshot; changes to anything else don't bump the version
+SNAPSHOT_FIELDS = ('status', 'location_lat', 'location_lng', 'salary', 'created_at', 'job_type', 'canonical_skills')
+
+# Overlay size (patched rows) after which the next check rebuilds the arrays
+MAX_OVERLAY = 512
+
+SnapshotHit = namedtuple('SnapshotHit', 'job_id distance created_at salary')
+
+
+def _job_row(job_id, lat, lng, salary, created_at, job_type, skill_ids):
+    """Plain tuple with the fields the snapshot indexes."""
+    ts = created_at.timestamp() if isinstance(created_at, datetime) else 0.0
+    return (job_id, lat, lng, salary or 0.0, ts, job_type or '', frozenset(skill_ids))
+
+
+class _SnapshotData:
+    """Column arrays for one build at `version`, rows ordered by geo_cell; never modified once built."""
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.job_types = [] # job_type code -> name
+        type_codes = {}
+
+        rows = sorted(rows, key=lambda r: (geo_cell(r[1], r[2]), r[0]))
+        self.ids = array('q'); self.lats = array('d'); self.lngs = array('d')
+        self.salaries = array('d'); self.created = array('d'); self.types = array('H')
+        self.skill_offsets = array('q', [0]); self.skill_ids = array('q')
+        self.cells = array('q'); self.cell_starts = array('q')
+
+        for i, (job_id, lat, lng, salary, ts, job_type, skills) in enumerate(rows):
+            cell = geo_cell(lat, lng)
+            if not self.cells or self.cells[-1] != cell:
+                self.cells.append(cell); self.cell_starts.append(i)
+            self.ids.append(job_id); self.lats.append(lat); self.lngs.append(lng)
+            self.salaries.append(salary); self.created.append(ts)
+            if job_type not in type_codes:
+                type_codes[job_type] = len(self.job_types); self.job_types.append(job_type)
+            self.types.append(type_codes[job_type])
+            self.skill_ids.extend(sorted(skills))
+            self.skill_offsets.append(len(self.skill_ids))
+        self.cell_starts.append(len(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_in_box(self, bbox):
+        """Yield row indexes whose cell intersects the bounding box."""
+        for first, last in cell_ranges(bbox):
+            lo = bisect_left(self.cells, first)
+            hi = bisect_right(self.cells, last)
+            if lo < hi:
+                yield from range(self.cell_starts[lo], self.cell_starts[hi])
+
+
+class ActiveJobSnapshot:
+    """In-memory candidate source for nearby-job queries (one per app per process)."""
+
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock() # Held by the one thread rebuilding
+        self._data = None
+        self._version = None # data.version plus the changes apply() patched in
+        self._removed = set() # ids hidden from the base arrays (closed or patched jobs)
+        self._extra = {} # id -> row tuple for patched/new jobs (skills as names)
+        self._checked_at = 0.0
+        self._stale = True
+
+    # --- Freshness ---
+    def _db_version(self):
+        return db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == VERSION_KEY)
+        ).scalar() or 0
+
+    def _load_rows(self):
+        active = (Job.status == 'active', Job.location_lat.isnot(None), Job.location_lng.isnot(None))
+        rows = db.session.execute(
+            select(Job.id, Job.location_lat, Job.location_lng, Job.salary, Job.created_at, Job.job_type)
+            .where(*active)
+        ).all()
+        skills = defaultdict(list)
+        for job_id, skill_id in db.session.execute(
+            select(job_skills.c.job_id, job_skills.c.skill_id).join(Job, Job.id == job_skills.c.job_id).where(*active)
+        ):
+            skills[job_id].append(skill_id)
+        return [_job_row(*r, skills.get(r[0], ())) for r in rows]
+
+    def _swap(self, data):
+        with self._lock:
+            self._data, self._removed, self._extra = data, set(), {}
+            self._version = data.version
+            self._stale = False
+            self._checked_at = time.monotonic()
+
+    def rebuild(self):
+        version = self._db_version()
+        data = _SnapshotData(self._load_rows(), version)
+        self._swap(data)
+        current_app.logger.info(f"Active job snapshot rebuilt: {len(data)} jobs at version {version}")
+        return data
+
+    def ensure_fresh(self):
+        """Rebuild if another process changed jobs; checks the DB version at most every check_interval seconds."""
+        data = self._data
+        if data is None or self._stale or len(self._extra) + len(self._removed) > MAX_OVERLAY:
+            return self._rebuild_once(data)
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._db_version() != self._version:
+                return self._rebuild_once(data)
+        return data
+
+    def _rebuild_once(self, data):
+        """Rebuild unless another thread already is: then serve `data` meanwhile (or wait for the first build)."""
+        if not self._rebuild_lock.acquire(blocking=data is None):
+            return data
+        try:
+            if self._data is not data: # Swapped in by the thread we waited for
+                return self._data
+            return self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def invalidate(self):
+        self._stale = True
+
+    def apply(self, version_before, version_after, changes):
+        """
+        Patch the snapshot with rows committed by this process.
+
+        Only safe if nobody else bumped the version in between, i.e. our snapshot
+        was at version_before; otherwise mark it stale so the next query rebuilds.
+        """
+        with self._lock:
+            data = self._data
+            if data is None:
+                return
+            if self._version != version_before:
+                self._stale = True
+                return
+            for job_id, row in changes.items():
+                self._removed.add(job_id)
+                if row is None:
+                    self._extra.pop(job_id, None)
+                else:
+                    self._extra[job_id] = row
+            self._version = version_after
+
+    # --- Queries ---
+    def nearby(self, location, max_distance_km=float('inf'), skill_ids=None, match_all=True,
+               job_type=None, min_salary=None, precise_top_k=None):
+        """
+        Active jobs within max_distance_km of location, nearest first.
+
+        Args:
+            skill_ids (list): Canonical skill ids (see utils.skills); jobs must list
+                all of them (match_all) or any. None means no skill filter.
+            job_type (str), min_salary (float): Optional exact/lower-bound filters.
+
+        Returns:
+            list of SnapshotHit(job_id, distance, created_at, salary).
+        """
+        data = self.ensure_fresh()
+        with self._lock:
+            removed = set(self._removed)
+            extra = list(self._extra.values())
+
+        wanted = None if skill_ids is None else frozenset(skill_ids)
+
+        candidates = []
+        if max_distance_km == float('inf'):
+            rows = range(len(data))
+        else:
+            rows = data.rows_in_box(bounding_box(location, max_distance_km))
+
+        for i in rows:
+            if data.ids[i] in removed:
+                continue
+            if job_type and data.job_types[data.types[i]] != job_type:
+                continue
+            if min_salary and data.salaries[i] < min_salary:
+                continue
+            if wanted is not None:
+                row_skills = data.skill_ids[data.skill_offsets[i]:data.skill_offsets[i + 1]]
+                if match_all and not wanted.issubset(row_skills):
+                    continue
+                if not match_all and wanted.isdisjoint(row_skills):
+                    continue
+            candidates.append((data.ids[i], data.lats[i], data.lngs[i], data.created[i], data.salaries[i]))
+
+        for job_id, lat, lng, salary, ts, row_type, row_skills in extra:
+            if job_type and row_type != job_type: continue
+            if min_salary and salary < min_salary: continue
+            if wanted is not None and match_all and not wanted.issubset(row_skills): continue
+            if wanted is not None and not match_all and wanted.isdisjoint(row_skills): continue
+            candidates.append((job_id, lat, lng, ts, salary))
+
+        coords = [(c[1], c[2]) for c in candidates]
+        return [SnapshotHit(candidates[i][0], distance, candidates[i][3], candidates[i][4])
+                for i, distance in nearest_within(location, coords, max_distance_km, precise_top_k)]
+
+
+def init_app(app):
+    check_interval = app.config.get('JOB_SNAPSHOT_CHECK_SECONDS', 2.0)
+    if app.config.get('JOB_INDEX_BACKEND') == 'mmap':
+        # Multi-process deployments: share one memory-mapped copy between workers
+        from shrambandhu.utils.shared_job_index import SharedJobIndex
+        path = app.config.get('JOB_INDEX_PATH') or os.path.join(app.instance_path, 'job_index.bin')
+        app.extensions['job_snapshot'] = SharedJobIndex(path, check_interval=check_interval)
+    else:
+        app.extensions['job_snapshot'] = ActiveJobSnapshot(check_interval=check_interval)
+
+
+def get_job_snapshot():
+    """The app's snapshot, or None when disabled or outside an app context."""
+    if not has_app_context() or not current_app.config.get('JOB_SNAPSHOT_ENABLED'):
+        return None
+    return current_app.extensions.get('job_snapshot')
+
+
+# --- Version counter ---
+
+def bump_version(connection, name=VERSION_KEY):
+    """Increment a cache_versions counter inside the current transaction. Returns (before, after)."""
+    table = CacheVersion.__table__
+    before = connection.execute(select(table.c.version).where(table.c.name == name)).scalar()
+    if before is None:
+        before = 0
+        connection.execute(insert(table).values(name=name, version=1, updated_at=datetime.utcnow()))
+    else:
+        connection.execute(update(table).where(table.c.name == name)
+                           .values(version=table.c.version + 1, updated_at=datetime.utcnow()))
+    return before, before + 1
+
+
+# --- Session events: bump on flush, patch local snapshot on commit ---
+
+def _snapshot_change(job):
+    """Row tuple for the snapshot, or None if the job should not be in it."""
+    if job.status != 'active' or job.location_lat is None or job.location_lng is None:
+        return None
+    return _job_row(job.id, job.location_lat, job.location_lng, job.salary, job.created_at,
+                    job.job_type, [skill.id for skill in job.canonical_skills])
+
+
+def _after_flush(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, Job):
+            changes[obj.id] = _snapshot_change(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Job):
+            state = inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in SNAPSHOT_FIELDS):
+                changes[obj.id] = _snapshot_change(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Job):
+            changes[obj.id] = None
+    if not changes:
+        return
+
+    before, after = bump_version(session.connection())
+    pending = session.info.setdefault('job_snapshot', {'before': before, 'changes': {}})
+    pending['after'] = after
+    pending['changes'].update(changes)
+
+
+def _after_commit(session):
+    pending = session.info.pop('job_snapshot', None)
+    if pending:
+        snapshot = get_job_snapshot()
+        if snapshot is not None:
+            snapshot.apply(pending['before'], pending['after'], pending['changes'])
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('job_snapshot', None)
+
+
+event.listen(Session, 'after_flush', _after_flush)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
@@ -1,25 +1,33 @@
 # shrambandhu/utils/location.py
+import heapq
+import math
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 from sqlalchemy import func, and_ # Import 'and_' for combined filters
+from shrambandhu.extensions import db
 from shrambandhu.models import Job, User # Ensure models are imported
+from shrambandhu.utils.geo_index import bbox_filter # Spatial prefilter (R*Tree / geo_cell)
+from shrambandhu.utils.skills import lookup_skill_ids, job_skill_filter
+from shrambandhu.utils.job_cards import load_job_cards, job_cards_for_hits
+from shrambandhu.utils.geocoding import geocode
 from flask import current_app
 
+try:
+    import numpy as np
+except ImportError: # numpy is optional, batch_distances falls back to pure Python
+    np = None
+
 geolocator = Nominatim(user_agent="shrambandhu_app_v1") # Use a specific user agent
+EARTH_RADIUS_KM = 6371.0088 # Mean earth radius used by the haversine kernel
 
-def get_coordinates(address):
-    """Geocode an address string to (latitude, longitude)."""
-    if not address:
-        return None
-    try:
-        # Add country bias for better results if needed, e.g., country_codes='in'
-        location = geolocator.geocode(address, timeout=10)
-        if location:
-            return (location.latitude, location.longitude)
-    except Exception as e:
-        # Log the error appropriately
-        current_app.logger.error(f"Geocoding error for address '{address}': {e}")
-    return None
+def get_coordinates(address, remote=True):
+    """
+    Geocode an address string to (latitude, longitude), through the geocode caches.
+
+    Pass remote=False from web requests: a cache miss then returns None instead of
+    waiting on the provider (`flask geo geocode-missing` resolves it later).
+    """
+    return geocode(address, remote=remote)
 
 def calculate_distance(loc1, loc2):
     """Calculate geodesic distance between two (lat, lon) tuples in kilometers."""
@@ -30,7 +38,67 @@ def calculate_distance(loc1, loc2):
     except ValueError:
         return float('inf') # Handle potential errors in geopy
 
-def get_nearby_jobs(worker_location, worker_skills=None, max_distance_km=25):
+def batch_distances(origin, coords):
+    """
+    Haversine distances in km from one origin to many (lat, lon) points in a single pass.
+
+    Args:
+        origin (tuple): (latitude, longitude).
+        coords: Sequence of (lat, lon) pairs or an (N, 2) array. Pairs with a
+            missing coordinate get a distance of infinity.
+
+    Returns:
+        numpy.ndarray if numpy is installed, otherwise a list of floats.
+    """
+    lat0, lng0 = math.radians(float(origin[0])), math.radians(float(origin[1]))
+    if np is not None:
+        points = np.array(coords, dtype=float).reshape(-1, 2) # None -> nan
+        lat = np.radians(points[:, 0]); lng = np.radians(points[:, 1])
+        a = np.sin((lat - lat0) / 2.0) ** 2 + math.cos(lat0) * np.cos(lat) * np.sin((lng - lng0) / 2.0) ** 2
+        dist = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        dist[np.isnan(dist)] = np.inf
+        return dist
+
+    cos_lat0 = math.cos(lat0)
+    dist = []
+    for point in coords:
+        if point[0] is None or point[1] is None:
+            dist.append(float('inf')); continue
+        lat = math.radians(point[0]); lng = math.radians(point[1])
+        a = math.sin((lat - lat0) / 2.0) ** 2 + cos_lat0 * math.cos(lat) * math.sin((lng - lng0) / 2.0) ** 2
+        dist.append(2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return dist
+
+def nearest_within(origin, coords, max_distance_km=float('inf'), precise_top_k=None):
+    """
+    Indices of coords within max_distance_km of origin, nearest first.
+
+    Distances come from the vectorized haversine kernel. With precise_top_k set,
+    the first k results are re-measured with geopy's geodesic (what
+    calculate_distance uses), dropped if that puts them past max_distance_km,
+    and merged back into the rest by distance, so only k geodesic calls are made.
+
+    Returns:
+        list: (index, distance_km) tuples sorted by distance.
+    """
+    if not origin or None in origin or len(coords) == 0:
+        return []
+    dist = batch_distances(origin, coords)
+    if np is not None:
+        idx = np.nonzero(dist <= max_distance_km)[0]
+        idx = idx[np.argsort(dist[idx], kind='stable')]
+        ranked = list(zip(idx.tolist(), dist[idx].tolist()))
+    else:
+        ranked = sorted(((i, d) for i, d in enumerate(dist) if d <= max_distance_km), key=lambda x: x[1])
+
+    if precise_top_k:
+        head = [(i, calculate_distance(origin, tuple(coords[i]))) for i, _ in ranked[:precise_top_k]]
+        head = sorted((item for item in head if item[1] <= max_distance_km), key=lambda x: x[1])
+        ranked = list(heapq.merge(head, ranked[precise_top_k:], key=lambda x: x[1]))
+    return ranked
+
+def get_nearby_jobs(worker_location, worker_skills=None, max_distance_km=25, precise_top_k=None, limit=None,
+                    worker_id=None):
     """
     Find active jobs near a worker's location, optionally filtering by skills.
 
@@ -38,48 +106,49 @@ def get_nearby_jobs(worker_location, worker_skills=None, max_distance_km=25):
         worker_location (tuple): Worker's (latitude, longitude).
         worker_skills (list): List of worker's skills (strings). Optional.
         max_distance_km (int): Maximum distance in kilometers.
+        precise_top_k (int): Re-measure the nearest k with geodesic distance. Optional.
+        limit (int): Return at most this many (nearest) jobs. Optional.
+        worker_id (int): Fill in the cards' application_status for this worker. Optional.
 
     Returns:
-        list: Sorted list of Job objects with an added 'distance' attribute.
+        list: JobCards (utils.job_cards), nearest first.
     """
     if not worker_location or None in worker_location:
         return [] # Cannot find nearby jobs without worker location
 
+    # Jobs must list every skill; one that isn't in the taxonomy can't match anything
+    skill_ids = lookup_skill_ids(worker_skills) if worker_skills else None
+    if skill_ids is not None and None in skill_ids:
+        return []
+
+    # Serve candidates from the in-memory snapshot when enabled (no scan of the jobs table)
+    from shrambandhu.utils.job_snapshot import get_job_snapshot # Local import, job_snapshot imports this module
+    snapshot = get_job_snapshot()
+    if snapshot is not None:
+        hits = snapshot.nearby(worker_location, max_distance_km, skill_ids=skill_ids,
+                               match_all=True, precise_top_k=precise_top_k)
+        return job_cards_for_hits(hits[:limit], worker_id)
+
     # --- Query Optimization ---
-    # 1. Filter by status and ensure location exists in the database first
-    base_query = Job.query.filter(
+    # 1. Filter by status and restrict to the bounding box via the spatial index,
+    #    so only jobs that can possibly be within range are loaded
+    base_query = db.session.query(Job.id, Job.location_lat, Job.location_lng).filter(
         Job.status == 'active',
-        Job.location_lat.isnot(None),
-        Job.location_lng.isnot(None)
+        bbox_filter(Job, worker_location, max_distance_km)
     )
 
-    # 2. Optional: Pre-filter by skills if provided (using simple LIKE matching for comma-separated strings)
-    if worker_skills:
-        # Create OR conditions for each skill
-        skill_filters = []
-        for skill in worker_skills:
-            if skill: # Ensure skill is not empty
-                 # Uses LIKE '%skill%', case-insensitive might depend on DB collation
-                 # This isn't perfect but works for comma-separated text without complex setup
-                 skill_filters.append(Job.skills_required.ilike(f"%{skill.strip()}%"))
+    # 2. Optional: Pre-filter by skills (indexed semi-join on job_skills, job must have all of them)
+    if skill_ids:
+        base_query = base_query.filter(job_skill_filter(skill_ids, match_all=True))
 
-        if skill_filters:
-             base_query = base_query.filter(and_(*skill_filters)) # Combine skill filters with AND
+    # Fetch only ids and coordinates of potentially relevant jobs from DB
+    candidates = base_query.all()
 
-    # Fetch potentially relevant jobs from DB
-    potential_jobs = base_query.all()
-
-    # --- Filter by Distance in Python ---
-    nearby_jobs = []
-    for job in potential_jobs:
-        job_location = (job.location_lat, job.location_lng)
-        distance = calculate_distance(worker_location, job_location)
-        if distance <= max_distance_km:
-            job.distance = distance # Add distance attribute to the object
-            nearby_jobs.append(job)
-
-    # Sort by distance
-    return sorted(nearby_jobs, key=lambda x: x.distance)
+    # --- Filter by Distance (one vectorized pass, already sorted), then cards for the nearest ---
+    coords = [(lat, lng) for _, lat, lng in candidates]
+    nearest = nearest_within(worker_location, coords, max_distance_km, precise_top_k)[:limit]
+    distances = {candidates[i][0]: distance for i, distance in nearest}
+    return load_job_cards(list(distances), worker_id, distances)
 
 
 # --- Keep get_nearest_responders and get_hospitals_near_location if still needed ---
@@ -88,32 +157,34 @@ def get_nearby_jobs(worker_location, worker_skills=None, max_distance_km=25):
 def get_nearest_responders(location, radius_km=5):
     # ... (previous implementation) ...
     if not location or None in location: return []
-    responders = User.query.filter(User.role == 'admin', User.location_lat.isnot(None), User.location_lng.isnot(None)).all() # Example filter
+    responders = User.query.filter(User.role == 'admin', User.is_active.is_(True), bbox_filter(User, location, radius_km)).all() # Example filter
+    coords = [(responder.location_lat, responder.location_lng) for responder in responders]
     nearby_responders = []
-    for responder in responders:
-        responder_location = (responder.location_lat, responder.location_lng)
-        distance = calculate_distance(location, responder_location)
-        if distance <= radius_km:
-            responder.distance = distance
-            nearby_responders.append(responder)
-    return sorted(nearby_responders, key=lambda x: x.distance)
-
-
-def get_hospitals_near_location(location, radius_km=5):
-    # ... (previous mock implementation) ...
-     if not location or None in location: return []
-     # In a real app, use Google Places API or similar here
-     mock_hospitals = [
-         {"name": "Apollo Hospital Jubilee Hills", "lat": 17.4182, "lng": 78.4099},
-         {"name": "Care Hospitals Banjara Hills", "lat": 17.4152, "lng": 78.4496},
-         {"name": "Yashoda Hospitals Somajiguda", "lat": 17.4227, "lng": 78.4571},
-         {"name": "Osmania General Hospital", "lat": 17.3728, "lng": 78.4760} # Example public hospital
-     ]
-     nearby_hospitals = []
-     for hospital in mock_hospitals:
-         h_loc = (hospital['lat'], hospital['lng'])
-         distance = calculate_distance(location, h_loc)
-         if distance <= radius_km:
-             hospital['distance'] = distance
-             nearby_hospitals.append(hospital)
-     return sorted(nearby_hospitals, key=lambda x: x.get('distance', float('inf')))
\ No newline at end of file
+    for i, distance in nearest_within(location, coords, radius_km):
+        responder = responders[i]
+        responder.distance = distance
+        nearby_responders.append(responder)
+    return nearby_responders
+
+
+def get_hospitals_near_location(location, radius_km=5, limit=10):
+    """Nearest hospitals from the emergency facility registry (utils.facilities), nearest first."""
+    if not location or None in location: return []
+    from shrambandhu.utils.facilities import get_facility_index # Local import, facilities imports this module
+    index = get_facility_index()
+    if index is not None and index.has_facilities():
+        return index.nearest(location, k=limit, radius_km=radius_km, facility_type='hospital')
+    # Registry not loaded yet (`flask facilities load`): fall back to the demo list
+    mock_hospitals = [
+        {"name": "Apollo Hospital Jubilee Hills", "lat": 17.4182, "lng": 78.4099},
+        {"name": "Care Hospitals Banjara Hills", "lat": 17.4152, "lng": 78.4496},
+        {"name": "Yashoda Hospitals Somajiguda", "lat": 17.4227, "lng": 78.4571},
+        {"name": "Osmania General Hospital", "lat": 17.3728, "lng": 78.4760} # Example public hospital
+    ]
+    coords = [(hospital['lat'], hospital['lng']) for hospital in mock_hospitals]
+    nearby_hospitals = []
+    for i, distance in nearest_within(location, coords, radius_km)[:limit]:
+        hospital = mock_hospitals[i]
+        hospital['distance'] = distance
+        nearby_hospitals.append(hospital)
+    return nearby_hospitals
\ No newline at end of file
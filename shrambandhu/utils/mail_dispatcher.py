@@ -0,0 +1,136 @@
+# shrambandhu/utils/mail_dispatcher.py
+"""
+Pooled SMTP sender.
+
+mail.send() opens (TLS handshake, AUTH) and closes an SMTP connection for
+every message. MailDispatcher keeps a fixed pool of MAIL_POOL_SIZE sender
+threads per process, each holding one connection from mail.connect() open
+across messages: a sender takes up to MAIL_BATCH_SIZE queued messages at a
+time and sends them back to back on its connection, reconnecting when the
+server drops it and closing it after MAIL_IDLE_SECONDS without mail.
+
+Messages wait in a bounded queue (MAIL_QUEUE_SIZE). When it is full,
+submit() blocks -- backpressure on the task workers producing mail --
+and gives up with queue.Full after its timeout, so the task is retried
+later instead of piling up in memory.
+
+send() waits for its message, so with the task worker as the only producer
+at most --concurrency messages are queued at once per process: batches
+(MAIL_BATCH_SIZE) only fill up when the worker runs that many task threads.
+"""
+import os
+import queue
+import smtplib
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from flask import current_app
+from shrambandhu.extensions import mail
+
+
+class MailDispatcher:
+    """Fixed pool of sender threads, each reusing one SMTP connection for batches of queued messages."""
+
+    def __init__(self, app, pool_size=3, queue_size=1000, batch_size=50, idle_seconds=30.0):
+        self.app = app
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._threads_pid = None
+
+    def submit(self, msg, timeout=None):
+        """Queue a flask_mail Message; returns a Future for its delivery. Raises queue.Full after `timeout`."""
+        self._ensure_threads()
+        future = Future()
+        self._queue.put((msg, future), timeout=timeout)
+        return future
+
+    def send(self, msg, timeout=None):
+        """Send `msg` through the pool and wait for it; raises what the SMTP server (or a full queue) raised."""
+        future = self.submit(msg, timeout)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # Still queued: withdraw it so the retried task doesn't send it twice. Once a sender
+            # has picked it up it can't be withdrawn, so wait for that send's outcome instead.
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _ensure_threads(self):
+        # Started lazily so only processes that send mail (and each forked one) get senders
+        if self._threads_pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads_pid != os.getpid():
+                self._threads_pid = os.getpid()
+                for i in range(self.pool_size):
+                    threading.Thread(target=self._run, name=f'mail-sender-{i}', daemon=True).start()
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.idle_seconds if connection is not None else None)]
+            except queue.Empty:
+                connection = self._close(connection) # Idle: don't wait for the server to time us out
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                for msg, future in batch:
+                    if future.set_running_or_notify_cancel():
+                        connection = self._deliver(connection, msg, future)
+
+    def _deliver(self, connection, msg, future):
+        """Send one message on `connection` (opened if needed); returns the connection to keep using."""
+        for attempt in (1, 2):
+            try:
+                if connection is None:
+                    connection = mail.connect()
+                    connection.__enter__()
+                connection.send(msg)
+                future.set_result(True)
+                return connection
+            except smtplib.SMTPServerDisconnected as e: # Dropped by the server: retry once on a fresh connection
+                connection = self._close(connection)
+                error = e
+            except smtplib.SMTPException as e: # Refused recipient/data: this message fails, the connection is fine
+                error = e
+                break
+            except OSError as e: # Network error (SMTPException is an OSError too, hence the order)
+                connection = self._close(connection)
+                error = e
+            except Exception as e:
+                error = e
+                break
+        current_app.logger.error(f"Failed to send email to {msg.recipients}: {error}")
+        future.set_exception(error)
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+        return None
+
+
+def init_app(app):
+    app.extensions['mail_dispatcher'] = MailDispatcher(
+        app,
+        pool_size=app.config.get('MAIL_POOL_SIZE', 3),
+        queue_size=app.config.get('MAIL_QUEUE_SIZE', 1000),
+        batch_size=app.config.get('MAIL_BATCH_SIZE', 50),
+        idle_seconds=app.config.get('MAIL_IDLE_SECONDS', 30),
+    )
+
+
+def get_mail_dispatcher():
+    return current_app.extensions['mail_dispatcher']
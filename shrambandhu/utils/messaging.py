@@ -0,0 +1,309 @@
+# shrambandhu/utils/messaging.py
+"""
+Outbound SMS/WhatsApp gateway.
+
+MessagingGateway sits between the app (utils.twilio_client's send_sms /
+deliver_sms / send_whatsapp_message, the task queue, SOS dispatch) and a
+provider:
+
+- TwilioProvider reuses one Twilio Client whose requests session keeps up to
+  MESSAGING_POOL_SIZE keep-alive HTTPS connections to the API (blocking
+  rather than opening more), retrying only failed connects -- a POST that
+  reached Twilio is never repeated by the HTTP layer.
+- Each sender number has a token bucket (MESSAGING_RATE_PER_SECOND, bursts of
+  MESSAGING_BURST), so sends wait for a token instead of tripping the
+  provider's 429s; a send that can't get one within MESSAGING_RATE_WAIT_SECONDS
+  fails with RateLimited. The bucket's state lives in a small flock'd,
+  memory-mapped file under MESSAGING_RATE_STATE_DIR, so the web workers and
+  `flask worker` processes on a host share one limit rather than each getting
+  the full rate. The limit is per host: with several hosts sending from the
+  same numbers, divide the provider's rate between them.
+- send_batch() sends many messages concurrently on a bounded pool and returns
+  a SendResult per message, optionally giving up on the stragglers after a
+  deadline; queue_retries() puts the retryable failures (rate limits, 429/5xx,
+  network errors, timeouts) on the task queue with a delay and priority.
+- Sends go through a lane: 'default', or 'sos' for emergency alerts, which has
+  its own pool (SOS_DISPATCH_WORKERS) and skips the token buckets, so an SOS
+  never queues behind bulk traffic or fails with RateLimited.
+- FakeProvider (MESSAGING_PROVIDER=fake) answers locally after
+  MESSAGING_FAKE_LATENCY_MS, optionally failing a fraction of sends, so
+  throughput can be measured offline (`flask messaging bench`).
+"""
+import fcntl
+import logging
+import mmap
+import os
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+LANE_DEFAULT = 'default'
+LANE_SOS = 'sos' # Own pool, no rate limit
+RATE_EXEMPT_LANES = (LANE_SOS,)
+
+
+class RateLimited(Exception):
+    """No send token for the sender number within the wait limit (retryable)."""
+
+
+class FakeProviderError(Exception):
+    """Failure injected by FakeProvider (retryable)."""
+
+
+class SendResult(NamedTuple):
+    to: str
+    body: str
+    sid: Optional[str] # Provider message SID when sent
+    error: Optional[str] = None
+    retryable: bool = False
+    timed_out: bool = False # Still pending at the batch deadline (it may yet go out)
+    completed_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+
+
+def is_retryable(error):
+    """Whether a failed send may succeed later (rate limit, provider 429/5xx, network) rather than never (bad number)."""
+    status = getattr(error, 'status', None) # TwilioRestException
+    if status is not None:
+        return status == 429 or status >= 500
+    return True
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to `timeout` seconds (forever if None). Returns False if none came in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def _draw(self, tokens, updated, now):
+        """(tokens left, 0) after refilling since `updated` and taking one, or (tokens, seconds until one)."""
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    def _take(self):
+        """Take a token now (returns 0) or return the seconds until the next one."""
+        with self._lock:
+            return self._take_local()
+
+    def _take_local(self):
+        now = time.monotonic()
+        self._tokens, wait = self._draw(self._tokens, self._updated, now)
+        self._updated = now
+        return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket kept in a memory-mapped file, so every process on the host draws from the same tokens.
+
+    Updates happen under an exclusive flock on the file. Timestamps are time.monotonic(), which is
+    system-wide on Linux; a state file older than the last boot is reset to a full bucket. If the file
+    can't be used, the bucket falls back to per-process state (logged) rather than failing sends.
+    """
+
+    STATE = struct.Struct('=dd') # tokens, updated
+
+    def __init__(self, path, rate, burst):
+        super().__init__(rate, burst)
+        self.path = path
+        self._pid = None
+        self._file = self._mm = None
+        self._unavailable = False
+
+    def _mapped(self):
+        # Opened per process: flock belongs to the open file, which a forked child would share
+        if self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            state_file = open(self.path, 'a+b')
+            if os.fstat(state_file.fileno()).st_size < self.STATE.size:
+                state_file.truncate(self.STATE.size) # New file: zeros, read as "never updated"
+            self._mm = mmap.mmap(state_file.fileno(), self.STATE.size)
+            self._file, self._pid = state_file, os.getpid()
+        return self._mm
+
+    def _take(self):
+        with self._lock: # flock doesn't exclude threads sharing the file
+            if self._unavailable:
+                return self._take_local()
+            try:
+                mm = self._mapped()
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except OSError as e:
+                logger.warning(f"Rate limit state {self.path} unavailable, limiting per process: {e}")
+                self._unavailable = True
+                return self._take_local()
+            try:
+                now = time.monotonic()
+                tokens, updated = self.STATE.unpack_from(mm)
+                if updated <= 0 or updated > now: # New file, or written before a reboot
+                    tokens, updated = self.burst, now
+                tokens, wait = self._draw(tokens, updated, now)
+                self.STATE.pack_into(mm, 0, tokens, now)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        return wait
+
+
+class TwilioProvider:
+    """Twilio Messages API over a pooled, keep-alive HTTPS session."""
+
+    def __init__(self, account_sid, auth_token, timeout=8.0, pool_size=16):
+        from requests.adapters import HTTPAdapter
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+        from urllib3.util.retry import Retry
+
+        http_client = TwilioHttpClient(timeout=timeout)
+        # One host, up to pool_size reused connections; callers wait for a free one instead of opening more
+        http_client.session.mount('https://', HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.1)))
+        self.client = Client(account_sid, auth_token, http_client=http_client)
+
+    def send(self, from_, to, body):
+        return self.client.messages.create(body=body, from_=from_, to=to).sid
+
+
+class FakeProvider:
+    """Offline stand-in for TwilioProvider: sleeps `latency_ms`, fails `failure_rate` of sends, counts the rest."""
+
+    def __init__(self, latency_ms=50, failure_rate=0.0):
+        self.latency = latency_ms / 1000.0
+        self.failure_rate = failure_rate
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, from_, to, body):
+        time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeProviderError(f"Injected failure sending to {to}")
+        with self._lock:
+            self.sent += 1
+        return 'SM' + uuid.uuid4().hex
+
+
+class MessagingGateway:
+    """Rate-limited, pooled sends of SMS and WhatsApp messages through one provider."""
+
+    def __init__(self, provider, sms_from, whatsapp_from=None, rate_per_second=10.0, burst=20,
+                 rate_wait_seconds=10.0, batch_workers=8, rate_state_dir=None, sos_workers=8):
+        self.provider = provider
+        self.senders = {'sms': sms_from, 'whatsapp': whatsapp_from or sms_from}
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.rate_wait_seconds = rate_wait_seconds
+        self.rate_state_dir = rate_state_dir # None: buckets are per process
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._executors = {
+            LANE_DEFAULT: ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='messaging'),
+            LANE_SOS: ThreadPoolExecutor(max_workers=sos_workers, thread_name_prefix='sos-dispatch'),
+        }
+
+    def _bucket(self, sender):
+        bucket = self._buckets.get(sender)
+        if bucket is None:
+            with self._lock:
+                if self.rate_state_dir:
+                    path = os.path.join(self.rate_state_dir, re.sub(r'[^0-9A-Za-z]+', '_', sender or 'default') + '.bucket')
+                    new_bucket = SharedTokenBucket(path, self.rate_per_second, self.burst)
+                else:
+                    new_bucket = TokenBucket(self.rate_per_second, self.burst)
+                bucket = self._buckets.setdefault(sender, new_bucket)
+        return bucket
+
+    def send(self, channel, to, body, lane=LANE_DEFAULT):
+        """Send one message and return its SID; raises RateLimited or the provider's error."""
+        sender = self.senders[channel]
+        if (self.rate_per_second > 0 and lane not in RATE_EXEMPT_LANES
+                and not self._bucket(sender).acquire(self.rate_wait_seconds)):
+            raise RateLimited(f"No send slot for {sender} within {self.rate_wait_seconds:g}s")
+        if channel == 'whatsapp':
+            return self.provider.send('whatsapp:' + sender, 'whatsapp:' + to, body)
+        return self.provider.send(sender, to, body)
+
+    def _send_result(self, channel, to, body, lane):
+        started = time.monotonic()
+        try:
+            sid, error, retryable = self.send(channel, to, body, lane), None, False
+        except Exception as e:
+            sid, error, retryable = None, str(e)[:255] or e.__class__.__name__, is_retryable(e)
+        return SendResult(to, body, sid, error, retryable, completed_at=datetime.utcnow(),
+                          duration_ms=int((time.monotonic() - started) * 1000))
+
+    def send_batch(self, messages, channel='sms', lane=LANE_DEFAULT, timeout=None):
+        """
+        Send (to, body) pairs concurrently; returns a SendResult per message, in order. Never raises.
+
+        With a timeout, messages not finished by then come back as retryable, timed_out results:
+        those not started are cancelled, running ones are ended by the provider's own HTTP timeout.
+        """
+        messages = list(messages)
+        executor = self._executors[lane]
+        futures = [executor.submit(self._send_result, channel, to, body, lane) for to, body in messages]
+        done, _ = wait(futures, timeout=timeout)
+        results = []
+        for future, (to, body) in zip(futures, messages):
+            if future in done:
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(SendResult(to, body, None, f'No response within {timeout:g}s', True, timed_out=True))
+        return results
+
+    def queue_retries(self, results, channel='sms', delay=60, priority=None, lane=LANE_DEFAULT):
+        """
+        Put retryable failures from send_batch() on the task queue (the caller commits). Returns how many.
+
+        priority defaults to tasks.PRIORITY_DEFAULT; the retries are sent on `lane`.
+        """
+        from shrambandhu.utils.tasks import enqueue, PRIORITY_DEFAULT
+
+        task = 'send_whatsapp' if channel == 'whatsapp' else 'send_sms'
+        retries = [r for r in results if r.sid is None and r.retryable]
+        for result in retries:
+            payload = {'to': result.to, 'body': result.body}
+            if lane != LANE_DEFAULT:
+                payload['lane'] = lane
+            enqueue(task, payload, priority=PRIORITY_DEFAULT if priority is None else priority, delay=delay)
+        return len(retries)
+
+
+def build_gateway(config):
+    """MessagingGateway configured from the Config class."""
+    if config.MESSAGING_PROVIDER == 'fake':
+        provider = FakeProvider(config.MESSAGING_FAKE_LATENCY_MS, config.MESSAGING_FAKE_FAILURE_RATE)
+    else:
+        provider = TwilioProvider(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN,
+                                  timeout=config.TWILIO_TIMEOUT_SECONDS, pool_size=config.MESSAGING_POOL_SIZE)
+    return MessagingGateway(provider, config.TWILIO_PHONE_NUMBER, config.TWILIO_WHATSAPP_NUMBER,
+                            rate_per_second=config.MESSAGING_RATE_PER_SECOND, burst=config.MESSAGING_BURST,
+                            rate_wait_seconds=config.MESSAGING_RATE_WAIT_SECONDS,
+                            batch_workers=config.MESSAGING_BATCH_WORKERS,
+                            rate_state_dir=config.MESSAGING_RATE_STATE_DIR or None,
+                            sos_workers=config.SOS_DISPATCH_WORKERS)
@@ -0,0 +1,224 @@
+# shrambandhu/utils/notifications.py
+"""
+Notifications: writing (fan-out) and the inbox shared by the worker and employer blueprints.
+
+notify_many() renders a named template once and inserts one row per recipient
+in a single executemany, plus one counter UPDATE. With defer=True it queues
+`notify_many` tasks (utils.tasks, PRIORITY_BULK) in the caller's transaction
+instead, so a request that notifies hundreds of users does not wait for them,
+and the batch survives a crash and is retried like any other task.
+
+users.unread_notification_count is maintained at write time: notify_many()
+and a session hook (for Notification objects added through the ORM) add to
+it in the same transaction, and mark_read() subtracts what its single bulk
+UPDATE flipped, so the unread badge costs no query. Inbox pages are keyset
+pages on notification id, newest first. `flask notifications archive` moves
+rows older than NOTIFICATION_RETENTION_DAYS into notifications_archive to keep
+the hot table small; `flask notifications reconcile` rebuilds the counters.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, inspect, update, select, insert, delete, func, case, literal
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Notification, NotificationArchive
+from shrambandhu.utils.pagination import keyset_paginate
+from shrambandhu.utils.tasks import enqueue, PRIORITY_BULK
+
+# name -> (title, message); both are str.format()-ed with the call's params
+NOTIFICATION_TEMPLATES = {
+    'application_received': ('New Job Application', "Application received for '{job_title}' from {applicant}."),
+    'application_accepted': ('Application Accepted', "Your application for '{job_title}' was accepted!"),
+    'application_rejected': ('Application Update',
+                             "Regarding your application for '{job_title}', the employer has chosen another candidate."),
+    'job_completed': ('Job Completed', "Job '{job_title}' has been marked complete by the employer."),
+    'payment_recorded': ('Payment Recorded', "Employer recorded a {method} payment of Rs.{amount} for '{job_title}'. "
+                                             "Please verify in Payment History."),
+    'payment_disputed': ('Payment Dispute Raised', "Worker {worker} disputed payment ID {payment_id} for job '{job_title}'."),
+}
+INSERT_BATCH_SIZE = 1000
+
+
+def bump_unread(connection, deltas):
+    """Add {user_id: delta} onto the users' unread counters: one UPDATE per distinct delta, floored at 0."""
+    users = User.__table__
+    column = users.c.unread_notification_count
+    user_ids_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            user_ids_by_delta[delta].append(user_id)
+    for delta, user_ids in user_ids_by_delta.items():
+        connection.execute(
+            update(users).where(users.c.id.in_(user_ids))
+            .values(unread_notification_count=case((column + delta < 0, 0), else_=column + delta))
+        )
+
+
+def render_notification(template, params=None):
+    """(title, message) for a NOTIFICATION_TEMPLATES entry. Raises KeyError for an unknown template or missing param."""
+    title, message = NOTIFICATION_TEMPLATES[template]
+    params = params or {}
+    return title.format(**params)[:100], message.format(**params)
+
+
+def insert_notifications(session, user_ids, title, message, link_url):
+    """Bulk-insert one unread notification per user and bump their counters (same transaction)."""
+    now = datetime.utcnow()
+    for start in range(0, len(user_ids), INSERT_BATCH_SIZE):
+        chunk = user_ids[start:start + INSERT_BATCH_SIZE]
+        session.execute(insert(Notification), [
+            dict(user_id=user_id, title=title, message=message, link_url=link_url, is_read=False, created_at=now)
+            for user_id in chunk
+        ])
+        bump_unread(session.connection(), {user_id: 1 for user_id in chunk})
+
+
+def notify_many(user_ids, template, params=None, link_url=None, defer=False):
+    """
+    Send one templated notification to each of `user_ids` (duplicates and None dropped).
+
+    Without defer the rows are added to the current transaction (the caller commits). With
+    defer=True that transaction gets a notify_many task per INSERT_BATCH_SIZE recipients
+    instead, which a `flask worker` writes once it commits. Returns the number of recipients.
+    """
+    user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id is not None))
+    if not user_ids:
+        return 0
+    title, message = render_notification(template, params)
+    if defer:
+        for start in range(0, len(user_ids), INSERT_BATCH_SIZE):
+            enqueue('notify_many', {'user_ids': user_ids[start:start + INSERT_BATCH_SIZE], 'title': title,
+                                    'message': message, 'link_url': link_url}, priority=PRIORITY_BULK)
+    else:
+        insert_notifications(db.session, user_ids, title, message, link_url)
+    return len(user_ids)
+
+
+def notify(user_id, template, params=None, link_url=None):
+    """notify_many() for a single recipient, in the current transaction."""
+    return notify_many([user_id], template, params, link_url)
+
+
+def inbox_page(user, token=None, per_page=20, unread_only=False):
+    """
+    KeysetPage of the user's notifications, newest first. The total is only known for unread_only.
+    page.anchor is the newest id the first page showed (0 if it was empty), the bound for "mark all read".
+    """
+    query = Notification.query.filter(Notification.user_id == user.id)
+    if unread_only:
+        query = query.filter(Notification.is_read.is_(False))
+    return keyset_paginate(query, [Notification.id], token, 'unread' if unread_only else 'all', per_page,
+                           lambda: user.unread_notification_count if unread_only else None,
+                           parse_key=lambda key: [int(key[0])],
+                           anchor=lambda items: items[0].id if items else 0)
+
+
+def mark_read(user_id, up_to_id=None, from_id=None):
+    """
+    Mark the user's unread notifications with from_id <= id <= up_to_id (open-ended when None)
+    read in one UPDATE and take them off the counter. The caller commits. Returns how many.
+    """
+    stmt = update(Notification).where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if up_to_id is not None:
+        stmt = stmt.where(Notification.id <= up_to_id)
+    if from_id is not None:
+        stmt = stmt.where(Notification.id >= from_id)
+    result = db.session.execute(stmt.values(is_read=True, read_at=datetime.utcnow())
+                                .execution_options(synchronize_session=False))
+    if result.rowcount:
+        bump_unread(db.session.connection(), {user_id: -result.rowcount})
+        user = db.session.identity_map.get(db.session.identity_key(User, user_id)) # Only if already loaded
+        if user is not None:
+            db.session.expire(user, ['unread_notification_count'])
+    return result.rowcount
+
+
+def open_inbox(user, token=None, per_page=20, unread_only=False):
+    """The requested inbox page; the notifications it shows are marked read (items keep their unread flag for display)."""
+    page = inbox_page(user, token, per_page, unread_only)
+    if any(not notification.is_read for notification in page.items): # Not the counter: it can drift
+        for notification in page.items:
+            db.session.expunge(notification) # Commit would expire them and reload each one as read
+        try:
+            mark_read(user.id, up_to_id=page.items[0].id, from_id=page.items[-1].id)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error marking notifications read for user {user.id}: {e}")
+    return page
+
+
+# --- Retention ---
+
+_ARCHIVED_COLUMNS = ('id', 'user_id', 'title', 'message', 'link_url', 'is_read', 'created_at', 'read_at')
+
+
+def archive_notifications(days, batch_size=1000):
+    """Move notifications older than `days` into notifications_archive, committing per batch. Returns rows moved."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    notifications, archive = Notification.__table__, NotificationArchive.__table__
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            select(notifications.c.id).where(notifications.c.created_at < cutoff)
+            .order_by(notifications.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        batch = notifications.c.id.in_(ids)
+        connection = db.session.connection()
+        connection.execute(insert(archive).from_select(
+            _ARCHIVED_COLUMNS + ('archived_at',),
+            select(*[notifications.c[name] for name in _ARCHIVED_COLUMNS], literal(datetime.utcnow())).where(batch)
+        ))
+        unread = connection.execute(
+            select(notifications.c.user_id, func.count())
+            .where(batch, notifications.c.is_read.is_(False)).group_by(notifications.c.user_id)
+        ).all()
+        connection.execute(delete(notifications).where(batch))
+        bump_unread(connection, {user_id: -count for user_id, count in unread})
+        db.session.commit()
+        moved += len(ids)
+    return moved
+
+
+def reconcile_unread(connection):
+    """Rewrite every unread counter that disagrees with the notifications table. Returns the number fixed."""
+    users, notifications = User.__table__, Notification.__table__
+    actual = (
+        select(func.count(notifications.c.id))
+        .where(notifications.c.user_id == users.c.id, notifications.c.is_read.is_(False))
+        .scalar_subquery()
+    )
+    return connection.execute(
+        update(users).where(users.c.unread_notification_count != actual).values(unread_notification_count=actual)
+    ).rowcount
+
+
+# --- Session events: count notifications added / read / deleted through the ORM ---
+
+def _after_flush(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Notification) and not obj.is_read:
+            deltas[obj.user_id] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Notification):
+            history = inspect(obj).attrs.is_read.history
+            if history.added and history.deleted and bool(history.added[0]) != bool(history.deleted[0]):
+                deltas[obj.user_id] += -1 if history.added[0] else 1
+    for obj in session.deleted:
+        if isinstance(obj, Notification) and not obj.is_read:
+            deltas[obj.user_id] -= 1
+    if deltas:
+        bump_unread(session.connection(), deltas)
+
+
+def _on_set(target, value, oldvalue, initiator):
+    pass # Registered only for active_history (old is_read of expired objects)
+
+
+event.listen(Notification.is_read, 'set', _on_set, active_history=True)
+event.listen(Session, 'after_flush', _after_flush)
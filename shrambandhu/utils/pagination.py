@@ -0,0 +1,143 @@
+# shrambandhu/utils/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+Instead of OFFSET, a page starts right after the sort key of the last row the
+user saw, so the database only reads `per_page` rows per request however deep
+the page is. Cursors are opaque URL-safe tokens; a malformed or foreign
+token simply restarts at the first page.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import or_, and_
+
+# sort: sort option the key belongs to; source: which backend produced it ('db' / 'snapshot')
+# key: sort-key values of the boundary row; direction: 'after' (next page) or 'before' (previous page)
+# offset: position of the target page's first row; total: result count, carried from page 1 (None if not counted)
+# anchor: caller-chosen value taken from page 1 and carried along (e.g. the newest id shown), None if unused
+Cursor = namedtuple('Cursor', 'sort source key direction offset total anchor', defaults=(None,))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat() # Callers parse it back for date sorts
+    return float(value) # numpy / Decimal scalars
+
+
+def encode_cursor(cursor):
+    payload = json.dumps(list(cursor), separators=(',', ':'), default=_json_default).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort, source):
+    """Cursor from a request token, or None if missing, malformed or for another sort/source."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor = Cursor(*json.loads(base64.urlsafe_b64decode(padded.encode('ascii'))))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if cursor.sort != sort or cursor.source != source or cursor.direction not in ('after', 'before'):
+        return None
+    if not isinstance(cursor.key, list) or not isinstance(cursor.offset, int):
+        return None
+    return cursor
+
+
+def keyset_after(columns, values, descending=False):
+    """
+    Criterion for rows strictly past `values` in ORDER BY `columns` (all ASC, or all DESC),
+    spelled out as (c1 > v1) OR (c1 = v1 AND c2 > v2) ... so any engine can use an index.
+    """
+    criterion = None
+    for column, value in reversed(list(zip(columns, values))):
+        step = column < value if descending else column > value
+        criterion = step if criterion is None else or_(step, and_(column == value, criterion))
+    return criterion
+
+
+class KeysetPage:
+    """One page of results with the cursors the template needs for prev/next links."""
+
+    def __init__(self, items, per_page, total, offset, prev_cursor=None, next_cursor=None, anchor=None):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.offset = offset
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.anchor = anchor
+
+    @property
+    def has_prev(self): return self.prev_cursor is not None
+
+    @property
+    def has_next(self): return self.next_cursor is not None
+
+    @property
+    def first_index(self): return self.offset + 1 if self.items else 0
+
+    @property
+    def last_index(self): return self.offset + len(self.items)
+
+
+def datetime_key(key):
+    """Parse a [created_at, id] cursor key back into typed values (raises ValueError/TypeError)."""
+    created_at, row_id = key
+    return [datetime.fromisoformat(created_at), int(row_id)]
+
+
+def keyset_paginate(query, columns, token, sort, per_page, count, descending=True, parse_key=list, anchor=None):
+    """
+    One KeysetPage of an ORM query ordered by `columns` (entity attributes, the last one
+    unique), reading per_page + 1 rows. `count()` gives the total on the first page only;
+    later pages carry it in their cursor, as they do `anchor(items)` of the first page.
+    """
+    cursor = decode_cursor(token, sort, 'db')
+    boundary = None
+    if cursor is not None:
+        try:
+            boundary = parse_key(cursor.key)
+            if len(boundary) != len(columns):
+                raise ValueError('cursor key length')
+        except (TypeError, ValueError):
+            cursor = boundary = None # Tampered token: start over
+    backwards = cursor is not None and cursor.direction == 'before'
+    total = cursor.total if cursor is not None else count()
+
+    walk_descending = descending != backwards
+    page_query = query.order_by(*[column.desc() if walk_descending else column.asc() for column in columns])
+    if boundary is not None:
+        page_query = page_query.filter(keyset_after(columns, boundary, walk_descending))
+    items = page_query.limit(per_page + 1).all()
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    if cursor is None:
+        offset, has_prev, has_next = 0, False, more
+    elif backwards:
+        offset = max(cursor.offset, 0) if more else 0
+        has_prev, has_next = more, True
+    else:
+        offset, has_prev, has_next = cursor.offset, True, more
+
+    def key(item):
+        return [getattr(item, column.key) for column in columns]
+    if cursor is not None:
+        anchor_value = cursor.anchor
+    else:
+        anchor_value = anchor(items) if anchor is not None else None
+    prev_cursor = next_cursor = None
+    if items and has_prev:
+        prev_cursor = encode_cursor(Cursor(sort, 'db', key(items[0]), 'before', max(offset - per_page, 0), total,
+                                           anchor_value))
+    if items and has_next:
+        next_cursor = encode_cursor(Cursor(sort, 'db', key(items[-1]), 'after', offset + per_page, total,
+                                           anchor_value))
+    return KeysetPage(items, per_page, total, offset, prev_cursor, next_cursor, anchor_value)
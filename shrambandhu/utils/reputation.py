@@ -0,0 +1,59 @@
+# shrambandhu/utils/reputation.py
+"""
+Denormalized worker reputation counters.
+
+users.rating_sum / rating_count / completed_job_count are maintained at write
+time with atomic `col = col + delta` UPDATEs in the same transaction as the
+rating or job change, so reading a worker's reputation costs no queries.
+`flask stats reconcile-reputation` rebuilds them from ratings and applications
+if they ever drift.
+"""
+from sqlalchemy import update, select, func, or_
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Rating, Application, Job
+
+
+def _bump(worker_id, **deltas):
+    table = User.__table__
+    values = {table.c[column]: table.c[column] + delta for column, delta in deltas.items() if delta}
+    if values:
+        db.session.execute(update(table).where(table.c.id == worker_id).values(values))
+
+
+def rating_saved(worker_id, value, previous=None):
+    """Record a new rating, or a changed one when `previous` is the old value."""
+    if previous is None:
+        _bump(worker_id, rating_sum=value, rating_count=1)
+    else:
+        _bump(worker_id, rating_sum=value - previous)
+
+
+def completed_job_changed(worker_id, delta=1):
+    """A job with this worker's accepted application was completed (+1) or un-completed (-1)."""
+    _bump(worker_id, completed_job_count=delta)
+
+
+def source_counts():
+    """Correlated subqueries computing each counter from the source tables for the outer users row."""
+    users = User.__table__
+    rating_sum = select(func.coalesce(func.sum(Rating.rating), 0)).where(Rating.worker_id == users.c.id).scalar_subquery()
+    rating_count = select(func.count(Rating.id)).where(Rating.worker_id == users.c.id).scalar_subquery()
+    completed = (
+        select(func.count(Application.id))
+        .join(Job, Application.job_id == Job.id)
+        .where(Application.worker_id == users.c.id, Application.status == 'accepted', Job.status == 'completed')
+        .scalar_subquery()
+    )
+    return {'rating_sum': rating_sum, 'rating_count': rating_count, 'completed_job_count': completed}
+
+
+def reconcile_reputation(connection):
+    """Rewrite every user's counters that disagree with the source tables. Returns the number fixed."""
+    users = User.__table__
+    counts = source_counts()
+    result = connection.execute(
+        update(users)
+        .where(or_(*[users.c[column] != expression for column, expression in counts.items()]))
+        .values({users.c[column]: expression for column, expression in counts.items()})
+    )
+    return result.rowcount
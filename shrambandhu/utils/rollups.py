@@ -0,0 +1,247 @@
+# shrambandhu/utils/rollups.py
+"""
+Materialized platform statistics.
+
+`metric_rollups` holds one row per (metric, dimension, granularity, bucket):
+- Flow metrics count events by their created_at (signups per role, jobs
+  posted, ratings per star value, payment volume). They can be recomputed
+  from the raw tables for any window.
+- Level metrics track current totals (users per role, jobs / payments per
+  status, payment amount per status) as deltas in the bucket where each change
+  happened, so a total is the SUM over a metric's day rows and a bucket's
+  value is the net change during that period.
+
+Session write hooks upsert the deltas in the same transaction as the change.
+`flask stats rollup` (run from cron) recomputes recent flow buckets from the
+raw tables, corrects any level drift and prunes old hourly rows. Dashboards
+read O(buckets) rows instead of scanning users/jobs/payments.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select, delete, update, insert, func
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Job, Payment, Rating, MetricRollup
+
+GRANULARITIES = ('hour', 'day')
+
+# metric -> (model, dimension attribute or None, summed attribute or None to count rows)
+FLOW_METRICS = {
+    'signups': (User, 'role', None),
+    'jobs_posted': (Job, None, None),
+    'ratings': (Rating, 'rating', None),
+    'payment_volume': (Payment, None, 'amount'),
+}
+LEVEL_METRICS = {
+    'users_by_role': (User, 'role', None),
+    'jobs_by_status': (Job, 'status', None),
+    'payments_by_status': (Payment, 'status', None),
+    'payment_amount_by_status': (Payment, 'status', 'amount'),
+}
+
+
+def bucket_start(ts, granularity):
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == 'day' else ts
+
+
+def _dimension(value):
+    return '' if value is None else str(value)
+
+
+def apply_deltas(connection, deltas):
+    """Add {(metric, dimension, granularity, bucket_start): delta} onto metric_rollups (upsert)."""
+    rows = [dict(metric=m, dimension=d, granularity=g, bucket_start=b, value=v)
+            for (m, d, g, b), v in deltas.items() if v]
+    if not rows:
+        return
+    table = MetricRollup.__table__
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key.columns],
+            set_={'value': table.c.value + stmt.excluded.value}
+        )
+        connection.execute(stmt, rows)
+        return
+    for row in rows: # Generic fallback: update, insert when missing
+        key = [table.c[c] == row[c] for c in ('metric', 'dimension', 'granularity', 'bucket_start')]
+        if connection.execute(update(table).where(*key).values(value=table.c.value + row['value'])).rowcount == 0:
+            connection.execute(insert(table).values(**row))
+
+
+# --- Reading ---
+
+def metric_totals(metrics, granularity='day', since=None):
+    """{metric: {dimension: summed value}} over all buckets (or those from `since`), one query."""
+    query = (
+        select(MetricRollup.metric, MetricRollup.dimension, func.sum(MetricRollup.value))
+        .where(MetricRollup.metric.in_(metrics), MetricRollup.granularity == granularity)
+        .group_by(MetricRollup.metric, MetricRollup.dimension)
+    )
+    if since is not None:
+        query = query.where(MetricRollup.bucket_start >= bucket_start(since, granularity))
+    totals = {metric: {} for metric in metrics}
+    for metric, dimension, value in db.session.execute(query):
+        totals[metric][dimension] = value or 0
+    return totals
+
+
+def metric_series(metric, granularity='day', since=None):
+    """[(bucket_start, {dimension: value})] in time order, for trend charts."""
+    query = (
+        select(MetricRollup.bucket_start, MetricRollup.dimension, MetricRollup.value)
+        .where(MetricRollup.metric == metric, MetricRollup.granularity == granularity)
+        .order_by(MetricRollup.bucket_start)
+    )
+    if since is not None:
+        query = query.where(MetricRollup.bucket_start >= bucket_start(since, granularity))
+    series = {}
+    for start, dimension, value in db.session.execute(query):
+        series.setdefault(start, {})[dimension] = value
+    return list(series.items())
+
+
+# --- Scheduled rollup ---
+
+def _recompute_flow(connection, metric, granularity, start):
+    model, dim_attr, value_attr = FLOW_METRICS[metric]
+    columns = [model.created_at]
+    columns.append(getattr(model, dim_attr) if dim_attr else None)
+    columns.append(getattr(model, value_attr) if value_attr else None)
+    query = select(*[c for c in columns if c is not None])
+    if start is not None:
+        query = query.where(model.created_at >= start)
+    buckets = defaultdict(float)
+    for row in connection.execute(query.execution_options(yield_per=5000)):
+        values = iter(row[1:])
+        dimension = _dimension(next(values)) if dim_attr else ''
+        value = float(next(values) or 0) if value_attr else 1.0
+        if row[0] is not None:
+            buckets[(metric, dimension, granularity, bucket_start(row[0], granularity))] += value
+
+    table = MetricRollup.__table__
+    stale = delete(table).where(table.c.metric == metric, table.c.granularity == granularity)
+    if start is not None:
+        stale = stale.where(table.c.bucket_start >= start)
+    connection.execute(stale)
+    apply_deltas(connection, buckets)
+    return len(buckets)
+
+
+def _correct_level(connection, metric, now):
+    """Add a correction delta where a level's recorded total differs from the raw table."""
+    model, dim_attr, value_attr = LEVEL_METRICS[metric]
+    measure = func.coalesce(func.sum(getattr(model, value_attr)), 0) if value_attr else func.count()
+    dimension = getattr(model, dim_attr)
+    actual = {_dimension(d): float(v) for d, v in connection.execute(select(dimension, measure).group_by(dimension))}
+    corrections = {}
+    for granularity in GRANULARITIES:
+        table = MetricRollup.__table__
+        recorded = dict(connection.execute(
+            select(table.c.dimension, func.sum(table.c.value))
+            .where(table.c.metric == metric, table.c.granularity == granularity)
+            .group_by(table.c.dimension)
+        ).all())
+        for dim in set(actual) | set(recorded):
+            drift = actual.get(dim, 0.0) - (recorded.get(dim) or 0.0)
+            if abs(drift) > 1e-6:
+                corrections[(metric, dim, granularity, bucket_start(now, granularity))] = drift
+    apply_deltas(connection, corrections)
+    return len(corrections)
+
+
+def run_rollup(connection, days=2, full=False, hourly_retention_days=14):
+    """
+    Recompute flow buckets for the last `days` (all history with full=True),
+    correct level totals and prune hourly rows past the retention.
+
+    Returns:
+        dict: 'flow_buckets', 'level_corrections' and 'pruned' counts.
+    """
+    now = datetime.utcnow()
+    hourly_cutoff = bucket_start(now - timedelta(days=hourly_retention_days), 'day')
+    result = {'flow_buckets': 0, 'level_corrections': 0}
+    for metric in FLOW_METRICS:
+        for granularity in GRANULARITIES:
+            start = None if full else bucket_start(now - timedelta(days=days), granularity)
+            if granularity == 'hour':
+                start = max(start or hourly_cutoff, hourly_cutoff)
+            result['flow_buckets'] += _recompute_flow(connection, metric, granularity, start)
+    for metric in LEVEL_METRICS:
+        result['level_corrections'] += _correct_level(connection, metric, now)
+
+    # Old hourly level deltas are folded into one bucket so hour-level totals keep adding up
+    table = MetricRollup.__table__
+    old_hourly = (table.c.granularity == 'hour', table.c.bucket_start < hourly_cutoff)
+    folded = connection.execute(
+        select(table.c.metric, table.c.dimension, func.sum(table.c.value))
+        .where(*old_hourly, table.c.metric.in_(LEVEL_METRICS))
+        .group_by(table.c.metric, table.c.dimension)
+    ).all()
+    result['pruned'] = connection.execute(delete(table).where(*old_hourly)).rowcount
+    apply_deltas(connection, {(m, d, 'hour', hourly_cutoff - timedelta(hours=1)): v for m, d, v in folded})
+    return result
+
+
+# --- Session events: record deltas for inserted/updated/deleted rows ---
+
+_METRICS_BY_MODEL = defaultdict(list)
+for _name, (_model, _dim, _value) in FLOW_METRICS.items():
+    _METRICS_BY_MODEL[_model].append((_name, _dim, _value, True))
+for _name, (_model, _dim, _value) in LEVEL_METRICS.items():
+    _METRICS_BY_MODEL[_model].append((_name, _dim, _value, False))
+
+
+def _contribution(obj, dim_attr, value_attr, before=False):
+    """(dimension, value) the row adds to a metric, as of before the flush when before=True."""
+    def read(attr):
+        if before:
+            history = inspect(obj).attrs[attr].history
+            if history.deleted:
+                return history.deleted[0]
+        return getattr(obj, attr)
+    dimension = _dimension(read(dim_attr)) if dim_attr else ''
+    value = float(read(value_attr) or 0) if value_attr else 1.0
+    return dimension, value
+
+
+def _after_flush(session, flush_context):
+    now = datetime.utcnow()
+    deltas = defaultdict(float)
+
+    def add(metric, is_flow, obj, contribution, sign):
+        ts = (getattr(obj, 'created_at', None) or now) if is_flow else now
+        dimension, value = contribution
+        for granularity in GRANULARITIES:
+            deltas[(metric, dimension, granularity, bucket_start(ts, granularity))] += sign * value
+
+    for obj in session.new:
+        for metric, dim_attr, value_attr, is_flow in _METRICS_BY_MODEL.get(type(obj), ()):
+            add(metric, is_flow, obj, _contribution(obj, dim_attr, value_attr), 1)
+    for obj in session.dirty:
+        for metric, dim_attr, value_attr, is_flow in _METRICS_BY_MODEL.get(type(obj), ()):
+            old, new = _contribution(obj, dim_attr, value_attr, before=True), _contribution(obj, dim_attr, value_attr)
+            if old != new:
+                add(metric, is_flow, obj, old, -1)
+                add(metric, is_flow, obj, new, 1)
+    for obj in session.deleted:
+        for metric, dim_attr, value_attr, is_flow in _METRICS_BY_MODEL.get(type(obj), ()):
+            add(metric, is_flow, obj, _contribution(obj, dim_attr, value_attr, before=True), -1)
+
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def _on_set(target, value, oldvalue, initiator):
+    pass # Registered only for active_history
+
+
+# active_history makes SQLAlchemy load a tracked attribute's old value when it is set on an
+# expired object, so the flush can take the row's contribution out of its old dimension
+for _model, _attr in {(model, attr) for specs in (FLOW_METRICS, LEVEL_METRICS)
+                      for model, dim_attr, value_attr in specs.values() for attr in (dim_attr, value_attr) if attr}:
+    event.listen(getattr(_model, _attr), 'set', _on_set, active_history=True)
+event.listen(Session, 'after_flush', _after_flush)
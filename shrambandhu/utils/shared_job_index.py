@@ -0,0 +1,159 @@
+# shrambandhu/utils/shared_job_index.py
+"""
+Memory-mapped variant of the active job snapshot for multi-process deployments.
+
+With several gunicorn workers each ActiveJobSnapshot would hold its own copy of
+the job arrays and rebuild it on every version bump. Here one worker (whoever
+first notices a new 'active_jobs' version, serialized by a file lock) writes
+the arrays to a single file, and every worker maps that file read-only: the
+pages are shared through the OS page cache and a worker reloads by remapping
+once the file's generation moves on.
+
+File layout (native byte order, sections 8-byte aligned):
+    header   magic, generation, row count, (offset, length) per column, (offset, length) of meta
+    columns  the _SnapshotData arrays, in COLUMNS order
+    meta     JSON with the job_type names
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from flask import current_app
+from shrambandhu.utils.job_snapshot import ActiveJobSnapshot, _SnapshotData
+
+MAGIC = b'SBJOBIX2'
+
+# _SnapshotData attribute -> array typecode
+COLUMNS = (
+    ('ids', 'q'), ('lats', 'd'), ('lngs', 'd'), ('salaries', 'd'), ('created', 'd'),
+    ('types', 'H'), ('skill_offsets', 'q'), ('skill_ids', 'q'), ('cells', 'q'), ('cell_starts', 'q'),
+)
+
+HEADER = struct.Struct('=8sqq' + 'qq' * len(COLUMNS) + 'qq')
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def write_index_file(path, data):
+    """Serialize a _SnapshotData to `path`, atomically replacing any previous file."""
+    meta = json.dumps({'job_types': data.job_types}).encode('utf-8')
+
+    layout = []
+    offset = _align(HEADER.size)
+    for name, code in COLUMNS:
+        column = getattr(data, name)
+        assert column.typecode == code, f'{name} must be array({code!r})'
+        layout.append((offset, len(column)))
+        offset = _align(offset + len(column) * column.itemsize)
+    header = HEADER.pack(MAGIC, data.version, len(data), *[v for pair in layout for v in pair],
+                         offset, len(meta))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for (name, _), (section_offset, _) in zip(COLUMNS, layout):
+            f.seek(section_offset)
+            getattr(data, name).tofile(f)
+        f.seek(offset)
+        f.write(meta)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers that already mapped the old file keep their (unlinked) copy until they remap
+    os.replace(tmp_path, path)
+
+
+class _MappedSnapshotData(_SnapshotData):
+    """_SnapshotData whose columns are read-only memoryviews into the index file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self._mm)
+        if fields[0] != MAGIC:
+            raise ValueError(f'{path} is not a job index file')
+        self.version = self.generation = fields[1]
+
+        view = memoryview(self._mm)
+        for i, (name, code) in enumerate(COLUMNS):
+            offset, length = fields[3 + 2 * i], fields[4 + 2 * i]
+            size = length * array(code).itemsize
+            setattr(self, name, view[offset:offset + size].cast(code))
+
+        meta_offset, meta_length = fields[-2], fields[-1]
+        meta = json.loads(bytes(view[meta_offset:meta_offset + meta_length]))
+        self.job_types = meta['job_types']
+
+
+@contextmanager
+def _exclusive(lock_path):
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SharedJobIndex(ActiveJobSnapshot):
+    """ActiveJobSnapshot backed by a memory-mapped file shared by all workers on the host."""
+
+    def __init__(self, path, check_interval=2.0):
+        super().__init__(check_interval=check_interval)
+        self.path = path
+        self.lock_path = f'{path}.lock'
+
+    def _map_file(self, min_version):
+        """Map the current file if it is at least min_version, else None."""
+        try:
+            data = _MappedSnapshotData(self.path)
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+        return data if data.generation >= min_version else None
+
+    def write(self):
+        """Rebuild the file from the database (under the lock) and map it."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with _exclusive(self.lock_path):
+            version = self._db_version()
+            write_index_file(self.path, _SnapshotData(self._load_rows(), version))
+        data = _MappedSnapshotData(self.path)
+        self._swap(data)
+        current_app.logger.info(f"Shared job index written: {len(data)} jobs at generation {data.generation}")
+        return data
+
+    def rebuild(self):
+        version = self._db_version()
+        data = self._map_file(version)
+        if data is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with _exclusive(self.lock_path):
+                # Another worker may have written it while we waited for the lock
+                data = self._map_file(version)
+                if data is None:
+                    write_index_file(self.path, _SnapshotData(self._load_rows(), version))
+                    data = _MappedSnapshotData(self.path)
+                    current_app.logger.info(
+                        f"Shared job index written: {len(data)} jobs at generation {data.generation}")
+        self._swap(data)
+        return data
+
+    def ensure_fresh(self):
+        data = self._data
+        if data is not None and not self._stale:
+            # A new file from another worker: remap without waiting for the DB version check
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                inode = data.inode
+            if inode != data.inode:
+                fresh = self._map_file(self._version)
+                if fresh is not None:
+                    self._swap(fresh)
+        return super().ensure_fresh()
@@ -0,0 +1,115 @@
+# shrambandhu/utils/skills.py
+"""
+Canonical skills taxonomy.
+
+Workers and jobs are linked to rows in `skills` through `worker_skills` /
+`job_skills`; free text typed (or spoken) by users is resolved through
+`skill_aliases`, which holds English synonyms plus Hindi and romanized Hindi
+names. Matching is then an indexed semi-join on skill ids instead of
+`ILIKE '%skill%'` over comma-separated text (where "tile" matched "textile").
+
+Free text never adds to the taxonomy: terms no alias matches are kept only in
+the display text columns (users.skills / jobs.skills_required). New skills
+and aliases come in through migrations.
+"""
+from collections import namedtuple
+from sqlalchemy import select, func, exists
+from shrambandhu.extensions import db
+from shrambandhu.models import Job, Skill, SkillAlias, job_skills
+
+# Canonical skill -> aliases as (alias, language). Seeded by the taxonomy migration.
+SEED_SKILLS = {
+    'plumbing': [('plumber', 'en'), ('pipe fitting', 'en'), ('प्लम्बर', 'hi'), ('प्लंबर', 'hi'), ('नलसाज़', 'hi'), ('nalsaz', 'hi-Latn')],
+    'masonry': [('mason', 'en'), ('bricklaying', 'en'), ('मिस्त्री', 'hi'), ('राजमिस्त्री', 'hi'), ('mistri', 'hi-Latn'), ('raj mistri', 'hi-Latn')],
+    'carpentry': [('carpenter', 'en'), ('woodwork', 'en'), ('बढ़ई', 'hi'), ('badhai', 'hi-Latn')],
+    'electrical': [('electrician', 'en'), ('wiring', 'en'), ('बिजली', 'hi'), ('इलेक्ट्रीशियन', 'hi'), ('bijli', 'hi-Latn'), ('bijli ka kaam', 'hi-Latn')],
+    'painting': [('painter', 'en'), ('पेंटर', 'hi'), ('रंगाई', 'hi'), ('putai', 'hi-Latn')],
+    'welding': [('welder', 'en'), ('वेल्डर', 'hi'), ('वेल्डिंग', 'hi')],
+    'tiling': [('tiler', 'en'), ('tile work', 'en'), ('टाइल', 'hi')],
+    'construction labour': [('labour', 'en'), ('labor', 'en'), ('helper', 'en'), ('मजदूर', 'hi'), ('मज़दूर', 'hi'), ('mazdoor', 'hi-Latn')],
+    'driving': [('driver', 'en'), ('ड्राइवर', 'hi'), ('चालक', 'hi')],
+    'cleaning': [('cleaner', 'en'), ('housekeeping', 'en'), ('सफाई', 'hi'), ('safai', 'hi-Latn')],
+    'cooking': [('cook', 'en'), ('रसोइया', 'hi'), ('खाना बनाना', 'hi'), ('rasoiya', 'hi-Latn')],
+    'tailoring': [('tailor', 'en'), ('दर्जी', 'hi'), ('सिलाई', 'hi'), ('darzi', 'hi-Latn')],
+    'textile': [('weaving', 'en'), ('weaver', 'en'), ('बुनकर', 'hi'), ('बुनाई', 'hi')],
+    'loading': [('loader', 'en'), ('porter', 'en'), ('हम्माल', 'hi'), ('palledar', 'hi-Latn')],
+    'gardening': [('gardener', 'en'), ('माली', 'hi'), ('mali', 'hi-Latn')],
+    'security guard': [('guard', 'en'), ('watchman', 'en'), ('चौकीदार', 'hi'), ('chowkidar', 'hi-Latn')],
+}
+
+
+def normalize_skill(name):
+    """Collapse whitespace and lowercase, the form stored in skills.name / skill_aliases.alias."""
+    return ' '.join(name.split()).lower()
+
+
+def _normalized_unique(names):
+    return list(dict.fromkeys(normalize_skill(n) for n in (names or []) if n and n.strip()))
+
+
+def lookup_skill_ids(names):
+    """
+    Canonical skill ids for search terms, one per distinct term (input order).
+    Terms no alias matches map to None.
+    """
+    terms = _normalized_unique(names)
+    if not terms:
+        return []
+    found = dict(db.session.execute(
+        select(SkillAlias.alias, SkillAlias.skill_id).where(SkillAlias.alias.in_(terms))
+    ).all())
+    return [found.get(term) for term in terms]
+
+
+ResolvedSkills = namedtuple('ResolvedSkills', 'skills unknown')
+
+
+def resolve_skills(names):
+    """
+    Skill rows for free-text names, deduplicated, in input order.
+
+    Returns ResolvedSkills(skills, unknown): `unknown` holds the terms no alias
+    matches, as typed (whitespace collapsed), for the display text column.
+    """
+    typed = {}
+    for name in names or []:
+        if name and name.strip():
+            typed.setdefault(normalize_skill(name), ' '.join(name.split()))
+    if not typed:
+        return ResolvedSkills([], [])
+    with db.session.no_autoflush: # The owner may still be pending/incomplete
+        found = dict(db.session.execute(
+            select(SkillAlias.alias, SkillAlias.skill_id).where(SkillAlias.alias.in_(list(typed)))
+        ).all())
+        by_id = {skill.id: skill for skill in Skill.query.filter(Skill.id.in_(set(found.values()))).all()} if found else {}
+
+    skills, unknown = [], []
+    for term, text in typed.items():
+        skill = by_id.get(found.get(term))
+        if skill is None:
+            unknown.append(text)
+        elif skill not in skills: # "plumber" and "plumbing" are one skill
+            skills.append(skill)
+    return ResolvedSkills(skills, unknown)
+
+
+def skills_text(resolved):
+    """Comma-separated display copy: canonical names, then the unmatched terms."""
+    return ','.join([skill.name for skill in resolved.skills] + resolved.unknown)
+
+
+def job_skill_filter(skill_ids, match_all=False):
+    """
+    Criterion on Job for the given canonical skill ids.
+
+    match_all: the job lists every skill (GROUP BY / HAVING count over job_skills),
+    otherwise any one of them (EXISTS semi-join). Both are served by ix_job_skills_skill_id.
+    """
+    skill_ids = list(dict.fromkeys(skill_ids))
+    if match_all:
+        matching = (select(job_skills.c.job_id)
+                    .where(job_skills.c.skill_id.in_(skill_ids))
+                    .group_by(job_skills.c.job_id)
+                    .having(func.count(job_skills.c.skill_id) == len(skill_ids)))
+        return Job.id.in_(matching)
+    return exists().where(job_skills.c.job_id == Job.id, job_skills.c.skill_id.in_(skill_ids))
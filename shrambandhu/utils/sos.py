@@ -0,0 +1,147 @@
+# shrambandhu/utils/sos.py
+"""
+SOS dispatch.
+
+Recipients are the nearby responders (found through the users spatial index,
+nearest first) plus every other active admin. All messages go out concurrently
+as one messaging gateway batch on its SOS lane (own pool of SOS_DISPATCH_WORKERS
+senders, exempt from the per-sender rate limit); sends still running at the
+SOS_SEND_DEADLINE_SECONDS deadline are recorded as timeouts (the Twilio client's
+own per-request timeout ends them shortly after). Timeouts and retryable
+failures are queued for retry on the task queue at PRIORITY_SOS. Every recipient
+gets a SosDeliveryAttempt row, and the alert records when its last message went
+out and the latency from alert creation to that send.
+
+The SOS request doesn't wait for any of this: it commits the alert together
+with a PRIORITY_SOS `dispatch_sos` task and returns, and submit() runs that
+task straight away on one of SOS_CONCURRENT_DISPATCHES background threads.
+If this process can't (it is busy or dies), `flask worker` runs the task.
+"""
+import os
+import socket
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from shrambandhu.extensions import db
+from shrambandhu.models import User, SosDeliveryAttempt
+from shrambandhu.utils import twilio_client
+from shrambandhu.utils.location import get_nearest_responders
+from shrambandhu.utils.messaging import LANE_SOS
+from shrambandhu.utils.tasks import PRIORITY_SOS, claim, run_task
+
+SosRecipient = namedtuple('SosRecipient', 'user_id phone distance')
+# sent/failed/timed_out: recipient counts; latency_ms: alert creation -> last successful send (None if none)
+# retried: failed or timed-out sends queued for another try
+DispatchResult = namedtuple('DispatchResult', 'sent failed timed_out latency_ms retried')
+
+
+def select_recipients(location, worker_id, radius_km):
+    """Nearby responders (nearest first), then the remaining active admins; one entry per phone."""
+    recipients, seen_phones = [], set()
+    for responder in get_nearest_responders(location, radius_km=radius_km):
+        if responder.id != worker_id and responder.phone and responder.phone not in seen_phones:
+            seen_phones.add(responder.phone)
+            recipients.append(SosRecipient(responder.id, responder.phone, responder.distance))
+    nearby_ids = [r.user_id for r in recipients]
+    admins = db.session.execute(
+        select(User.id, User.phone).where(
+            User.role == 'admin', User.is_active.is_(True), User.phone.isnot(None),
+            User.id != worker_id, User.id.notin_(nearby_ids))
+        .order_by(User.id)
+    ).all()
+    for admin in admins:
+        if admin.phone not in seen_phones:
+            seen_phones.add(admin.phone)
+            recipients.append(SosRecipient(admin.id, admin.phone, None))
+    return recipients
+
+
+def sos_message(worker, lat, lng, created_at):
+    maps_link = f"https://www.google.com/maps?q={lat},{lng}" # Use standard Google Maps link
+    return (f"🚨 EMERGENCY SOS 🚨\nWorker: {worker.name or 'Unknown'} ({worker.phone})\n"
+            f"Location: {maps_link}\nTime: {created_at.strftime('%Y-%m-%d %H:%M UTC')}")
+
+
+class SosDispatcher:
+    """Sends an alert to all its recipients as one batch on the messaging gateway's SOS lane."""
+
+    def __init__(self, app=None, deadline=15.0, concurrent_dispatches=4):
+        self.app = app
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=concurrent_dispatches, thread_name_prefix='sos-alert')
+
+    def submit(self, task_id):
+        """Run the committed `dispatch_sos` task `task_id` now, in the background. Returns a Future."""
+        return self._executor.submit(self._run, task_id)
+
+    def _run(self, task_id):
+        try:
+            with self.app.app_context():
+                if claim(task_id, f"{socket.gethostname()}:{os.getpid()}:sos"): # Unless a worker got to it first
+                    run_task(task_id)
+                db.session.remove()
+        except Exception as e: # Left queued or running: the task worker (or its lease check) takes over
+            self.app.logger.error(f"SOS dispatch task {task_id}: {e}", exc_info=True)
+
+    def dispatch(self, alert, worker, radius_km=10):
+        """Notify recipients of a committed EmergencyAlert; persists attempts and latency. Returns a DispatchResult."""
+        location = (alert.location_lat, alert.location_lng)
+        recipients = select_recipients(location, worker.id, radius_km)
+        message = sos_message(worker, alert.location_lat, alert.location_lng, alert.created_at)
+
+        queued_at = datetime.utcnow()
+        gateway = twilio_client.gateway
+        results = gateway.send_batch([(r.phone, message) for r in recipients], lane=LANE_SOS, timeout=self.deadline)
+
+        sent = failed = timed_out = 0
+        last_sent_at = None
+        for result, recipient in zip(results, recipients):
+            attempt = SosDeliveryAttempt(alert_id=alert.id, recipient_id=recipient.user_id, phone=recipient.phone,
+                                         distance_km=recipient.distance, queued_at=queued_at)
+            if result.timed_out:
+                attempt.status, attempt.error = 'timeout', result.error
+                timed_out += 1
+            else:
+                attempt.completed_at, attempt.duration_ms = result.completed_at, result.duration_ms
+                if result.sid:
+                    attempt.status, attempt.provider_sid = 'sent', result.sid
+                    sent += 1
+                    last_sent_at = max(last_sent_at or result.completed_at, result.completed_at)
+                else:
+                    attempt.status, attempt.error = 'failed', result.error
+                    failed += 1
+                    current_app.logger.warning(
+                        f"SOS Alert {alert.id}: Failed to send SMS to {recipient.phone}: {result.error}")
+            db.session.add(attempt)
+        # A timed-out send may still have gone out: a duplicate beats a responder never hearing of it
+        retried = gateway.queue_retries(results, delay=0, priority=PRIORITY_SOS, lane=LANE_SOS)
+
+        latency_ms = None
+        alert.recipients_notified = sent
+        if last_sent_at is not None:
+            latency_ms = int((last_sent_at - alert.created_at).total_seconds() * 1000)
+            alert.dispatched_at, alert.dispatch_latency_ms = last_sent_at, latency_ms
+        db.session.commit()
+
+        current_app.logger.info(
+            f"SOS Alert {alert.id}: {sent}/{len(recipients)} notified, {failed} failed, {timed_out} timed out "
+            f"({retried} queued for retry), latency {latency_ms} ms.")
+        slo_ms = current_app.config.get('SOS_LATENCY_SLO_SECONDS', 30) * 1000
+        if latency_ms is None or latency_ms > slo_ms:
+            current_app.logger.error(f"SOS Alert {alert.id}: dispatch latency SLO ({slo_ms:g} ms) missed.")
+        return DispatchResult(sent, failed, timed_out, latency_ms, retried)
+
+
+def init_app(app):
+    # Send concurrency is the gateway's SOS lane (SOS_DISPATCH_WORKERS, read from Config when it is built)
+    app.extensions['sos_dispatcher'] = SosDispatcher(
+        app,
+        deadline=app.config.get('SOS_SEND_DEADLINE_SECONDS', 15.0),
+        concurrent_dispatches=app.config.get('SOS_CONCURRENT_DISPATCHES', 4),
+    )
+
+
+def get_sos_dispatcher():
+    return current_app.extensions['sos_dispatcher']
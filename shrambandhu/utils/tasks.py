@@ -0,0 +1,361 @@
+# shrambandhu/utils/tasks.py
+"""
+Durable background tasks (the `tasks` table), run by `flask worker`.
+
+Request handlers enqueue() slow external I/O -- SMS, WhatsApp, email,
+speech-to-text -- instead of doing it inline. The task row is added to the
+caller's transaction, so it exists exactly when the change that caused it
+commits. Workers claim the most urgent due task (lowest priority number,
+then oldest run_at), run its handler with bounded concurrency and retry
+failures with exponential backoff up to max_attempts. While a handler runs,
+its worker refreshes the task's lease every third of TASK_LEASE_SECONDS, so
+only a task whose worker died is handed out again once the lease expires,
+however long its handler takes. An idempotency key makes
+enqueueing the same work twice (double submits, retried requests) a no-op.
+
+Handlers are registered with @task_handler(name) and receive the JSON
+payload as keyword arguments; they run inside an app context and raise to
+request a retry.
+"""
+import json
+import os
+import random
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import IntegrityError
+from shrambandhu.extensions import db
+from shrambandhu.models import Task
+
+# Lower runs first
+PRIORITY_SOS = 0
+PRIORITY_HIGH = 10 # Someone is waiting for it (OTPs)
+PRIORITY_DEFAULT = 50
+PRIORITY_BULK = 90 # Digests, announcements, marketing
+
+TASK_HANDLERS = {}
+
+
+def task_handler(name):
+    """Register the decorated function as the handler for tasks called `name`."""
+    def register(func):
+        TASK_HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, priority=PRIORITY_DEFAULT, idempotency_key=None, delay=0, max_attempts=None):
+    """
+    Queue task `name` in the current transaction (the caller commits) and return it.
+
+    If a task with the same idempotency_key was already queued, that task is returned instead.
+    A keyed task is inserted right away with ON CONFLICT DO NOTHING (inside a SAVEPOINT on
+    other databases), so when a concurrent request queued the same key first, its task is
+    returned instead of the caller's transaction failing.
+    """
+    if name not in TASK_HANDLERS:
+        raise KeyError(f"Unknown task '{name}'")
+    if idempotency_key is not None:
+        existing = Task.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing
+    values = dict(name=name, payload=json.dumps(payload or {}), priority=priority, idempotency_key=idempotency_key,
+                  run_at=datetime.utcnow() + timedelta(seconds=delay),
+                  max_attempts=max_attempts or current_app.config.get('TASK_MAX_ATTEMPTS', 5))
+    task = Task(**values)
+    if idempotency_key is None:
+        db.session.add(task)
+        return task
+    # pysqlite only opens its transaction on DML, so a leading SAVEPOINT would commit on RELEASE
+    connection = db.session.connection()
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(Task.__table__).values(**values).on_conflict_do_nothing(index_elements=['idempotency_key'])
+        db.session.execute(stmt)
+        return Task.query.filter_by(idempotency_key=idempotency_key).one()
+    try: # Generic fallback
+        with db.session.begin_nested():
+            db.session.add(task)
+    except IntegrityError:
+        existing = Task.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing is None:
+            raise
+        return existing
+    return task
+
+
+OTP_MESSAGES = {
+    'registration': "Your ShramBandhu registration OTP is: {otp}. Valid for 5 minutes.",
+    'verification': "Your ShramBandhu verification OTP is: {otp}. Valid for 5 minutes.",
+}
+
+
+def enqueue_otp(user, purpose):
+    """
+    Queue the SMS for the OTP just generated for `user` (an OTP_MESSAGES key; the caller commits).
+
+    The task holds only the user id: the code is read from the user when it is sent, so it is never
+    stored in the tasks table.
+    """
+    return enqueue('send_otp', {'user_id': user.id, 'purpose': purpose}, priority=PRIORITY_HIGH,
+                   idempotency_key=f"otp:{user.id}:{user.otp_expiry.isoformat()}")
+
+
+def retry_delay(attempts, base, cap):
+    """Seconds before retry number `attempts`: exponential, capped, with up to 10% jitter."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(1.0, 1.1)
+
+
+def claim_next(worker_name):
+    """Mark the most urgent due task running for `worker_name`; returns its id, or None if nothing is due."""
+    tasks = Task.__table__
+    now = datetime.utcnow()
+    candidate = (
+        select(tasks.c.id).where(tasks.c.status == 'queued', tasks.c.run_at <= now)
+        .order_by(tasks.c.priority, tasks.c.run_at, tasks.c.id).limit(1)
+        .with_for_update(skip_locked=True) # Concurrent workers skip each other's rows (ignored on SQLite)
+        .scalar_subquery()
+    )
+    with db.engine.begin() as connection:
+        return connection.execute(
+            update(tasks).where(tasks.c.id == candidate, tasks.c.status == 'queued')
+            .values(status='running', locked_by=worker_name, locked_at=now, attempts=tasks.c.attempts + 1)
+            .returning(tasks.c.id)
+        ).scalar()
+
+
+def claim(task_id, worker_name):
+    """Mark queued task `task_id` running for `worker_name`, to run it right away. False if it was already taken."""
+    tasks = Task.__table__
+    with db.engine.begin() as connection:
+        return connection.execute(
+            update(tasks).where(tasks.c.id == task_id, tasks.c.status == 'queued')
+            .values(status='running', locked_by=worker_name, locked_at=datetime.utcnow(), attempts=tasks.c.attempts + 1)
+        ).rowcount == 1
+
+
+def run_task(task_id):
+    """Run a claimed task and record the outcome: done, queued again with backoff, or failed."""
+    task = db.session.get(Task, task_id)
+    handler = TASK_HANDLERS.get(task.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task '{task.name}'")
+        handler(**json.loads(task.payload or '{}'))
+    except Exception as e:
+        db.session.rollback()
+        task = db.session.get(Task, task_id)
+        task.last_error = f"{e.__class__.__name__}: {e}"[:2000]
+        task.locked_by = task.locked_at = None
+        if handler is not None and task.attempts < task.max_attempts:
+            delay = retry_delay(task.attempts, current_app.config.get('TASK_RETRY_BASE_SECONDS', 10),
+                                current_app.config.get('TASK_RETRY_MAX_SECONDS', 3600))
+            task.status, task.run_at = 'queued', datetime.utcnow() + timedelta(seconds=delay)
+            current_app.logger.warning(f"Task {task.id} ({task.name}) attempt {task.attempts} failed, "
+                                       f"retrying in {delay:.0f}s: {e}")
+        else:
+            task.status, task.finished_at = 'failed', datetime.utcnow()
+            current_app.logger.error(f"Task {task.id} ({task.name}) failed after {task.attempts} attempts: {e}")
+        db.session.commit()
+        return False
+    task.status, task.finished_at, task.last_error = 'done', datetime.utcnow(), None
+    task.locked_by = task.locked_at = None
+    db.session.commit()
+    return True
+
+
+def extend_leases(task_ids, worker_name):
+    """Renew the lease on running tasks `worker_name` still holds. Returns how many."""
+    if not task_ids:
+        return 0
+    tasks = Task.__table__
+    with db.engine.begin() as connection:
+        return connection.execute(
+            update(tasks).where(tasks.c.id.in_(task_ids), tasks.c.status == 'running', tasks.c.locked_by == worker_name)
+            .values(locked_at=datetime.utcnow())
+        ).rowcount
+
+
+def requeue_expired(lease_seconds):
+    """Hand tasks whose worker stopped answering (running longer than the lease) out again. Returns how many."""
+    tasks = Task.__table__
+    expired = (tasks.c.status == 'running', tasks.c.locked_at < datetime.utcnow() - timedelta(seconds=lease_seconds))
+    with db.engine.begin() as connection:
+        failed = connection.execute(
+            update(tasks).where(*expired, tasks.c.attempts >= tasks.c.max_attempts)
+            .values(status='failed', finished_at=datetime.utcnow(), last_error='Lease expired')
+        ).rowcount
+        requeued = connection.execute(
+            update(tasks).where(*expired).values(status='queued', run_at=datetime.utcnow(), locked_by=None, locked_at=None)
+        ).rowcount
+    return failed + requeued
+
+
+def purge_finished(days):
+    """Delete done/failed tasks finished more than `days` ago. Returns how many."""
+    result = db.session.execute(
+        delete(Task).where(Task.status.in_(('done', 'failed')),
+                           Task.finished_at < datetime.utcnow() - timedelta(days=days))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def task_counts():
+    """{status: count} over the tasks table."""
+    return dict(db.session.execute(select(Task.status, func.count()).group_by(Task.status)).all())
+
+
+class TaskWorker:
+    """Claims due tasks and runs up to `concurrency` of them at a time on a thread pool."""
+
+    def __init__(self, app, concurrency=4, poll_interval=1.0, lease_seconds=300, name=None):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task-worker')
+        self._stop = threading.Event()
+        self._running = set() # Claimed task ids whose leases the heartbeat renews
+        self._running_lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, drain=False):
+        """Run tasks until stop() (or, with drain, until none is due). Waits for running tasks. Returns tasks started."""
+        started = 0
+        next_lease_check = 0
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(heartbeat_stop,), name='task-heartbeat', daemon=True)
+        heartbeat.start()
+        try:
+            while not self._stop.is_set():
+                now = datetime.utcnow().timestamp()
+                if now >= next_lease_check:
+                    with self.app.app_context():
+                        if requeue_expired(self.lease_seconds):
+                            self.app.logger.warning('Requeued tasks with expired leases')
+                    next_lease_check = now + self.lease_seconds / 2
+                self._slots.acquire() # Blocks while all workers are busy
+                with self.app.app_context():
+                    task_id = claim_next(self.name)
+                if task_id is None:
+                    self._slots.release()
+                    if drain:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                with self._running_lock:
+                    self._running.add(task_id)
+                self._executor.submit(self._run, task_id)
+                started += 1
+        finally:
+            self._executor.shutdown(wait=True)
+            heartbeat_stop.set() # Only once no task is running
+            heartbeat.join()
+        return started
+
+    def _heartbeat(self, stop):
+        # Leases cover a dead worker, not a slow handler (voice transcription can outlast TASK_LEASE_SECONDS)
+        while not stop.wait(self.lease_seconds / 3):
+            with self._running_lock:
+                task_ids = list(self._running)
+            try:
+                with self.app.app_context():
+                    extend_leases(task_ids, self.name)
+            except Exception as e: # Try again next beat; a lease only lapses after three misses
+                self.app.logger.error(f"Could not renew task leases: {e}")
+
+    def _run(self, task_id):
+        try:
+            with self.app.app_context():
+                run_task(task_id)
+                db.session.remove()
+        except Exception as e: # Recording the outcome failed; the lease check will hand it out again
+            self.app.logger.error(f"Task {task_id}: worker error: {e}", exc_info=True)
+        finally:
+            with self._running_lock:
+                self._running.discard(task_id)
+            self._slots.release()
+
+
+# --- Handlers ---
+
+@task_handler('send_sms')
+def _send_sms(to, body, lane='default'):
+    from shrambandhu.utils.twilio_client import deliver_sms
+    deliver_sms(to, body, lane)
+
+
+@task_handler('send_otp')
+def _send_otp(user_id, purpose):
+    # The user's current code; nothing is sent once it is used or expired (a slow retry must not deliver a dead code)
+    from shrambandhu.models import User
+    from shrambandhu.utils.twilio_client import deliver_sms
+    user = db.session.get(User, user_id)
+    if user is None or not user.otp or not user.phone or not user.otp_expiry or user.otp_expiry <= datetime.utcnow():
+        current_app.logger.info(f"OTP for user {user_id} no longer valid; not sent")
+        return
+    deliver_sms(user.phone, OTP_MESSAGES[purpose].format(otp=user.otp))
+
+
+@task_handler('send_whatsapp')
+def _send_whatsapp(to, body, lane='default'):
+    from shrambandhu.utils.twilio_client import send_whatsapp_message
+    send_whatsapp_message(to, body, lane)
+
+
+@task_handler('send_email')
+def _send_email(subject, recipients, text_body, html_body=None):
+    # Sent on one of the pool's persistent SMTP connections; a full pool queue or SMTP error means a retry
+    from flask_mail import Message
+    from shrambandhu.utils.mail_dispatcher import get_mail_dispatcher
+    msg = Message(subject, sender=current_app.config['MAIL_DEFAULT_SENDER'], recipients=recipients)
+    msg.body = text_body
+    if html_body:
+        msg.html = html_body
+    get_mail_dispatcher().send(msg, timeout=current_app.config.get('MAIL_SEND_TIMEOUT', 60))
+
+
+@task_handler('notify_many')
+def _notify_many(user_ids, title, message, link_url=None):
+    # A deferred notify_many() batch; rows and counters commit with the task's outcome
+    from shrambandhu.utils.notifications import insert_notifications
+    insert_notifications(db.session, user_ids, title, message, link_url)
+
+
+@task_handler('dispatch_sos')
+def _dispatch_sos(alert_id):
+    # Normally run at once by SosDispatcher.submit() in the process that took the alert; a worker picks it up otherwise
+    from shrambandhu.models import EmergencyAlert, SosDeliveryAttempt
+    from shrambandhu.utils.sos import get_sos_dispatcher
+    alert = db.session.get(EmergencyAlert, alert_id)
+    if alert is None or alert.status != 'active':
+        return
+    if SosDeliveryAttempt.query.filter_by(alert_id=alert_id).first() is not None:
+        return # Already dispatched (failed sends are retried as their own send_sms tasks)
+    get_sos_dispatcher().dispatch(alert, alert.worker, radius_km=current_app.config['SOS_RADIUS_KM'])
+
+
+@task_handler('voice_registration')
+def _voice_registration(user_id, path):
+    """Transcribe a worker's registration recording (under UPLOAD_FOLDER/voice_samples) into name and skills."""
+    from shrambandhu.models import User
+    from shrambandhu.voice.stt import transcribe_audio, extract_worker_details
+    user = db.session.get(User, user_id)
+    if user is None:
+        return
+    transcript = transcribe_audio(os.path.join(current_app.config['UPLOAD_FOLDER'], 'voice_samples', path))
+    current_app.logger.info(f"Transcription result for user {user.id}: {transcript}")
+    details = extract_worker_details(transcript) # Expects {'name': ..., 'skills': [...]}
+    if details.get('name'): user.name = details['name']
+    if details.get('skills'): user.set_skills_list(details['skills'])
+    db.session.commit()
@@ -0,0 +1,93 @@
+# shrambandhu/utils/transcription_cache.py
+"""
+Persistent cache of speech-to-text results.
+
+A retried voice registration or a repeated IVR attempt often sends the very
+same recording again. voice.stt.transcribe_audio() looks transcripts up in
+the `transcription_cache` table by the sha256 of the audio bytes, the
+language code and the recognizer config (backend, encoding, sample rate)
+before calling the provider, and stores non-empty results for
+STT_CACHE_TTL_DAYS. Cache failures never fail a transcription.
+
+Every lookup is counted in metric_rollups (metric 'stt_cache', dimension
+'hit' / 'miss', hourly and daily buckets), so cost dashboards read it like
+any other rollup; `flask stt cache-stats` prints the totals and
+`flask stt purge-cache` deletes expired entries.
+"""
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from flask import current_app
+from sqlalchemy import select, delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from shrambandhu.extensions import db
+from shrambandhu.models import TranscriptionCache
+from shrambandhu.utils.rollups import GRANULARITIES, apply_deltas, bucket_start, metric_totals
+
+METRIC = 'stt_cache'
+
+
+class CacheKey(NamedTuple):
+    content_hash: str
+    language_code: str
+    config: str
+
+
+def _where(key):
+    table = TranscriptionCache.__table__
+    return (table.c.content_hash == key.content_hash, table.c.language_code == key.language_code,
+            table.c.config == key.config)
+
+
+def get_cached(key):
+    """Unexpired transcript for `key`, or None."""
+    try:
+        return db.session.execute(
+            select(TranscriptionCache.transcript).where(*_where(key), TranscriptionCache.expires_at > datetime.utcnow())
+        ).scalar()
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Transcription cache lookup failed: {e}")
+        return None
+
+
+def put_cached(key, transcript):
+    """Store a transcript on its own connection, outside the caller's transaction."""
+    now = datetime.utcnow()
+    table = TranscriptionCache.__table__
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(*_where(key)))
+            connection.execute(insert(table).values(
+                content_hash=key.content_hash, language_code=key.language_code, config=key.config,
+                transcript=transcript, created_at=now,
+                expires_at=now + timedelta(days=current_app.config.get('STT_CACHE_TTL_DAYS', 30))
+            ))
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Could not cache transcription {key.content_hash[:12]}: {e}")
+
+
+def count_lookup(hit):
+    """Add one hit or miss to the stt_cache rollups."""
+    now = datetime.utcnow()
+    dimension = 'hit' if hit else 'miss'
+    try:
+        with db.engine.begin() as connection:
+            apply_deltas(connection, {(METRIC, dimension, granularity, bucket_start(now, granularity)): 1
+                                      for granularity in GRANULARITIES})
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Could not count transcription cache {dimension}: {e}")
+
+
+def cache_stats(since=None):
+    """{'hit': n, 'miss': n} over all days (or those from `since`)."""
+    totals = metric_totals([METRIC], since=since)[METRIC]
+    return {dimension: int(totals.get(dimension, 0)) for dimension in ('hit', 'miss')}
+
+
+def purge_expired():
+    """Delete expired entries. Returns how many."""
+    result = db.session.execute(
+        delete(TranscriptionCache).where(TranscriptionCache.expires_at <= datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
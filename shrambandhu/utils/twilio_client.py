@@ -1,16 +1,16 @@
-from twilio.rest import Client
+import logging
 from shrambandhu.config import Config
+from shrambandhu.utils.messaging import build_gateway, LANE_DEFAULT
 
-client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+logger = logging.getLogger(__name__)
 
-def send_whatsapp_message(to, body):
-    message = client.messages.create(
-        body=body,
-        from_='whatsapp:' + Config.TWILIO_PHONE_NUMBER,
-        to='whatsapp:' + to
-    )
-    print(f"Message SID: {message.sid}")  # Print SID for debugging
-    return message.sid
+# Module-level like the Twilio client it wraps: usable from pool threads without an app context (SOS dispatch).
+# Pooled keep-alive connections, per-sender rate limits and a bounded per-request timeout (utils.messaging)
+gateway = build_gateway(Config)
+
+def send_whatsapp_message(to, body, lane=LANE_DEFAULT):
+    """Send a WhatsApp message and return its SID; raises on provider errors."""
+    return gateway.send('whatsapp', to, body, lane)
 
 def receive_whatsapp_message(request):
     from_number = request.form.get('From')
@@ -24,14 +24,14 @@ def receive_whatsapp_message(request):
     }
 
 
+def deliver_sms(to, body, lane=LANE_DEFAULT):
+    """Send an SMS and return its SID; raises on provider errors (see send_sms for the forgiving version)."""
+    return gateway.send('sms', to, body, lane)
+
+
 def send_sms(to, body):
     try:
-        message = client.messages.create(
-            body=body,
-            from_=Config.TWILIO_PHONE_NUMBER,
-            to=to
-        )
-        return message.sid
+        return deliver_sms(to, body)
     except Exception as e:
-        print(f"SMS sending failed: {str(e)}")
+        logger.warning(f"SMS sending failed: {str(e)}")
         return None    
\ No newline at end of file
@@ -0,0 +1,114 @@
+# shrambandhu/utils/view_counter.py
+"""
+Buffered profile-view counter.
+
+Public profile views are only recorded in memory (per process), optionally
+counting one view per employer per worker within PROFILE_VIEW_DEDUPE_SECONDS.
+A daemon thread flushes the coalesced counts every PROFILE_VIEW_FLUSH_SECONDS
+with atomic `profile_views = profile_views + n` UPDATEs (one statement per
+distinct n), so concurrent processes never lose increments and the page
+itself never writes. Counts of a failed flush are kept for the next one; a
+final flush runs at interpreter exit.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from shrambandhu.extensions import db
+from shrambandhu.models import User
+
+
+class ViewCounter:
+    """Per-process worker_id -> pending view count, flushed in the background."""
+
+    def __init__(self, app, flush_interval=10.0, dedupe_seconds=0, max_pending=5000):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.dedupe_seconds = dedupe_seconds
+        self.max_pending = max_pending
+        self._pending = defaultdict(int)
+        self._seen = {} # (worker_id, viewer_id) -> monotonic time the view stops being deduplicated
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread_pid = None
+
+    def record(self, worker_id, viewer_id=None):
+        """Count a view of `worker_id`. Returns False if it was a repeat view within the dedupe window."""
+        now = time.monotonic()
+        with self._lock:
+            if self.dedupe_seconds > 0 and viewer_id is not None:
+                key = (worker_id, viewer_id)
+                if self._seen.get(key, 0) > now:
+                    return False
+                self._seen[key] = now + self.dedupe_seconds
+            self._pending[worker_id] += 1
+            full = len(self._pending) >= self.max_pending
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_thread()
+            if full:
+                self._wakeup.set()
+        return True
+
+    def pending(self, worker_id):
+        """Views recorded by this process and not flushed yet."""
+        return self._pending.get(worker_id, 0)
+
+    def flush(self):
+        """Write the pending counts. Returns the number of views flushed (0 if the write failed)."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            now = time.monotonic()
+            self._seen = {key: until for key, until in self._seen.items() if until > now}
+        if not pending:
+            return 0
+        worker_ids_by_count = defaultdict(list)
+        for worker_id, count in pending.items():
+            worker_ids_by_count[count].append(worker_id)
+        users = User.__table__
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                for count, worker_ids in worker_ids_by_count.items():
+                    connection.execute(update(users).where(users.c.id.in_(worker_ids))
+                                       .values(profile_views=users.c.profile_views + count))
+        except SQLAlchemyError as e:
+            with self._lock: # Keep them for the next flush
+                for worker_id, count in pending.items():
+                    self._pending[worker_id] += count
+            self.app.logger.error(f"Profile view flush failed ({len(pending)} workers pending): {e}")
+            return 0
+        return sum(pending.values())
+
+    def _ensure_thread(self):
+        # Started lazily so each (forked) server process gets its own flusher
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(target=self._run, name='profile-view-flush', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def init_app(app):
+    counter = ViewCounter(
+        app,
+        flush_interval=app.config.get('PROFILE_VIEW_FLUSH_SECONDS', 10),
+        dedupe_seconds=app.config.get('PROFILE_VIEW_DEDUPE_SECONDS', 0),
+    )
+    app.extensions['view_counter'] = counter
+    atexit.register(counter.flush)
+
+
+def get_view_counter():
+    return current_app.extensions['view_counter']
@@ -0,0 +1,178 @@
+# shrambandhu/utils/worker_stats.py
+"""
+Worker dashboard summary.
+
+All the counts the dashboard needs (applications, certifications, documents)
+come from one SELECT over three conditional-aggregate subqueries; reputation
+comes from the users counters (utils.reputation) and the rest from the user
+row itself. The DB part is cached per user for WORKER_STATS_CACHE_SECONDS and
+dropped when this process commits a change to that worker's applications,
+certifications or documents; other processes see it within the TTL.
+"""
+import threading
+import time
+from typing import NamedTuple, Optional
+from flask import current_app
+from sqlalchemy import event, select, func, case, and_
+from sqlalchemy.orm import Session
+from shrambandhu.extensions import db
+from shrambandhu.models import Application, WorkerCertification, DocumentVerification, REQUIRED_DOCUMENT_TYPES
+from shrambandhu.utils.view_counter import get_view_counter
+
+ACTIVE_APPLICATION_STATUSES = ('applied', 'shortlisted')
+MAX_CACHED = 10000
+
+
+class WorkerCounts(NamedTuple):
+    """The part of the summary read from the database (what gets cached)."""
+    active_applications: int
+    verified_certs: int
+    pending_certs: int
+    total_certs: int
+    pending_docs: int
+    rejected_docs: int
+    verified_required_docs: int # Distinct required document types with a verified document
+
+
+class DashboardSummary(NamedTuple):
+    active_applications: int
+    verified_certs: int
+    pending_certs: int
+    pending_docs: int
+    rejected_docs: int
+    completed_jobs: int
+    avg_rating: Optional[float]
+    is_fully_verified: bool
+    profile_completion: int
+    profile_views: int
+
+
+def load_worker_counts(worker_id, role='worker'):
+    """All DB-backed dashboard counts for one worker in a single statement."""
+    required = REQUIRED_DOCUMENT_TYPES.get(role, [])
+    active_apps = (
+        select(func.count(Application.id))
+        .where(Application.worker_id == worker_id, Application.status.in_(ACTIVE_APPLICATION_STATUSES))
+        .scalar_subquery()
+    )
+    status = WorkerCertification.verification_status
+    certs = (
+        select(func.count(case((status == 'verified', 1))).label('verified'),
+               func.count(case((status == 'pending', 1))).label('pending'),
+               func.count(WorkerCertification.id).label('total'))
+        .where(WorkerCertification.worker_id == worker_id)
+        .subquery()
+    )
+    doc_type = func.lower(DocumentVerification.document_type)
+    docs = (
+        select(func.count(case((DocumentVerification.status == 'pending', 1))).label('pending'),
+               func.count(case((DocumentVerification.status == 'rejected', 1))).label('rejected'),
+               func.count(func.distinct(case(
+                   (and_(DocumentVerification.status == 'verified', doc_type.in_(required or [''])), doc_type)
+               ))).label('verified_required'))
+        .where(DocumentVerification.user_id == worker_id)
+        .subquery()
+    )
+    row = db.session.execute(
+        select(active_apps, certs.c.verified, certs.c.pending, certs.c.total,
+               docs.c.pending, docs.c.rejected, docs.c.verified_required)
+        .select_from(certs).join(docs, db.true())
+    ).one()
+    return WorkerCounts(*(value or 0 for value in row))
+
+
+class _CountsCache:
+    """Per-process worker_id -> (expires_at, WorkerCounts)."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, worker_id):
+        item = self._items.get(worker_id)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        return item[1]
+
+    def put(self, worker_id, counts, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._items) >= MAX_CACHED:
+                self._items = {key: item for key, item in self._items.items() if item[0] > now}
+                if len(self._items) >= MAX_CACHED:
+                    self._items.clear()
+            self._items[worker_id] = (now + ttl, counts)
+
+    def invalidate(self, worker_ids=None):
+        with self._lock:
+            if worker_ids is None:
+                self._items.clear()
+            else:
+                for worker_id in worker_ids:
+                    self._items.pop(worker_id, None)
+
+
+_cache = _CountsCache()
+
+
+def worker_dashboard_summary(user):
+    """DashboardSummary for a worker: at most one query, none on a cache hit."""
+    ttl = current_app.config.get('WORKER_STATS_CACHE_SECONDS', 0)
+    counts = _cache.get(user.id) if ttl > 0 else None
+    if counts is None:
+        counts = load_worker_counts(user.id, user.role)
+        if ttl > 0:
+            _cache.put(user.id, counts, ttl)
+    required = REQUIRED_DOCUMENT_TYPES.get(user.role, [])
+    is_verified = counts.verified_required_docs >= len(required)
+    return DashboardSummary(
+        active_applications=counts.active_applications,
+        verified_certs=counts.verified_certs,
+        pending_certs=counts.pending_certs,
+        pending_docs=counts.pending_docs,
+        rejected_docs=counts.rejected_docs,
+        completed_jobs=user.completed_jobs_count,
+        avg_rating=user.average_rating,
+        is_fully_verified=is_verified,
+        profile_completion=user.worker_profile_completion(is_verified, counts.total_certs > 0),
+        profile_views=(user.profile_views or 0) + get_view_counter().pending(user.id), # + not yet flushed here
+    )
+
+
+# --- Session events: drop cached counts when their source rows change ---
+
+_OWNER_ATTRS = {Application: 'worker_id', WorkerCertification: 'worker_id', DocumentVerification: 'user_id'}
+
+
+def _after_flush(session, flush_context):
+    touched = session.info.setdefault('worker_stats_touched', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        attr = _OWNER_ATTRS.get(type(obj))
+        if attr is not None and getattr(obj, attr, None) is not None:
+            touched.add(getattr(obj, attr))
+
+
+def _after_bulk(update_context):
+    # Query.update()/delete() on these tables (e.g. rejecting a job's other applicants): owners unknown
+    if update_context.mapper.class_ in _OWNER_ATTRS:
+        update_context.session.info['worker_stats_touch_all'] = True
+
+
+def _after_commit(session):
+    touched = session.info.pop('worker_stats_touched', None)
+    if session.info.pop('worker_stats_touch_all', False):
+        _cache.invalidate()
+    elif touched:
+        _cache.invalidate(touched)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('worker_stats_touched', None)
+    session.info.pop('worker_stats_touch_all', None)
+
+
+event.listen(Session, 'after_flush', _after_flush)
+event.listen(Session, 'after_bulk_update', _after_bulk)
+event.listen(Session, 'after_bulk_delete', _after_bulk)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
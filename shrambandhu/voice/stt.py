@@ -1,30 +1,210 @@
-from google.cloud import speech_v1p1beta1 as speech
-import os
+"""
+Speech-to-text for voice registration (web uploads, via the task queue) and the IVR.
+
+SpeechClients come from one process-wide pool (created on first use, again
+after a fork) instead of being built from the service-account JSON on every
+call. Audio is streamed to the recognizer in chunks straight from its source
+-- a file path, an upload or HTTP stream, or an iterable of bytes such as
+requests' iter_content() -- so nothing goes through temp files. Recordings
+the caller knows to be longer than STT_LONG_RUNNING_SECONDS use long-running
+recognition instead (streaming sessions are capped at about five minutes).
+
+Inside an app context, results are cached by audio content, language and
+config (utils.transcription_cache), so identical re-submissions cost no
+provider call. Sources that can be read twice (paths, bytes) are hashed
+chunk by chunk and looked up before recognition; one-shot streams are
+hashed as they stream to the recognizer, so they can't hit the cache but
+their result is stored for the next submission of the same audio. The
+recording is never held in memory for the cache.
+
+STT_BACKEND=stub swaps in StubRecognizer, which returns STT_STUB_TRANSCRIPT
+without calling Google (tests, offline development).
+"""
+import asyncio
+import hashlib
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from flask import current_app, has_app_context
+from google.cloud import speech_v1p1beta1 as speech
+from shrambandhu.config import Config
 
-def transcribe_audio(audio_file_path, language_code='hi-IN'):
-    client = speech.SpeechClient.from_service_account_json(
-        os.getenv('GOOGLE_APPLICATION_CREDENTIALS'))
-    
-    with open(audio_file_path, 'rb') as audio_file:
-        content = audio_file.read()
-    
-    audio = speech.RecognitionAudio(content=content)
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
-        sample_rate_hertz=16000,
-        language_code=language_code,
-        enable_automatic_punctuation=True,
-    )
-    
-    response = client.recognize(config=config, audio=audio)
-    
-    transcript = ""
-    for result in response.results:
-        transcript += result.alternatives[0].transcript
-    
+CHUNK_SIZE = 16 * 1024 # A streaming request carries at most 25 KB of audio
+
+
+def iter_audio(source, chunk_size=CHUNK_SIZE):
+    """Yield the audio in `source` (path, bytes, binary stream or iterable of bytes) in chunks of at most chunk_size."""
+    if isinstance(source, (bytes, bytearray)):
+        chunks = [source]
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as audio_file:
+            yield from iter(lambda: audio_file.read(chunk_size), b'')
+        return
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), b'')
+    else:
+        chunks = source
+    for chunk in chunks:
+        for start in range(0, len(chunk), chunk_size):
+            yield bytes(chunk[start:start + chunk_size])
+
+
+class SpeechClientPool:
+    """Up to `size` SpeechClients shared by the process; each transcription borrows one."""
+
+    def __init__(self, size=4, credentials_path=None):
+        self.size = size
+        self.credentials_path = credentials_path
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, pid):
+        self._pid = pid
+        self._idle = queue.LifoQueue()
+        self._created = 0
+
+    def _create(self):
+        if self.credentials_path and os.path.exists(self.credentials_path):
+            return speech.SpeechClient.from_service_account_json(self.credentials_path)
+        return speech.SpeechClient() # Application default credentials
+
+    @contextmanager
+    def client(self):
+        with self._lock:
+            if self._pid != os.getpid(): # gRPC channels don't survive a fork
+                self._reset(os.getpid())
+            idle, create = self._idle, self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                client = self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        else:
+            client = idle.get() # Waits while all clients are busy
+        try:
+            yield client
+        finally:
+            idle.put(client)
+
+
+def recognition_config(language_code, encoding, sample_rate_hertz):
+    """RecognitionConfig; encoding is an AudioEncoding name, sample_rate_hertz None reads it from the file header."""
+    options = dict(language_code=language_code, enable_automatic_punctuation=True,
+                   encoding=speech.RecognitionConfig.AudioEncoding[encoding])
+    if sample_rate_hertz:
+        options['sample_rate_hertz'] = sample_rate_hertz
+    return speech.RecognitionConfig(**options)
+
+
+class GoogleRecognizer:
+    """Google Cloud Speech-to-Text through a SpeechClientPool."""
+
+    name = 'google'
+
+    def __init__(self, pool, long_running_seconds=240, operation_timeout=600):
+        self.pool = pool
+        self.long_running_seconds = long_running_seconds
+        self.operation_timeout = operation_timeout
+
+    def transcribe(self, source, language_code, encoding='OGG_OPUS', sample_rate_hertz=16000, duration_seconds=None):
+        config = recognition_config(language_code, encoding, sample_rate_hertz)
+        with self.pool.client() as client:
+            if duration_seconds is not None and duration_seconds > self.long_running_seconds:
+                # Long-running recognition takes the audio in one piece
+                audio = speech.RecognitionAudio(content=b''.join(iter_audio(source)))
+                response = client.long_running_recognize(config=config, audio=audio).result(timeout=self.operation_timeout)
+                return ''.join(result.alternatives[0].transcript for result in response.results if result.alternatives)
+            requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in iter_audio(source))
+            responses = client.streaming_recognize(speech.StreamingRecognitionConfig(config=config), requests)
+            return ''.join(result.alternatives[0].transcript for response in responses for result in response.results
+                           if result.is_final and result.alternatives)
+
+
+class StubRecognizer:
+    """Local recognizer: reads the audio like the real one and returns a fixed transcript. Records its calls."""
+
+    name = 'stub'
+
+    def __init__(self, transcript=''):
+        self.transcript = transcript
+        self.calls = [] # (audio bytes, language_code, options)
+
+    def transcribe(self, source, language_code, **options):
+        audio = b''.join(iter_audio(source))
+        self.calls.append((len(audio), language_code, options))
+        return self.transcript
+
+
+def build_recognizer(config):
+    """Recognizer configured from the Config class."""
+    if config.STT_BACKEND == 'stub':
+        return StubRecognizer(config.STT_STUB_TRANSCRIPT)
+    return GoogleRecognizer(SpeechClientPool(config.STT_CLIENT_POOL_SIZE, config.GOOGLE_APPLICATION_CREDENTIALS),
+                            long_running_seconds=config.STT_LONG_RUNNING_SECONDS,
+                            operation_timeout=config.STT_OPERATION_TIMEOUT_SECONDS)
+
+
+# Module-level (clients are created lazily) so pool threads and asyncio callers need no app context
+recognizer = build_recognizer(Config)
+
+
+def transcribe_audio(source, language_code='hi-IN', encoding='OGG_OPUS', sample_rate_hertz=16000, duration_seconds=None):
+    """
+    Transcript of the recording in `source`: a file path, bytes, a binary stream or an iterable of byte chunks.
+
+    Pass duration_seconds when known (e.g. Twilio's RecordingDuration) so long recordings use long-running recognition.
+    """
+    options = dict(encoding=encoding, sample_rate_hertz=sample_rate_hertz, duration_seconds=duration_seconds)
+    if not (has_app_context() and current_app.config.get('STT_CACHE_ENABLED', True)):
+        return recognizer.transcribe(source, language_code, **options)
+
+    from shrambandhu.utils import transcription_cache as cache
+    config = f"{recognizer.name}:{encoding}:{sample_rate_hertz or 'header'}"
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, str, os.PathLike)): # Can be read again: hash first, then look up
+        for chunk in iter_audio(source):
+            digest.update(chunk)
+        transcript = cache.get_cached(cache.CacheKey(digest.hexdigest(), language_code, config))
+        cache.count_lookup(transcript is not None)
+        if transcript is not None:
+            return transcript
+        transcript = recognizer.transcribe(source, language_code, **options)
+        complete = True
+    else: # Read once: hash what the recognizer reads
+        cache.count_lookup(False)
+        stream = _HashingStream(source, digest)
+        transcript = recognizer.transcribe(stream, language_code, **options)
+        complete = stream.exhausted
+    if transcript and complete: # An empty result may be a glitch; let the next attempt ask again
+        cache.put_cached(cache.CacheKey(digest.hexdigest(), language_code, config), transcript)
     return transcript
 
+
+class _HashingStream:
+    """Iterable over the chunks of a one-shot source that feeds them to `digest` as they go by."""
+
+    def __init__(self, source, digest):
+        self.source = source
+        self.digest = digest
+        self.exhausted = False
+
+    def __iter__(self):
+        for chunk in iter_audio(self.source):
+            self.digest.update(chunk)
+            yield chunk
+        self.exhausted = True
+
+
+async def transcribe_audio_async(source, **kwargs):
+    """transcribe_audio() for asyncio callers; the blocking gRPC calls run on a worker thread."""
+    return await asyncio.to_thread(transcribe_audio, source, **kwargs)
+
+
 def extract_worker_details(transcript):
     # NLP logic to extract name, skills, location etc.
     # This is simplified - you'd use a proper NLP library
@@ -68,7 +68,7 @@ class DocumentUploadForm(FlaskForm):
 
 class JobSearchForm(FlaskForm):
     """Form for filtering and searching jobs."""
-    keywords = StringField('Keywords (Title/Description)',
+    keywords = StringField('Keywords (Title/Description/Address)',
                            validators=[Optional(), Length(max=100)])
 
     distance = SelectField('Distance (Max)',
@@ -88,7 +88,7 @@ class JobSearchForm(FlaskForm):
                              validators=[Optional(), NumberRange(min=0)], description="Leave blank for any salary")
 
     sort_by = RadioField('Sort By',
-                         choices=[ ('distance', 'Distance'), ('date', 'Date Posted'), ('salary', 'Salary') ],
+                         choices=[ ('distance', 'Distance'), ('date', 'Date Posted'), ('salary', 'Salary'), ('relevance', 'Relevance') ],
                          default='distance', validators=[DataRequired()])
 
     submit = SubmitField('Search Jobs')
\ No newline at end of file
@@ -6,24 +6,34 @@ from flask import (
 from flask_login import current_user, login_required
 from shrambandhu.models import (
     User, Job, Application, EmergencyAlert, Certification, WorkerCertification,
-    Payment, DocumentVerification, Notification, Rating # Added Rating
+    Payment, DocumentVerification, Notification, Rating, # Added Rating
+    JOB_SUMMARY, USER_SUMMARY
 )
 from datetime import datetime, timedelta
 from shrambandhu.utils.location import (
-    get_nearby_jobs, get_nearest_responders, get_hospitals_near_location,
-    calculate_distance
+    get_nearby_jobs, get_hospitals_near_location,
+    calculate_distance, batch_distances
 )
-from shrambandhu.utils.twilio_client import send_whatsapp_message, send_sms # Kept send_sms
-from shrambandhu.voice.stt import transcribe_audio, extract_worker_details
+from shrambandhu.utils.job_cards import load_job_cards, job_cards_for_hits
+from shrambandhu.utils.geo_index import bbox_filter, approx_distance_sq
+from shrambandhu.utils.job_snapshot import get_job_snapshot
+from shrambandhu.utils.skills import lookup_skill_ids, job_skill_filter
+from shrambandhu.utils.job_search import apply_keyword_search
+from shrambandhu.utils.sos import get_sos_dispatcher
+from shrambandhu.utils.worker_stats import worker_dashboard_summary
+from shrambandhu.utils.notifications import open_inbox, mark_read, notify, notify_many
+from shrambandhu.utils.view_counter import get_view_counter
+from shrambandhu.utils.pagination import Cursor, KeysetPage, encode_cursor, decode_cursor, keyset_after
+from shrambandhu.utils.tasks import enqueue, enqueue_otp, PRIORITY_HIGH, PRIORITY_SOS # SMS and speech-to-text run on `flask worker`
 from shrambandhu.extensions import db
 from .forms import ProfileForm, DocumentUploadForm , JobSearchForm # Added JobSearchForm
 import json
 import os
+from bisect import bisect_left, bisect_right
 from werkzeug.utils import secure_filename
-import tempfile # For saving temporary audio blob
 from sqlalchemy import or_ , desc, asc , and_ , func , case # For SQLAlchemy queries
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import joinedload , load_only
+from sqlalchemy.orm import joinedload , load_only , undefer_group
 
 # Create the Blueprint
 # Ensure template_folder points correctly relative to the Blueprint's location
@@ -103,23 +113,15 @@ def dashboard():
     # --- Get Nearby Jobs ---
     nearby_jobs = []
     if location_set:
-        nearby_jobs = get_nearby_jobs(worker_location, worker_skills, max_distance_km=25)
+        # Only 5 cards are shown, so only those get exact geodesic distances
+        nearby_jobs = get_nearby_jobs(worker_location, worker_skills, max_distance_km=25, precise_top_k=5, limit=5,
+                                      worker_id=current_user.id)
     else:
         flash('Please set your location in your profile to find nearby jobs.', 'info')
 
     # --- Get Dashboard Stats ---
-    # Active Applications Count
-    active_applications_count = current_user.worker_applications.filter(
-        Application.status.in_(['applied', 'shortlisted'])
-    ).count()
-
-    # Certifications Summary
-    verified_certs_count = current_user.worker_certifications.filter_by(verification_status='verified').count()
-    pending_certs_count = current_user.worker_certifications.filter_by(verification_status='pending').count()
-
-    # Document Verification Summary
-    pending_docs_count = current_user.document_verifications.filter_by(status='pending').count()
-    rejected_docs_count = current_user.document_verifications.filter_by(status='rejected').count()
+    # Applications, certifications, documents and reputation in one query (cached briefly per user)
+    summary = worker_dashboard_summary(current_user)
 
     # Recent Payments (limit to 3 for dashboard display)
     recent_payments = Payment.query.filter_by(worker_id=current_user.id)\
@@ -127,39 +129,31 @@ def dashboard():
                                 .order_by(Payment.created_at.desc())\
                                 .limit(3).all()
 
-    # Profile Completion
-    profile_completion = current_user.profile_completion
-
-    # Overall Verification Status (using the property)
-    is_verified = current_user.is_fully_verified # Use the property check
-
-    # Quick Stats for Top Cards (can reuse some from above)
+    # Quick Stats for Top Cards
     stats = {
-        'active_applications': active_applications_count,
-        'verified_certs': verified_certs_count,
-        'completed_jobs': current_user.completed_jobs_count, # Use property
-        'avg_rating': current_user.average_rating # Use property
+        'active_applications': summary.active_applications,
+        'verified_certs': summary.verified_certs,
+        'completed_jobs': summary.completed_jobs,
+        'avg_rating': summary.avg_rating
     }
 
     # Verification Summary for Card
     verification_summary = {
-        'pending_docs': pending_docs_count,
-        'rejected_docs': rejected_docs_count,
-        'pending_certs': pending_certs_count,
-        'is_fully_verified': is_verified
+        'pending_docs': summary.pending_docs,
+        'rejected_docs': summary.rejected_docs,
+        'pending_certs': summary.pending_certs,
+        'is_fully_verified': summary.is_fully_verified
     }
-     
-    profile_views_count = current_user.profile_views
 
     return render_template(
         'dashboard.html', # templates/worker/dashboard.html
         stats=stats,
         nearby_jobs=nearby_jobs[:5], # Show limited jobs on dashboard
         recent_payments=recent_payments,
-        profile_completion=profile_completion,
+        profile_completion=summary.profile_completion,
         location_set=location_set,
         verification_summary=verification_summary,
-        profile_views_count=profile_views_count
+        profile_views_count=summary.profile_views
     )
 
 # --- Complete/Update Profile Route ---
@@ -177,52 +171,32 @@ def complete_profile():
         if 'audio_blob' in request.files:
             audio_file = request.files['audio_blob']
             if audio_file.filename != '':
-                # Use a temporary file to save the blob for transcription
-                temp_dir = tempfile.gettempdir()
-                # Ensure filename has an extension stt library might need (e.g., .ogg, .wav)
+                # Save the recording as the voice sample; transcription runs on the task worker
                 # The JS should ideally send the correct mime type / extension. Assume .ogg for now.
-                temp_filename = f"user_{user.id}_reg_voice_{int(datetime.utcnow().timestamp())}.ogg"
-                temp_filepath = os.path.join(temp_dir, temp_filename)
+                perm_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'voice_samples', str(user.id))
+                perm_filename = f"voice_reg_{int(datetime.utcnow().timestamp())}.ogg"
+                perm_filepath = os.path.join(perm_folder, perm_filename)
 
                 try:
-                    audio_file.save(temp_filepath)
-                    current_app.logger.info(f"Saved temporary voice file for transcription: {temp_filepath}")
-
-                    # Transcribe and extract details (Ensure GOOGLE_APPLICATION_CREDENTIALS is set)
-                    transcript = transcribe_audio(temp_filepath) # Assuming takes filepath
-                    current_app.logger.info(f"Transcription result for user {user.id}: {transcript}")
-                    details = extract_worker_details(transcript) # Expects {'name': ..., 'skills': [...]}
-
-                    # Update user profile from voice
-                    if details.get('name'): user.name = details['name']
-                    if details.get('skills'): user.set_skills_list(details['skills'])
-
-                    # Optionally save the voice file permanently (adjust path)
-                    perm_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'voice_samples', str(user.id))
                     os.makedirs(perm_folder, exist_ok=True)
-                    perm_filename = f"voice_reg_{int(datetime.utcnow().timestamp())}.ogg"
-                    perm_filepath = os.path.join(perm_folder, perm_filename)
-                    os.rename(temp_filepath, perm_filepath) # Move temp file
+                    audio_file.save(perm_filepath)
                     user.voice_sample_path = os.path.join(str(user.id), perm_filename) # Store relative path
-
+                    # Name and skills are filled in from the transcript (utils.tasks 'voice_registration')
+                    enqueue('voice_registration', {'user_id': user.id, 'path': user.voice_sample_path},
+                            priority=PRIORITY_HIGH, idempotency_key=f"voice-reg:{user.voice_sample_path}")
                     db.session.commit()
-                    flash('Profile updated using voice registration!', 'success')
+                    flash('Voice received! Your profile will be updated from it in a moment.', 'success')
                     return jsonify({'status': 'success', 'redirect': url_for('worker.dashboard')}) # Respond to JS fetch
 
                 except Exception as e:
                     db.session.rollback()
                     current_app.logger.error(f"Voice registration processing error for user {user.id}: {e}", exc_info=True)
                     flash('Error processing voice registration. Please try again or fill manually.', 'danger')
-                     # Clean up temp file on error
-                    if os.path.exists(temp_filepath):
-                         try: os.remove(temp_filepath)
+                    # Clean up the saved recording on error
+                    if os.path.exists(perm_filepath):
+                         try: os.remove(perm_filepath)
                          except OSError: pass
                     return jsonify({'status': 'error', 'message': 'Error processing audio.'}), 500
-                finally:
-                    # Ensure temp file is removed if rename didn't happen (e.g., STT failed before move)
-                    if os.path.exists(temp_filepath):
-                         try: os.remove(temp_filepath)
-                         except OSError: pass
 
             else: # Empty audio file received
                  return jsonify({'status': 'error', 'message': 'No audio data received.'}), 400
@@ -314,17 +288,13 @@ def profile():
             # If phone changed and needs verification, send OTP and redirect
             if phone_changed and user.phone and not user.is_phone_verified:
                  try:
-                     otp = user.generate_otp()
-                     db.session.commit() # Save OTP
-                     message = f"Your ShramBandhu verification OTP is: {otp}. Valid for 5 minutes."
-                     sms_sent = send_sms(user.phone, message)
-                     if sms_sent:
-                         session['otp_login_phone'] = user.phone # Store phone for verification
-                         session['otp_verify_purpose'] = 'profile_update' # Specific purpose
-                         flash('OTP sent to your new phone number. Please enter it below.', 'info')
-                         return redirect(url_for('auth.verify_login_otp', next=url_for('worker.profile'))) # Redirect to verify, then back to profile
-                     else:
-                         flash('Phone number updated, but failed to send verification OTP. Please try verifying later.', 'warning')
+                     user.generate_otp()
+                     enqueue_otp(user, 'verification')
+                     db.session.commit() # Save OTP and its SMS task
+                     session['otp_login_phone'] = user.phone # Store phone for verification
+                     session['otp_verify_purpose'] = 'profile_update' # Specific purpose
+                     flash('OTP sent to your new phone number. Please enter it below.', 'info')
+                     return redirect(url_for('auth.verify_login_otp', next=url_for('worker.profile'))) # Redirect to verify, then back to profile
                  except Exception as e:
                      db.session.rollback() # Rollback OTP generation if SMS fails maybe?
                      current_app.logger.error(f"Failed sending OTP for profile update to {user.phone}: {e}")
@@ -357,18 +327,14 @@ def resend_profile_phone_otp():
         return redirect(url_for('worker.profile'))
 
     try:
-        otp = user.generate_otp()
+        user.generate_otp()
+        enqueue_otp(user, 'verification')
         db.session.commit()
-        message = f"Your ShramBandhu verification OTP is: {otp}. Valid for 5 minutes."
-        sms_sent = send_sms(user.phone, message)
-        if sms_sent:
-            flash('A new verification OTP has been sent to your phone number.', 'info')
-            # Redirect to verification page? Or stay on profile? Redirect for entering OTP.
-            session['otp_login_phone'] = user.phone
-            session['otp_verify_purpose'] = 'profile_update'
-            return redirect(url_for('auth.verify_login_otp', next=url_for('worker.profile')))
-        else:
-            flash('Failed to resend OTP. Please try again later.', 'danger')
+        flash('A new verification OTP has been sent to your phone number.', 'info')
+        # Redirect to verification page? Or stay on profile? Redirect for entering OTP.
+        session['otp_login_phone'] = user.phone
+        session['otp_verify_purpose'] = 'profile_update'
+        return redirect(url_for('auth.verify_login_otp', next=url_for('worker.profile')))
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"OTP Resend Error for profile {user.phone}: {e}")
@@ -414,13 +380,9 @@ def apply(job_id):
         # Notify employer
         employer = job.employer
         if employer:
-            notification = Notification(
-                user_id=employer.id,
-                title="New Job Application",
-                message=f"Application received for '{job.title}' from {current_user.name or current_user.phone}.",
-                link_url=url_for('employer.view_applications', job_id=job.id, _external=True)
-            )
-            db.session.add(notification)
+            notify(employer.id, 'application_received',
+                   {'job_title': job.title, 'applicant': current_user.name or current_user.phone},
+                   link_url=url_for('employer.view_applications', job_id=job.id, _external=True))
             db.session.commit()
         else:
             current_app.logger.warning(f"Employer not found for job {job.id}")
@@ -466,6 +428,10 @@ def trigger_sos():
             status='active' # Explicitly set status
         )
         db.session.add(alert)
+        db.session.flush()
+        # Committed with the alert, so the notification can't be lost even if this process dies right after
+        dispatch_task = enqueue('dispatch_sos', {'alert_id': alert.id}, priority=PRIORITY_SOS,
+                                idempotency_key=f"sos:{alert.id}")
         db.session.commit()
         current_app.logger.info(f"SOS Alert ID {alert.id} created for worker {current_user.id} at ({lat}, {lng}).")
 
@@ -479,42 +445,16 @@ def trigger_sos():
         return jsonify({'success': False, 'error': 'Failed to record SOS alert.'}), 500
 
     # --- Alert Notification Logic ---
-    # This part can also fail, so wrap it
-    responders_contacted_count = 0
+    # Fan-out to nearby responders + admins runs in the background; /sos/status reports recipients_notified
     try:
-        # Get nearest responders (add error handling within get_nearest_responders if needed)
-        responders = get_nearest_responders((lat, lng), radius_km=10) # Increased radius maybe
-        admins = User.query.filter_by(role='admin', is_active=True).all()
-        all_recipients = responders + admins
-        sent_to = set() # Avoid duplicate messages
-
-        Maps_link = f"https://www.google.com/maps?q={lat},{lng}" # Use standard Google Maps link
-        message = f"🚨 EMERGENCY SOS 🚨\nWorker: {current_user.name or 'Unknown'} ({current_user.phone})\nLocation: {Maps_link}\nTime: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}"
-
-        for recipient in all_recipients:
-            # Ensure recipient is valid, not the worker themselves, and not already notified
-            if recipient and recipient.phone and recipient.id != current_user.id and recipient.id not in sent_to:
-                sms_sent = send_sms(recipient.phone, message) # send_sms should handle its own errors and return None/False on failure
-                if sms_sent:
-                    responders_contacted_count += 1
-                    sent_to.add(recipient.id)
-                    current_app.logger.info(f"SOS Alert {alert.id}: Sent SMS to {recipient.phone}")
-                else:
-                    current_app.logger.warning(f"SOS Alert {alert.id}: Failed to send SMS to {recipient.phone}")
-
-        current_app.logger.info(f"SOS Alert {alert.id}: Notified {responders_contacted_count} responders/admins.")
-
+        get_sos_dispatcher().submit(dispatch_task.id)
     except Exception as e:
-        # Log error during notification but don't necessarily fail the whole request,
-        # as the alert *was* recorded in the database.
-        current_app.logger.error(f"Error during SOS notification phase for Alert ID {alert.id}: {e}", exc_info=True)
-        # Optionally, you could return success=False here if notifications are critical
+        # The task is committed, so `flask worker` still sends it
+        current_app.logger.error(f"Could not start SOS dispatch for Alert ID {alert.id}: {e}", exc_info=True)
 
-    # Return success even if some notifications failed, as the alert is logged
     return jsonify({
         'success': True,
-        'alert_id': alert.id,
-        'responders_contacted': responders_contacted_count
+        'alert_id': alert.id
     }), 200 # OK status
 
 @worker_bp.route('/sos/status/<int:alert_id>')
@@ -528,7 +468,9 @@ def check_sos_status(alert_id):
     return jsonify({
         'status': alert.status,
         'created_at': alert.created_at.isoformat() + 'Z', # ISO format UTC
-        'resolved_at': alert.resolved_at.isoformat() + 'Z' if alert.resolved_at else None
+        'resolved_at': alert.resolved_at.isoformat() + 'Z' if alert.resolved_at else None,
+        'recipients_notified': alert.recipients_notified or 0,
+        'dispatch_latency_ms': alert.dispatch_latency_ms
     })
 
 
@@ -665,6 +607,31 @@ def upload_document():
      return render_template('upload_document.html', title='Upload Verification Document', form=form, documents=user_documents)
 
 
+# --- Notifications (inbox shared with employers, see utils.notifications) ---
+@worker_bp.route('/notifications')
+@login_required
+def notifications():
+    if current_user.role != 'worker': flash('Access denied.', 'danger'); return redirect(url_for('index'))
+    unread_only = request.args.get('unread') == '1'
+    notifications_page = open_inbox(current_user, request.args.get('cursor'),
+                                    current_app.config.get('NOTIFICATIONS_PER_PAGE', 20), unread_only)
+    return render_template('notifications.html', notifications_page=notifications_page, unread_only=unread_only,
+                           inbox_endpoint='worker.notifications', read_endpoint='worker.mark_notifications_read')
+
+
+@worker_bp.route('/notifications/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    if current_user.role != 'worker': flash('Access denied.', 'danger'); return redirect(url_for('index'))
+    try:
+        mark_read(current_user.id, up_to_id=request.form.get('up_to_id', type=int))
+        db.session.commit(); flash('All notifications marked as read', 'success')
+    except SQLAlchemyError as e:
+        db.session.rollback(); current_app.logger.error(f"Error marking notifications read: {e}")
+        flash('Error clearing notifications', 'danger')
+    return redirect(url_for('worker.notifications'))
+
+
 # --- Payment History ---
 @worker_bp.route('/payments')
 @login_required
@@ -704,17 +671,12 @@ def verify_payment(payment_id):
              # Add reason if form includes it: payment.rejection_reason = request.form.get('reason')
              # Notify Employer and Admin
              flash('Payment disputed. Admin will review.', 'warning')
-             # Create notification for admin
-             admins = User.query.filter_by(role='admin').all()
-             for admin in admins:
-                 if admin:
-                     notification = Notification(
-                         user_id=admin.id,
-                         title="Payment Dispute Raised",
-                         message=f"Worker {current_user.name or current_user.phone} disputed payment ID {payment.id} for job '{payment.job.title}'.",
-                         link_url=url_for('admin.payment_disputes', _external=True) # Link to admin dispute page
-                     )
-                     db.session.add(notification)
+             # Notify all admins in one bulk insert
+             admin_ids = db.session.scalars(db.select(User.id).where(User.role == 'admin')).all()
+             notify_many(admin_ids, 'payment_disputed',
+                         {'worker': current_user.name or current_user.phone, 'payment_id': payment.id,
+                          'job_title': payment.job.title},
+                         link_url=url_for('admin.payment_disputes', _external=True)) # Link to admin dispute page
         else:
              flash('Invalid action.', 'danger')
              return redirect(url_for('worker.payment_history'))
@@ -739,34 +701,14 @@ def public_profile(worker_id):
     if worker.role != 'worker' or not worker.is_active:
         abort(404)
 
-    # --- Increment View Count Logic ---
-    increment_count = False
-    if current_user.is_authenticated:
-        # Only increment if viewer is authenticated, is an employer, and is NOT viewing their own profile
-        if current_user.id != worker.id and current_user.role == 'employer':
-            increment_count = True
-            # Optional: Add session/timestamp logic here to prevent rapid increments from same employer
-    else:
-        # Decide if anonymous views should count (less reliable)
-        # For now, let's only count views by logged-in employers
-        pass
-
-    if increment_count:
-        try:
-            # Fetch the full worker object only if we need to increment
-            worker_to_update = User.query.get(worker_id) # Get full object for update
-            if worker_to_update: # Should exist, but double check
-                worker_to_update.profile_views = (worker_to_update.profile_views or 0) + 1
-                db.session.commit()
-                current_app.logger.info(f"Profile view count for worker {worker_id} incremented by employer {current_user.id}")
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error incrementing profile view count for worker {worker_id}: {e}")
-    # --- End Increment Logic ---
+    # --- View Count: only logged-in employers (not the worker themselves) count ---
+    # Buffered in memory and flushed in the background (utils.view_counter); no write on this request
+    if current_user.is_authenticated and current_user.id != worker.id and current_user.role == 'employer':
+        get_view_counter().record(worker.id, viewer_id=current_user.id)
 
-    # Fetch full worker details for display after potential increment
-    # We re-fetch or use worker_to_update if available to get the latest count
+    # Fetch full worker details for display
     display_worker = User.query.options(
+        undefer_group('profile'), # Skills / public fields are shown
         db.selectinload(User.ratings_received).joinedload(Rating.employer), # Load ratings+employer
         db.selectinload(User.ratings_received).joinedload(Rating.job), # Load ratings+job
         db.selectinload(User.worker_certifications).joinedload(WorkerCertification.certification) # Load certs+details
@@ -806,7 +748,6 @@ def find_jobs():
         return redirect(url_for('worker.profile')) # Redirect to profile if no location
 
     # Get filters from request arguments (using GET method for the form)
-    page = request.args.get('page', 1, type=int)
     per_page = 10 # Jobs per page
     keywords = request.args.get('keywords', '').strip()
     distance_str = request.args.get('distance', '25') # Default 25km
@@ -819,49 +760,6 @@ def find_jobs():
     form = JobSearchForm(request.args)
     form.validate() # Run validators if any (optional for GET)
 
-    # --- Build Base Query ---
-    query = Job.query.filter(
-        Job.status == 'active',
-        Job.location_lat.isnot(None),
-        Job.location_lng.isnot(None)
-    )
-
-    # --- Apply DB Filters ---
-    if keywords:
-        search_term = f"%{keywords}%"
-        query = query.filter(
-            or_(Job.title.ilike(search_term), Job.description.ilike(search_term))
-        )
-
-    if job_type:
-        query = query.filter(Job.job_type == job_type)
-
-    if min_salary_str:
-        try:
-            min_salary = float(min_salary_str)
-            if min_salary > 0:
-                 query = query.filter(Job.salary >= min_salary)
-        except ValueError:
-            flash("Invalid minimum salary specified.", "warning")
-
-    # Apply skill filters (similar to get_nearby_jobs)
-    if skills_str:
-        worker_skills = [s.strip() for s in skills_str.split(',') if s.strip()]
-        skill_filters = []
-        for skill in worker_skills:
-            skill_filters.append(Job.skills_required.ilike(f"%{skill}%"))
-        if skill_filters:
-            # Assuming skills entered by worker should *all* be required by job
-            # query = query.filter(and_(*skill_filters))
-            # OR if *any* skill match is okay:
-             query = query.filter(or_(*skill_filters))
-
-
-    # --- Fetch potential jobs BEFORE distance filtering ---
-    potential_jobs = query.all() # Fetch all matching DB criteria
-
-    # --- Filter by Distance in Python ---
-    filtered_jobs = []
     max_distance = float('inf') # Default to no distance limit
     if distance_str:
         try:
@@ -869,53 +767,164 @@ def find_jobs():
         except ValueError:
             flash("Invalid distance specified.", "warning")
 
-    for job in potential_jobs:
-        job_location = (job.location_lat, job.location_lng)
-        distance = calculate_distance(worker_location, job_location)
-        if distance <= max_distance:
-            job.distance = distance # Add distance attribute
-            filtered_jobs.append(job)
-
-    # --- Sort Results ---
-    if sort_by == 'date':
-        filtered_jobs.sort(key=lambda j: j.created_at, reverse=True)
-    elif sort_by == 'salary':
-        filtered_jobs.sort(key=lambda j: j.salary or 0, reverse=True)
-    else: # Default sort by distance
-        filtered_jobs.sort(key=lambda j: j.distance)
-
-    # --- Paginate the final list (Manual Pagination) ---
-    total_jobs = len(filtered_jobs)
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_jobs_list = filtered_jobs[start:end]
-
-    # Create a pagination-like object for the template
-    from flask_sqlalchemy.pagination import Pagination
-    # Note: This manual pagination doesn't provide all helper methods of query.paginate()
-    # It's sufficient for basic prev/next links if needed.
-    class ManualPagination:
-        def __init__(self, items, page, per_page, total):
-            self.items = items
-            self.page = page
-            self.per_page = per_page
-            self.total = total
-            self.pages = (total + per_page - 1) // per_page if total > 0 else 0
-            self.has_prev = page > 1
-            self.has_next = page < self.pages
-            self.prev_num = page - 1 if self.has_prev else None
-            self.next_num = page + 1 if self.has_next else None
-
-    pagination_obj = ManualPagination(paginated_jobs_list, page, per_page, total_jobs)
+    min_salary = None
+    if min_salary_str:
+        try:
+            min_salary = float(min_salary_str)
+            if min_salary <= 0: min_salary = None
+        except ValueError:
+            flash("Invalid minimum salary specified.", "warning")
+
+    worker_skills = [s.strip() for s in skills_str.split(',') if s.strip()]
+    # Any listed skill is enough; terms outside the taxonomy are ignored (none known -> no results)
+    skill_ids = [i for i in lookup_skill_ids(worker_skills) if i is not None] if worker_skills else None
+
+    # --- Keyset pagination: the cursor marks where the requested page starts ---
+    token = request.args.get('cursor')
+    search_args = {k: v for k, v in request.args.items() if k not in ('cursor', 'page')} # For prev/next links
+
+    # --- Candidate source: the in-memory job snapshot, unless a keyword search needs the DB ---
+    snapshot = get_job_snapshot()
+    if snapshot is not None and not keywords:
+        effective_sort = sort_by if sort_by in ('date', 'salary') else 'distance'
+        hits = snapshot.nearby(worker_location, max_distance, skill_ids=skill_ids, match_all=False,
+                               job_type=job_type or None, min_salary=min_salary)
+        # Ascending sort keys, ties broken by job id
+        if effective_sort == 'date':
+            sort_key = lambda h: (-h.created_at, -h.job_id)
+        elif effective_sort == 'salary':
+            sort_key = lambda h: (-h.salary, -h.job_id)
+        else:
+            sort_key = lambda h: (h.distance, h.job_id)
+        hits.sort(key=sort_key)
+        keys = [sort_key(h) for h in hits]
+
+        cursor = decode_cursor(token, effective_sort, 'snapshot')
+        if cursor is not None and not all(isinstance(v, (int, float)) for v in cursor.key):
+            cursor = None # Tampered token: start over
+        if cursor is None:
+            offset = 0
+        elif cursor.direction == 'after':
+            offset = bisect_right(keys, tuple(cursor.key))
+        else:
+            offset = max(bisect_left(keys, tuple(cursor.key)) - per_page, 0)
+        end = min(offset + per_page, len(hits))
+
+        prev_cursor = next_cursor = None
+        if offset > 0:
+            prev_cursor = encode_cursor(Cursor(effective_sort, 'snapshot', list(keys[offset]), 'before',
+                                               max(offset - per_page, 0), len(hits)))
+        if end < len(hits):
+            next_cursor = encode_cursor(Cursor(effective_sort, 'snapshot', list(keys[end - 1]), 'after',
+                                               end, len(hits)))
+        # Only the jobs on this page are loaded from the DB, as cards
+        jobs_page = KeysetPage(job_cards_for_hits(hits[offset:end], current_user.id), per_page, len(hits), offset,
+                               prev_cursor, next_cursor)
+    else:
+        # --- Build Base Query ---
+        query = Job.query.filter(
+            Job.status == 'active',
+            Job.location_lat.isnot(None),
+            Job.location_lng.isnot(None)
+        )
+        distance_sq = approx_distance_sq(Job, worker_location)
+        if max_distance != float('inf'):
+            # Bounding-box prefilter through the spatial index, then the approximate circle
+            # (with a hair of margin; fetched rows are checked exactly below)
+            query = query.filter(bbox_filter(Job, worker_location, max_distance),
+                                 distance_sq <= (max_distance * 1.0001) ** 2)
+
+        # --- Apply DB Filters ---
+        rank = None # BM25 rank per job when the full-text index is used
+        if keywords:
+            query, rank = apply_keyword_search(query, keywords)
+
+        if job_type:
+            query = query.filter(Job.job_type == job_type)
+
+        if min_salary:
+            query = query.filter(Job.salary >= min_salary)
+
+        # Apply skill filter (EXISTS semi-join on job_skills)
+        if skill_ids is not None:
+            query = query.filter(job_skill_filter(skill_ids, match_all=False))
+
+        # --- Sort key (unique thanks to the id tie-breaker) ---
+        if sort_by == 'date':
+            effective_sort, columns, descending = 'date', [Job.created_at, Job.id], True
+        elif sort_by == 'salary':
+            effective_sort, columns, descending = 'salary', [Job.salary, Job.id], True
+        elif sort_by == 'relevance' and rank is not None:
+            effective_sort, columns, descending = 'relevance', [rank, Job.id], False # bm25: lower is better
+        else: # Default sort by distance (also relevance without keywords)
+            effective_sort, columns, descending = 'distance', [distance_sq, Job.id], False
+
+        cursor = decode_cursor(token, effective_sort, 'db')
+        boundary = None
+        if cursor is not None:
+            boundary = list(cursor.key)
+            try:
+                if effective_sort == 'date':
+                    boundary[0] = datetime.fromisoformat(boundary[0])
+                if not all(isinstance(v, (int, float)) for v in boundary[int(effective_sort == 'date'):]):
+                    raise ValueError('non-numeric cursor key')
+            except (TypeError, ValueError):
+                cursor = boundary = None # Tampered token: start over
+        backwards = cursor is not None and cursor.direction == 'before'
+        # No total here: counting every match would read the whole result set that keyset paging avoids
+        total_jobs = None
+
+        # --- Fetch just this page (+1 row to know whether another follows): ids, coordinates and sort key only ---
+        walk_descending = descending != backwards
+        page_query = query.with_entities(Job.id, Job.location_lat, Job.location_lng, columns[0]).order_by(
+            *[column.desc() if walk_descending else column.asc() for column in columns])
+        rows = [] # (job_id, distance, key)
+        while len(rows) <= per_page:
+            batch_query = page_query
+            if boundary is not None:
+                batch_query = batch_query.filter(keyset_after(columns, boundary, walk_descending))
+            batch = batch_query.limit(per_page + 1).all()
+            if not batch:
+                break
+            distances = batch_distances(worker_location, [(lat, lng) for _, lat, lng, _ in batch])
+            for (job_id, _, _, key), distance in zip(batch, distances):
+                if distance <= max_distance: # Exact haversine check on the fetched rows only
+                    rows.append((job_id, float(distance), [key, job_id]))
+            boundary = [batch[-1][3], batch[-1][0]]
+            if len(batch) <= per_page:
+                break
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        if cursor is None:
+            offset, has_prev, has_next = 0, False, more
+        elif backwards:
+            offset = max(cursor.offset, 0) if more else 0
+            has_prev, has_next = more, True
+        else:
+            offset, has_prev, has_next = cursor.offset, True, more
+
+        prev_cursor = next_cursor = None
+        if rows and has_prev:
+            prev_cursor = encode_cursor(Cursor(effective_sort, 'db', rows[0][2], 'before',
+                                               max(offset - per_page, 0), total_jobs))
+        if rows and has_next:
+            next_cursor = encode_cursor(Cursor(effective_sort, 'db', rows[-1][2], 'after',
+                                               offset + per_page, total_jobs))
+        cards = load_job_cards([job_id for job_id, _, _ in rows], current_user.id,
+                               {job_id: distance for job_id, distance, _ in rows})
+        jobs_page = KeysetPage(cards, per_page, total_jobs, offset, prev_cursor, next_cursor)
 
     return render_template(
         'find_jobs.html',
         title='Find Jobs',
         form=form,
-        jobs_pagination=pagination_obj # Pass the manual pagination object
+        jobs_pagination=jobs_page,
+        search_args=search_args
     )
 
-
 # +++ NEW: My Applications Route +++
 @worker_bp.route('/my-applications')
 @login_required
@@ -931,7 +940,8 @@ def my_applications():
     # Eager load Job and Employer details
     applications_pagination = Application.query.filter_by(worker_id=current_user.id)\
                                 .options(
-                                    joinedload(Application.job).joinedload(Job.employer)
+                                    joinedload(Application.job).load_only(*JOB_SUMMARY)
+                                    .joinedload(Job.employer).load_only(*USER_SUMMARY)
                                 ).order_by(Application.applied_at.desc())\
                                 .paginate(page=page, per_page=per_page, error_out=False)
 
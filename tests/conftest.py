@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# Config reads the environment at import time: point it at a scratch database and offline backends
+_tmp = tempfile.mkdtemp(prefix='shrambandhu-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'test.db')
+os.environ['UPLOAD_FOLDER'] = os.path.join(_tmp, 'uploads')
+os.environ['WTF_CSRF_ENABLED'] = 'false'
+os.environ['MESSAGING_PROVIDER'] = 'fake'
+os.environ['STT_BACKEND'] = 'stub'
+os.environ['MESSAGING_RATE_STATE_DIR'] = os.path.join(_tmp, 'messaging')
+os.environ.setdefault('TWILIO_PHONE_NUMBER', '+15550000000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shrambandhu import create_app
+from shrambandhu.extensions import db
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
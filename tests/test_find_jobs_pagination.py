@@ -0,0 +1,103 @@
+import base64
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from flask import template_rendered
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Job
+from conftest import login
+
+PER_PAGE = 10 # find_jobs page size
+
+
+@pytest.fixture
+def worker_id(app):
+    employer = User(phone='+919000000001', role='employer', name='Emp')
+    worker = User(phone='+919000000002', role='worker', name='Wk', location_lat=17.4, location_lng=78.45)
+    db.session.add_all([employer, worker])
+    db.session.flush()
+    base = datetime(2026, 1, 1)
+    for n in range(27):
+        # Runs of equal created_at / salary, so the id tie-breaker decides the order within them
+        db.session.add(Job(title=f'Job {n}', description='d', employer_id=employer.id, salary=100 + 50 * (n // 6),
+                           created_at=base + timedelta(hours=n // 5), location_lat=17.4 + n * 0.001,
+                           location_lng=78.45))
+    db.session.commit()
+    return worker.id
+
+
+@contextmanager
+def captured_pages(app):
+    pages = []
+
+    def record(sender, template, context, **extra):
+        pages.append(context['jobs_pagination'])
+    template_rendered.connect(record, app)
+    try:
+        yield pages
+    finally:
+        template_rendered.disconnect(record, app)
+
+
+def fetch(client, app, cursor=None, sort_by='date'):
+    query = {'sort_by': sort_by, 'distance': '50'}
+    if cursor is not None:
+        query['cursor'] = cursor
+    with captured_pages(app) as pages:
+        assert client.get('/worker/find-jobs', query_string=query).status_code == 200
+    return pages[0]
+
+
+def expected_ids(sort_by):
+    jobs = Job.query.all()
+    if sort_by == 'date':
+        jobs.sort(key=lambda job: (job.created_at, job.id), reverse=True)
+    elif sort_by == 'salary':
+        jobs.sort(key=lambda job: (job.salary, job.id), reverse=True)
+    else:
+        jobs.sort(key=lambda job: (job.location_lat, job.id))
+    return [job.id for job in jobs]
+
+
+@pytest.mark.parametrize('snapshot', [False, True])
+@pytest.mark.parametrize('sort_by', ['date', 'salary', 'distance'])
+def test_cursor_walk_forward_and_back(app, client, worker_id, snapshot, sort_by):
+    app.config['JOB_SNAPSHOT_ENABLED'] = snapshot
+    login(client, worker_id)
+
+    forward = [fetch(client, app, sort_by=sort_by)]
+    while forward[-1].has_next:
+        forward.append(fetch(client, app, forward[-1].next_cursor, sort_by))
+    assert [card.id for page in forward for card in page.items] == expected_ids(sort_by)
+    assert [page.offset for page in forward] == [0, 10, 20]
+    assert not forward[0].has_prev and not forward[-1].has_next
+    # The snapshot knows its total for free; the DB path doesn't count
+    assert {page.total for page in forward} == ({27} if snapshot else {None})
+
+    back = [forward[-1]]
+    while back[-1].has_prev:
+        back.append(fetch(client, app, back[-1].prev_cursor, sort_by))
+    assert [[card.id for card in page.items] for page in reversed(back)] == \
+        [[card.id for card in page.items] for page in forward]
+    assert back[-1].offset == 0 and back[-1].has_next
+
+
+def _token(*fields):
+    return base64.urlsafe_b64encode(json.dumps(list(fields)).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('snapshot', [False, True])
+@pytest.mark.parametrize('token', [
+    'garbage', '!!', _token(1, 2),
+    _token('date', 'db', ['not-a-date', 3], 'after', 10, None),
+    _token('date', 'snapshot', ['x', 3], 'after', 10, 27),
+    _token('date', 'db', [{'$gt': 1}, 3], 'before', 'ten', None),
+    _token('salary', 'db', [100.0, 3], 'after', 10, None), # Another sort's cursor
+])
+def test_tampered_cursor_restarts_at_first_page(app, client, worker_id, snapshot, token):
+    app.config['JOB_SNAPSHOT_ENABLED'] = snapshot
+    login(client, worker_id)
+    page = fetch(client, app, token)
+    assert page.offset == 0 and not page.has_prev
+    assert [card.id for card in page.items] == expected_ids('date')[:PER_PAGE]
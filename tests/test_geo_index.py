@@ -0,0 +1,76 @@
+import pytest
+from shrambandhu.extensions import db
+from shrambandhu.models import Job, User
+from shrambandhu.utils.geo_index import (_CELL_COLS, geo_cell, bounding_box, cell_ranges, bbox_filter,
+                                         create_rtree_tables)
+from shrambandhu.utils.job_snapshot import _SnapshotData, _job_row
+from shrambandhu.utils.location import nearest_within
+
+
+def _cols(ranges):
+    return sorted({(first % _CELL_COLS, last % _CELL_COLS) for first, last in ranges})
+
+
+def _covered(ranges, lat, lng):
+    cell = geo_cell(lat, lng)
+    return any(first <= cell <= last for first, last in ranges)
+
+
+def test_box_reaching_180_is_not_empty():
+    ranges = cell_ranges(bounding_box((12.9, 77.6), 20000))
+    assert ranges and all(first <= last for first, last in ranges)
+    assert _cols(ranges) == [(0, _CELL_COLS - 1)]
+    for lat, lng in ((12.9, 77.6), (12.9, -179.9), (12.9, 179.95), (12.9, 180.0), (60.0, -100.0)):
+        assert _covered(ranges, lat, lng)
+
+
+def test_box_ending_on_the_antimeridian_covers_points_stored_in_column_0():
+    ranges = cell_ranges((10.0, 11.0, 170.0, 180.0))
+    assert _cols(ranges) == [(0, 0), (3500, _CELL_COLS - 1)]
+    assert _covered(ranges, 10.5, 180.0) and _covered(ranges, 10.5, 179.95)
+    assert not _covered(ranges, 10.5, -179.5)
+
+
+def test_wrapped_box_takes_two_ranges_per_row():
+    bbox = bounding_box((0.0, 179.9), 50)
+    assert bbox[2] > bbox[3] # min_lng > max_lng: crosses the antimeridian
+    ranges = cell_ranges(bbox)
+    rows = {first // _CELL_COLS for first, _ in ranges}
+    assert len(ranges) == 2 * len(rows)
+    assert all(first <= last for first, last in ranges)
+    assert ranges == sorted(ranges)
+    for lng in (179.9, 179.99, 180.0, -180.0, -179.8):
+        assert _covered(ranges, 0.0, lng)
+    assert not _covered(ranges, 0.0, 170.0) and not _covered(ranges, 0.0, -170.0)
+
+
+def test_snapshot_rows_in_wrapped_box():
+    points = {1: (0.0, 179.9), 2: (0.0, -179.9), 3: (0.0, 180.0), 4: (0.0, 170.0), 5: (0.0, 0.0)}
+    data = _SnapshotData([_job_row(job_id, lat, lng, 0, None, '', ()) for job_id, (lat, lng) in points.items()], 1)
+    found = {data.ids[i] for i in data.rows_in_box(bounding_box((0.0, 179.95), 50))}
+    assert found == {1, 2, 3}
+    found = {data.ids[i] for i in data.rows_in_box(bounding_box((12.9, 77.6), 20000))}
+    assert found == set(points)
+
+
+@pytest.mark.parametrize('rtree', [False, True])
+def test_bbox_filter_across_the_antimeridian(app, rtree):
+    if rtree:
+        create_rtree_tables(db.session.connection())
+    employer = User(phone='+919000000001', role='employer', name='Emp')
+    db.session.add(employer)
+    db.session.flush()
+    for lng in (179.9, -179.9, 180.0, 170.0):
+        db.session.add(Job(title=f'Job {lng}', description='d', employer_id=employer.id, salary=500,
+                           location_lat=0.0, location_lng=lng))
+    db.session.commit()
+    found = {job.location_lng for job in Job.query.filter(bbox_filter(Job, (0.0, 179.95), 50))}
+    assert found == {179.9, -179.9, 180.0}
+
+
+def test_precise_head_is_rechecked_against_the_radius():
+    # Along the equator geodesic is longer than haversine, along a meridian shorter
+    points = [(0.0, 0.1), (0.1, 0.0), (0.0, 0.05)]
+    ranked = nearest_within((0.0, 0.0), points, max_distance_km=11.12, precise_top_k=2)
+    assert [i for i, _ in ranked] == [2, 1]
+    assert all(d <= 11.12 for _, d in ranked)
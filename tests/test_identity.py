@@ -0,0 +1,45 @@
+from sqlalchemy import event
+from shrambandhu.extensions import db
+from shrambandhu.models import User
+from shrambandhu.utils import identity
+from shrambandhu.utils.notifications import insert_notifications
+from conftest import login
+
+
+def _user(role='worker', phone='+918000000001'):
+    user = User(phone=phone, role=role, name='U')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_deactivation_reaches_other_processes(app, monkeypatch):
+    user_id = _user()
+    with app.test_request_context():
+        assert identity.load_identity(user_id).is_active
+    stale = identity._cache.get(user_id, 0)
+
+    db.session.get(User, user_id).is_active = False
+    db.session.commit()
+    # Another process still holds the old entry; it only sees the bumped version
+    identity._cache.put(user_id, 0, stale, 60)
+    monkeypatch.setattr(identity._cache, '_checked_at', 0.0)
+    with app.test_request_context():
+        assert identity.load_identity(user_id).is_active is False
+
+
+def test_inbox_does_not_load_the_user_row(app, client):
+    user_id = _user()
+    insert_notifications(db.session, [user_id] * 2, 'T', 'M', None)
+    db.session.commit()
+    login(client, user_id)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        page = client.get('/worker/notifications').get_data(as_text=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert not [s for s in statements if 'FROM users' in s and 'users.otp' in s]
+    assert db.session.get(User, user_id).unread_notification_count == 0
+    assert 'bg-red-600' not in page # Badge reflects the notifications just marked read
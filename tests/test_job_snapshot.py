@@ -0,0 +1,38 @@
+import threading
+import time
+from shrambandhu.utils.job_snapshot import ActiveJobSnapshot, _SnapshotData
+
+
+def test_one_thread_rebuilds_while_others_serve_the_old_arrays(app):
+    snapshot = ActiveJobSnapshot()
+    old = _SnapshotData([], 0)
+    snapshot._swap(old)
+    snapshot.invalidate()
+    builds = []
+
+    def rebuild():
+        builds.append(threading.current_thread().name)
+        time.sleep(0.3)
+        snapshot._swap(_SnapshotData([], 1))
+        return snapshot._data
+    snapshot.rebuild = rebuild
+
+    served = []
+    readers = [threading.Thread(target=lambda: served.append(snapshot.ensure_fresh())) for _ in range(6)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    assert len(builds) == 1
+    assert served.count(old) == 5
+    assert snapshot.ensure_fresh().version == 1
+
+
+def test_apply_leaves_the_built_arrays_alone(app):
+    snapshot = ActiveJobSnapshot()
+    data = _SnapshotData([], 3)
+    snapshot._swap(data)
+    snapshot.apply(3, 4, {7: None})
+    assert data.version == 3 and snapshot._version == 4
+    snapshot.apply(3, 5, {8: None}) # Someone else bumped in between
+    assert snapshot._stale
@@ -0,0 +1,68 @@
+import multiprocessing
+import time
+from shrambandhu.utils.messaging import SharedTokenBucket, MessagingGateway, FakeProvider, RateLimited
+
+
+def _drain(path, results):
+    bucket = SharedTokenBucket(path, rate=1, burst=5)
+    results.put(sum(1 for _ in range(10) if bucket.acquire(timeout=0)))
+
+
+def test_processes_share_one_bucket(tmp_path):
+    path = str(tmp_path / 'sender.bucket')
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [context.Process(target=_drain, args=(path, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    taken = [results.get(timeout=1) for _ in workers]
+    # One burst of 5 (plus at most a token refilled meanwhile) between all three, not 5 each
+    assert 5 <= sum(taken) <= 6
+
+
+def test_gateway_buckets_are_shared_per_sender(tmp_path):
+    gateways = [MessagingGateway(FakeProvider(0), '+15550001111', rate_per_second=1, burst=2, rate_wait_seconds=0,
+                                 rate_state_dir=str(tmp_path)) for _ in range(2)]
+    gateways[0].send('sms', '+911', 'a')
+    gateways[1].send('sms', '+911', 'b')
+    try:
+        gateways[1].send('sms', '+911', 'c')
+    except RateLimited:
+        pass
+    else:
+        raise AssertionError('second gateway ignored the shared bucket')
+    other = MessagingGateway(FakeProvider(0), '+15550002222', rate_per_second=1, burst=2, rate_wait_seconds=0,
+                             rate_state_dir=str(tmp_path))
+    assert other.send('sms', '+911', 'd').startswith('SM')
+    started = time.monotonic()
+    assert gateways[0]._bucket('+15550001111').acquire(timeout=2)
+    assert time.monotonic() - started > 0.5
+
+
+class _SlowFor:
+    def __init__(self, slow_to, delay):
+        self.slow_to, self.delay = slow_to, delay
+
+    def send(self, from_, to, body):
+        if to == self.slow_to:
+            time.sleep(self.delay)
+        return 'SM' + to[-4:]
+
+
+def test_sos_lane_skips_the_rate_limit_and_retries_timeouts_first(app, tmp_path):
+    from shrambandhu.models import Task
+    from shrambandhu.utils.tasks import PRIORITY_SOS
+
+    gateway = MessagingGateway(_SlowFor('+910000000009', 2), '+15550001111', rate_per_second=0.01, burst=1,
+                               rate_wait_seconds=0, rate_state_dir=str(tmp_path), sos_workers=4)
+    messages = [(f'+91000000000{n}', 'SOS') for n in range(10)]
+    results = gateway.send_batch(messages, lane='sos', timeout=0.5)
+    assert [r.to for r in results] == [to for to, _ in messages]
+    assert all(r.sid and r.duration_ms is not None for r in results[:9])
+    assert results[9].timed_out and results[9].retryable and results[9].sid is None
+
+    assert gateway.queue_retries(results, delay=0, priority=PRIORITY_SOS, lane='sos') == 1
+    task = Task.query.one()
+    assert task.name == 'send_sms' and task.priority == PRIORITY_SOS and '"lane": "sos"' in task.payload
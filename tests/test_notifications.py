@@ -0,0 +1,64 @@
+import re
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Notification, Task
+from shrambandhu.utils.notifications import notify_many, insert_notifications, open_inbox
+from shrambandhu.utils.tasks import PRIORITY_BULK, TaskWorker
+from conftest import login
+
+
+def test_deferred_fanout_is_a_durable_task(app, monkeypatch):
+    monkeypatch.setattr('shrambandhu.utils.notifications.INSERT_BATCH_SIZE', 2)
+    users = [User(phone=f'+9170000000{n:02d}', role='worker', name=f'W{n}') for n in range(5)]
+    db.session.add_all(users)
+    db.session.commit()
+    user_ids = [user.id for user in users]
+
+    notify_many(user_ids[:1], 'job_completed', {'job_title': 'Dropped'}, defer=True)
+    db.session.rollback()
+    assert Task.query.count() == 0
+
+    assert notify_many(user_ids + [None, user_ids[0]], 'job_completed', {'job_title': 'Wall'}, defer=True) == 5
+    db.session.commit()
+    tasks = Task.query.order_by(Task.id).all()
+    assert [(task.name, task.priority) for task in tasks] == [('notify_many', PRIORITY_BULK)] * 3
+    assert Notification.query.count() == 0
+
+    assert TaskWorker(app, concurrency=2, poll_interval=0.01).run(drain=True) == 3
+    db.session.expire_all()
+    assert sorted(n.user_id for n in Notification.query.filter_by(title='Job Completed')) == sorted(user_ids)
+    assert all(user.unread_notification_count == 1 for user in User.query)
+    assert {task.status for task in Task.query} == {'done'}
+
+
+def test_mark_all_is_bounded_by_the_first_page(app, client):
+    app.config['NOTIFICATIONS_PER_PAGE'] = 2
+    user = User(phone='+917000000099', role='worker', name='W')
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    insert_notifications(db.session, [user_id] * 3, 'T', 'M', None)
+    db.session.commit()
+    login(client, user_id)
+
+    first = client.get('/worker/notifications?unread=1').get_data(as_text=True)
+    cursor = re.search(r'cursor=([\w-]+)', first).group(1)
+    second = client.get(f'/worker/notifications?unread=1&cursor={cursor}').get_data(as_text=True)
+    up_to_id = int(re.search(r'name="up_to_id" value="(\d+)"', second).group(1))
+    assert up_to_id == db.session.scalar(db.select(db.func.max(Notification.id)))
+
+    insert_notifications(db.session, [user_id], 'Newer', 'M', None)
+    db.session.commit()
+    assert client.post('/worker/notifications/read', data={'up_to_id': up_to_id}).status_code == 302
+    assert [n.title for n in Notification.query.filter_by(is_read=False)] == ['Newer']
+
+
+def test_inbox_marks_shown_items_despite_a_drifted_counter(app):
+    user = User(phone='+917000000098', role='worker', name='W')
+    db.session.add(user)
+    db.session.commit()
+    insert_notifications(db.session, [user.id] * 2, 'T', 'M', None)
+    user.unread_notification_count = 0
+    db.session.commit()
+    page = open_inbox(user)
+    assert [n.is_read for n in page.items] == [False, False] # Shown as they were
+    assert Notification.query.filter_by(is_read=False).count() == 0
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from unittest import mock
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Task
+from shrambandhu.utils.tasks import run_task
+from conftest import login
+
+
+def _worker(app):
+    user = User(phone='+919000000002', role='worker', name='W', is_phone_verified=False)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_resent_otp_is_queued_without_the_code(app, client):
+    user = _worker(app)
+    login(client, user.id)
+    with mock.patch('random.randint', return_value=123456): # The same code drawn twice
+        for _ in range(2):
+            assert client.post('/worker/profile/resend-otp').status_code == 302
+    tasks = Task.query.order_by(Task.id).all()
+    assert [task.name for task in tasks] == ['send_otp', 'send_otp']
+    assert not any('123456' in task.payload or '123456' in task.idempotency_key for task in tasks)
+
+    with mock.patch('shrambandhu.utils.twilio_client.deliver_sms') as deliver:
+        assert run_task(tasks[0].id)
+    deliver.assert_called_once_with('+919000000002', mock.ANY)
+    assert '123456' in deliver.call_args[0][1]
+
+
+def test_expired_otp_is_not_sent(app, client):
+    user = _worker(app)
+    login(client, user.id)
+    assert client.post('/worker/profile/resend-otp').status_code == 302
+    task_id = Task.query.one().id
+    user = db.session.get(User, user.id)
+    user.otp_expiry = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    with mock.patch('shrambandhu.utils.twilio_client.deliver_sms') as deliver:
+        assert run_task(task_id)
+    deliver.assert_not_called()
+    assert db.session.get(Task, task_id).status == 'done'
+
+
+def test_phone_registration_queues_the_otp(app, client):
+    response = client.post('/auth/register/phone', data={'phone': '+919876543210', 'role': 'worker'})
+    assert response.status_code == 302
+    task = Task.query.one()
+    user = User.query.filter_by(phone='+919876543210').one()
+    assert task.name == 'send_otp' and user.otp not in task.payload
+    with mock.patch('shrambandhu.utils.twilio_client.deliver_sms') as deliver:
+        assert run_task(task.id)
+    assert 'registration OTP' in deliver.call_args[0][1] and user.otp in deliver.call_args[0][1]
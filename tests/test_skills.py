@@ -0,0 +1,17 @@
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Skill, SkillAlias
+
+
+def test_unknown_skills_stay_out_of_the_taxonomy(app):
+    db.session.add(Skill(name='masonry', aliases=[SkillAlias(alias='masonry', language='en'),
+                                                  SkillAlias(alias='mistri', language='hi-Latn')]))
+    db.session.commit()
+    user = User(phone='+919000000003', role='worker', name='W')
+    user.set_skills_list(['Mistri', ' Solar  Panel ', 'masonry', 'solar panel'])
+    db.session.add(user)
+    db.session.commit()
+
+    assert [skill.name for skill in user.canonical_skills] == ['masonry']
+    assert user.skills == 'masonry,Solar Panel'
+    assert user.get_skills_list() == ['masonry', 'Solar Panel']
+    assert Skill.query.count() == 1 and SkillAlias.query.count() == 2
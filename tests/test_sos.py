@@ -0,0 +1,31 @@
+from shrambandhu.extensions import db
+from shrambandhu.models import User, Task, SosDeliveryAttempt, EmergencyAlert
+from shrambandhu.utils.sos import get_sos_dispatcher
+from shrambandhu.utils.tasks import PRIORITY_SOS, run_task
+from conftest import login
+
+
+def test_sos_request_hands_dispatch_off(app, client, monkeypatch):
+    worker = User(phone='+919100000001', role='worker', name='W', location_lat=17.4, location_lng=78.45)
+    admin = User(phone='+919100000002', role='admin', name='A')
+    db.session.add_all([worker, admin])
+    db.session.commit()
+    login(client, worker.id)
+    submitted = []
+    monkeypatch.setattr(get_sos_dispatcher(), 'submit', submitted.append)
+
+    response = client.post('/worker/sos', json={'lat': 17.4, 'lng': 78.45})
+    assert response.status_code == 200 and response.json['success']
+    task = Task.query.one()
+    assert (task.name, task.priority, task.status) == ('dispatch_sos', PRIORITY_SOS, 'queued')
+    assert submitted == [task.id]
+    assert SosDeliveryAttempt.query.count() == 0 # Nothing was sent while the request waited
+
+    get_sos_dispatcher()._run(task.id)
+    db.session.expire_all()
+    assert db.session.get(Task, task.id).status == 'done'
+    assert [a.phone for a in SosDeliveryAttempt.query] == ['+919100000002']
+    assert db.session.get(EmergencyAlert, response.json['alert_id']).recipients_notified == 1
+
+    run_task(task.id) # A second run (worker retry) doesn't message everyone again
+    assert SosDeliveryAttempt.query.count() == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+from shrambandhu.extensions import db
+from shrambandhu.models import Task
+from shrambandhu.utils.tasks import TASK_HANDLERS, TaskWorker, enqueue, requeue_expired
+
+runs = []
+
+
+def _slow(seconds):
+    runs.append(threading.current_thread().name)
+    time.sleep(seconds)
+
+
+def test_running_task_keeps_its_lease(app, monkeypatch):
+    monkeypatch.setitem(TASK_HANDLERS, 'slow', _slow)
+    runs.clear()
+    task = enqueue('slow', {'seconds': 1.5})
+    db.session.commit()
+    task_id = task.id
+
+    lease = 0.6
+    stop = threading.Event()
+    requeued = []
+
+    def watch(): # Another worker's lease check, running throughout
+        while not stop.wait(0.1):
+            with app.app_context():
+                requeued.append(requeue_expired(lease))
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    try:
+        assert TaskWorker(app, concurrency=1, poll_interval=0.05, lease_seconds=lease).run(drain=True) == 1
+    finally:
+        stop.set()
+        watcher.join()
+
+    db.session.expire_all()
+    task = db.session.get(Task, task_id)
+    assert task.status == 'done' and task.attempts == 1
+    assert len(runs) == 1 and not any(requeued)
+
+
+def test_rollback_discards_keyed_task(app, monkeypatch):
+    monkeypatch.setitem(TASK_HANDLERS, 'slow', _slow)
+    enqueue('slow', {'seconds': 0}, idempotency_key='rollback-me')
+    db.session.rollback()
+    assert Task.query.filter_by(idempotency_key='rollback-me').count() == 0
+
+
+def test_concurrent_enqueue_returns_existing_task(app, monkeypatch):
+    monkeypatch.setitem(TASK_HANDLERS, 'slow', _slow)
+    # Another request commits the same key between our check and our insert
+    with db.engine.begin() as connection:
+        connection.execute(Task.__table__.insert().values(name='slow', payload='{}', idempotency_key='double-submit'))
+    first = db.session.get(Task, db.session.execute(
+        db.select(Task.id).filter_by(idempotency_key='double-submit')).scalar_one())
+    real_query = Task.query
+
+    class MissingFirst: # The pre-check saw no task yet
+        def filter_by(self, **kw):
+            query = real_query.filter_by(**kw)
+            query.first = lambda: None
+            return query
+    monkeypatch.setattr(Task, 'query', MissingFirst())
+
+    task = enqueue('slow', {'seconds': 0}, idempotency_key='double-submit')
+    db.session.commit()
+    assert task.id == first.id
+    assert Task.query.filter_by(idempotency_key='double-submit').count() == 1